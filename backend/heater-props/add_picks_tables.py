@@ -1,28 +1,17 @@
 # add_picks_tables.py
-import sqlite3
+from sqlalchemy import inspect
+from app.database import engine, sync_schema
+from app import models  # noqa: F401 (registers the tables)
 
-# Direct connection to your database file
-# Replace 'database.db' with your actual database filename
-DATABASE_FILE = 'heater-props-new.db'
+# Uses the database at DATABASE_URL (see .env), SQLite or PostgreSQL
+# Creates only what is missing
+sync_schema()
 
-# Connect directly
-conn = sqlite3.connect(DATABASE_FILE)
+# Verify picks tables
+tables = inspect(engine).get_table_names()
 
-# Read and execute schema
-with open('app/schema.sql', 'r') as f:
-    conn.executescript(f.read())
+print("\n✓ Picks tables:")
+for table in ('picks', 'leaderboard_stats'):
+    print(f"  - {table}: {'ok' if table in tables else 'missing'}")
 
-conn.commit()
-
-# Verify new tables
-cursor = conn.cursor()
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('picks', 'pick_history', 'user_stats');")
-tables = cursor.fetchall()
-
-print("\n✓ New tables created:")
-for table in tables:
-    print(f"  - {table[0]}")
-
-conn.close()
-
-print("\nDone! Your existing tables are untouched.")
\ No newline at end of file
+print("\nDone! Your existing tables are untouched.")
@@ -0,0 +1,48 @@
+# app/atomic_file.py
+# Replace files in one step, so readers and crashes never see a partial file
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+def _fsync_directory(directory: str):
+    """Persist a rename (POSIX only; Windows can't open a directory)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def replacing(path: str) -> Iterator[str]:
+    """
+    Yield a temporary path next to path, renamed over path when the block succeeds
+
+    The temporary file is removed if the block raises. Whatever writes it
+    must have synced its data (write_atomically does) for the result to
+    survive a power loss as well as a crash.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _fsync_directory(directory)
+
+def write_atomically(path: str, text: str):
+    """Replace a text file with new contents, synced to disk before the rename"""
+    with replacing(path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
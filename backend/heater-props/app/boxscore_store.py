@@ -0,0 +1,113 @@
+# app/boxscore_store.py
+# Write-once local store for boxscores of final games
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+from app.atomic_file import write_atomically
+
+class BoxscoreStore:
+    def __init__(self, directory: str = 'boxscores'):
+        """
+        Final boxscores never change, so each one is fetched once and kept on disk
+
+        Files are named by game external id and record a SHA-256 of their
+        player stats, which is checked on read.
+
+        Args:
+            directory: Folder holding one <game_id>.json file per game
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _path(self, game_id: str) -> str:
+        return os.path.join(self.directory, f"{game_id}.json")
+
+    def _digest(self, player_stats: Dict[str, Dict[str, float]]) -> str:
+        canonical = json.dumps(player_stats, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _read(self, game_id: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Stored player stats for a game, or None if not stored, unreadable or failing its checksum"""
+        try:
+            with open(self._path(game_id), 'r') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading stored boxscore {game_id}: {e}")
+            return None
+
+        player_stats = record.get('player_stats')
+        if record.get('sha256') != self._digest(player_stats):
+            print(f"Stored boxscore {game_id} failed its checksum - ignoring")
+            return None
+        return player_stats
+
+    def has(self, game_id: str) -> bool:
+        """Whether a valid copy is stored (a corrupt one counts as missing)"""
+        return self._read(game_id) is not None
+
+    def get(self, game_id: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Stored player stats for a game, or None if not stored (or corrupt)"""
+        player_stats = self._read(game_id)
+
+        with self.lock:
+            if player_stats is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return player_stats
+
+    def put(self, game_id: str, player_stats: Dict[str, Dict[str, float]]) -> bool:
+        """
+        Store a final game's player stats (first write wins)
+
+        A stored file that can't be read back (corrupt or failing its
+        checksum) is replaced, so the game isn't refetched on every lookup.
+
+        Returns True if the file was written, False if a valid one already existed
+        """
+        path = self._path(game_id)
+        if self.has(game_id):
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        record = {
+            'game_id': game_id,
+            'stored_at': datetime.utcnow().isoformat(),
+            'sha256': self._digest(player_stats),
+            'player_stats': player_stats
+        }
+
+        # Readers never see a partial file
+        write_atomically(path, json.dumps(record))
+
+        with self.lock:
+            self.writes += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since startup and number of stored games"""
+        stored = 0
+        if os.path.isdir(self.directory):
+            stored = sum(1 for name in os.listdir(self.directory) if name.endswith('.json'))
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'stored_games': stored,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0.0
+            }
+
+# Global instance
+boxscore_store = BoxscoreStore()
@@ -0,0 +1,344 @@
+# app/cache_backends.py
+# Storage backends for CacheManager: per-process memory or a SQLite file shared by all workers
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from app.atomic_file import write_atomically
+
+# Items are dicts with 'data', 'timestamp' (datetime), 'ttl' (timedelta or None) and 'size' (bytes);
+# entries() returns the same without 'data'
+
+class MemoryCacheBackend:
+    def __init__(self, cache_file: str = 'data_cache.json', flush_delay_seconds: float = 1.0):
+        """
+        In-process LRU dict persisted to a JSON file by a write-behind thread
+
+        Args:
+            cache_file: JSON file the cache is loaded from and saved to
+            flush_delay_seconds: How long the background writer waits after a change,
+                so a burst of changes is written to disk once
+        """
+        # Least recently used first
+        self.cache = OrderedDict()
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+
+        # Write-behind persistence: changes mark the cache dirty and a background
+        # thread writes it out, outside the lock
+        self.flush_delay = flush_delay_seconds
+        self.dirty = False
+        self.flush_event = threading.Event()
+        self.write_lock = threading.Lock()
+        self.flushes = 0
+
+        # Load existing cache from file if it exists
+        self._load_cache_from_file()
+
+        self.flush_thread = threading.Thread(target=self._flush_loop, name="cache-writer", daemon=True)
+        self.flush_thread.start()
+
+    def _load_cache_from_file(self):
+        """Load cache from JSON file on startup (CacheManager sweeps what has expired)"""
+        if not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, 'r') as f:
+                file_data = json.load(f)
+
+            # Oldest first, so the LRU order roughly follows age
+            items = []
+            for key, value in file_data.items():
+                # Convert ISO strings back to datetime objects
+                items.append((key, {
+                    'data': value['data'],
+                    'timestamp': datetime.fromisoformat(value['timestamp']),
+                    'ttl': timedelta(hours=value['ttl_hours']) if value.get('ttl_hours') is not None else None,
+                    'size': len(json.dumps(value['data'], default=str))
+                }))
+
+            for key, item in sorted(items, key=lambda pair: pair[1]['timestamp']):
+                self.cache[key] = item
+                self.total_bytes += item['size']
+
+            print(f"Loaded cache from {self.cache_file} ({len(self.cache)} entries)")
+        except Exception as e:
+            print(f"Error loading cache file: {e}")
+            self.cache = OrderedDict()
+            self.total_bytes = 0
+
+    def _save_cache_to_file(self, entries: Dict[str, Any]) -> bool:
+        """Save a copy of the cache to the JSON file (temp file + rename, so a crash never leaves a partial file)"""
+        try:
+            # Convert datetime objects to ISO strings for JSON serialization
+            file_data = {}
+            for key, value in entries.items():
+                file_data[key] = {
+                    'data': value['data'],
+                    'timestamp': value['timestamp'].isoformat()
+                }
+                if value.get('ttl') is not None:
+                    file_data[key]['ttl_hours'] = value['ttl'].total_seconds() / 3600
+
+            write_atomically(self.cache_file, json.dumps(file_data, indent=2))
+            return True
+        except Exception as e:
+            print(f"Error saving cache file: {e}")
+            return False
+
+    def flush(self):
+        """Write pending changes to disk now (no-op if nothing changed)"""
+        # One writer at a time, so an older copy never replaces a newer one
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+                entries = dict(self.cache)
+                self.dirty = False
+
+            if self._save_cache_to_file(entries):
+                self.flushes += 1
+            else:
+                # Try again with the next change
+                with self.lock:
+                    self.dirty = True
+
+    def _flush_loop(self):
+        while True:
+            self.flush_event.wait()
+            # Let a burst of changes collect into one write
+            time.sleep(self.flush_delay)
+            self.flush_event.clear()
+            self.flush()
+
+    def _mark_dirty(self):
+        """Called with self.lock held"""
+        self.dirty = True
+        self.flush_event.set()
+
+    def _remove(self, key: str):
+        """Called with self.lock held"""
+        item = self.cache.pop(key)
+        self.total_bytes -= item['size']
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            item = self.cache.get(key)
+            if item is not None:
+                self.cache.move_to_end(key)
+            return item
+
+    def put(self, key: str, item: Dict[str, Any]):
+        with self.lock:
+            if key in self.cache:
+                self._remove(key)
+            self.cache[key] = item
+            self.total_bytes += item['size']
+            self._mark_dirty()
+
+    def delete(self, keys: List[str]) -> int:
+        with self.lock:
+            removed = 0
+            for key in keys:
+                if key in self.cache:
+                    self._remove(key)
+                    removed += 1
+            if removed:
+                self._mark_dirty()
+            return removed
+
+    def clear(self):
+        with self.lock:
+            self.cache = OrderedDict()
+            self.total_bytes = 0
+            self._mark_dirty()
+
+    def entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self.lock:
+            return [
+                (key, {'timestamp': item['timestamp'], 'ttl': item['ttl'], 'size': item['size']})
+                for key, item in self.cache.items()
+            ]
+
+    def evict(self, max_entries: int, max_bytes: int) -> int:
+        """Drop least recently used entries until within budget"""
+        with self.lock:
+            evicted = 0
+            while self.cache and (len(self.cache) > max_entries or self.total_bytes > max_bytes):
+                self._remove(next(iter(self.cache)))
+                evicted += 1
+            if evicted:
+                self._mark_dirty()
+            return evicted
+
+    def usage(self) -> Tuple[int, int]:
+        with self.lock:
+            return len(self.cache), self.total_bytes
+
+    def acquire_lease(self, key: str, seconds: float) -> bool:
+        """Only this process uses the cache, and CacheManager already allows one load per key"""
+        return True
+
+    def release_lease(self, key: str):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'backend': 'memory', 'file': self.cache_file, 'flushes': self.flushes}
+
+class SQLiteCacheBackend:
+    def __init__(self, path: str = 'cache.db'):
+        """
+        Cache stored in a SQLite file that every worker process on the host shares
+
+        WAL mode lets readers run while one writer commits, writes are single
+        statements (atomic), and leases make sure only one worker at a time
+        runs the loader for a key.
+
+        Args:
+            path: SQLite file
+        """
+        self.path = path
+        self.local = threading.local()
+        self.owner = f"{os.getpid()}"
+
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                ttl_seconds REAL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_access ON cache_entries (last_access)")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS cache_leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One autocommit connection per thread"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def _owner(self) -> str:
+        return f"{self.owner}:{threading.get_ident()}"
+
+    def _to_item(self, data: Optional[str], timestamp: float, ttl_seconds: Optional[float], size: int) -> Dict[str, Any]:
+        item = {
+            'timestamp': datetime.fromtimestamp(timestamp),
+            'ttl': timedelta(seconds=ttl_seconds) if ttl_seconds is not None else None,
+            'size': size
+        }
+        if data is not None:
+            item['data'] = json.loads(data)
+        return item
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT data, timestamp, ttl_seconds, size FROM cache_entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        # Record the access for LRU (at most once a second per key, to keep reads cheap)
+        now = time.time()
+        connection.execute(
+            "UPDATE cache_entries SET last_access = ? WHERE key = ? AND last_access < ?",
+            (now, key, now - 1)
+        )
+        return self._to_item(*row)
+
+    def put(self, key: str, item: Dict[str, Any]):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                json.dumps(item['data'], default=str),
+                item['timestamp'].timestamp(),
+                item['ttl'].total_seconds() if item['ttl'] is not None else None,
+                item['size'],
+                time.time()
+            )
+        )
+
+    def delete(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        cursor = self._connection().executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+        return cursor.rowcount
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self._connection().execute(
+            "SELECT key, timestamp, ttl_seconds, size FROM cache_entries ORDER BY last_access"
+        ).fetchall()
+        return [(key, self._to_item(None, timestamp, ttl_seconds, size)) for key, timestamp, ttl_seconds, size in rows]
+
+    def evict(self, max_entries: int, max_bytes: int) -> int:
+        """Drop least recently used entries until within budget (one statement)"""
+        cursor = self._connection().execute("""
+            DELETE FROM cache_entries WHERE key IN (
+                SELECT key FROM (
+                    SELECT
+                        key,
+                        ROW_NUMBER() OVER (ORDER BY last_access DESC) AS position,
+                        SUM(size) OVER (ORDER BY last_access DESC ROWS UNBOUNDED PRECEDING) AS running_bytes
+                    FROM cache_entries
+                )
+                WHERE position > ? OR running_bytes > ?
+            )
+        """, (max_entries, max_bytes))
+        return cursor.rowcount
+
+    def usage(self) -> Tuple[int, int]:
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        return count, total
+
+    def acquire_lease(self, key: str, seconds: float) -> bool:
+        """Claim the right to load a key across workers; False if another worker holds it"""
+        now = time.time()
+        cursor = self._connection().execute("""
+            INSERT INTO cache_leases VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE cache_leases.expires_at < ?
+        """, (key, self._owner(), now + seconds, now))
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str):
+        self._connection().execute(
+            "DELETE FROM cache_leases WHERE key = ? AND owner = ?",
+            (key, self._owner())
+        )
+
+    def flush(self):
+        """Writes are committed immediately"""
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'backend': 'sqlite', 'file': self.path}
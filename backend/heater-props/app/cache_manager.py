@@ -1,57 +1,139 @@
 # app/cache_manager.py
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Any, Tuple
+import atexit
 import threading
+import time
 import json
-import os
+from app.config import get_settings
+from app.cache_backends import MemoryCacheBackend, SQLiteCacheBackend
 
 class CacheManager:
-    def __init__(self, cache_duration_hours: int = 12):
+    def __init__(
+        self,
+        cache_duration_hours: float = 12,
+        flush_delay_seconds: float = 1.0,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        namespace_ttl_hours: Optional[Dict[str, float]] = None,
+        sweep_interval_seconds: float = 300,
+        max_stale_hours: float = 24,
+        backend=None,
+        lease_seconds: float = 60
+    ):
         """
         Initialize cache manager
         
+        Keys may be namespaced as "namespace:key"; a namespace can have its own
+        TTL, and set() can override the TTL per key. Least recently used entries
+        are evicted when the entry or byte budget is exceeded, and expired
+        entries are swept periodically.
+        
+        get_or_load() runs one loader per key at a time and can serve an
+        expired value (up to max_stale_hours past its TTL) while it refreshes
+        in the background.
+        
         Args:
-            cache_duration_hours: How long to keep cached data before refreshing
+            cache_duration_hours: Default time to keep cached data before refreshing
+            flush_delay_seconds: How long the background writer waits after a change,
+                so a burst of changes is written to disk once (memory backend)
+            max_entries: Most entries kept
+            max_bytes: Most bytes kept (size of each value as JSON)
+            namespace_ttl_hours: Dictionary of namespace -> TTL in hours
+            sweep_interval_seconds: How often expired entries are removed
+            max_stale_hours: How long past its TTL an entry may still be served by
+                get_or_load() while it is refreshed (expired entries are kept this long)
+            backend: Storage backend (default: MemoryCacheBackend on data_cache.json;
+                SQLiteCacheBackend shares one cache between worker processes)
+            lease_seconds: With a shared backend, how long one worker may hold the
+                right to load a key before another worker takes over
         """
         self.cache_duration = timedelta(hours=cache_duration_hours)
-        self.cache = {}
-        self.cache_file = 'data_cache.json'
+        self.namespace_ttls = {
+            namespace: timedelta(hours=hours) for namespace, hours in (namespace_ttl_hours or {}).items()
+        }
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval_seconds
+        self.max_stale = timedelta(hours=max_stale_hours)
+        self.lease_seconds = lease_seconds
+        
+        self.backend = backend or MemoryCacheBackend('data_cache.json', flush_delay_seconds=flush_delay_seconds)
         self.lock = threading.Lock()
         
-        # Load existing cache from file if it exists
-        self._load_cache_from_file()
+        self.stats = {
+            'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'swept': 0, 'rejected': 0,
+            'loads': 0, 'load_waits': 0, 'stale_served': 0, 'refresh_errors': 0, 'lease_waits': 0
+        }
+        self.namespace_stats = {}
+        
+        # Single-flight: key -> Future of the load in progress
+        self.in_flight = {}
+        self.refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+        
+        # Drop what expired while we were down and apply the budget
+        self.sweep()
+        self.stats['evictions'] += self.backend.evict(self.max_entries, self.max_bytes)
+        
+        # Don't lose the last changes on a normal exit
+        atexit.register(self.flush)
+        
+        # Expiry sweeper
+        self.sweep_thread = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+        self.sweep_thread.start()
+    
+    def _namespace(self, key: str) -> str:
+        return key.split(':', 1)[0] if ':' in key else ''
+    
+    def _ttl(self, key: str, item: Dict[str, Any]) -> timedelta:
+        """Per-key TTL if one was given, else the namespace TTL, else the default"""
+        if item.get('ttl') is not None:
+            return item['ttl']
+        return self.namespace_ttls.get(self._namespace(key), self.cache_duration)
     
-    def _load_cache_from_file(self):
-        """Load cache from JSON file on startup"""
-        if os.path.exists(self.cache_file):
+    def _size(self, data: Any) -> int:
+        return len(json.dumps(data, default=str))
+    
+    def flush(self):
+        """Write pending changes to disk now (memory backend; shared backends write immediately)"""
+        self.backend.flush()
+    
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
             try:
-                with open(self.cache_file, 'r') as f:
-                    file_data = json.load(f)
-                    # Convert ISO strings back to datetime objects
-                    for key, value in file_data.items():
-                        if 'timestamp' in value:
-                            value['timestamp'] = datetime.fromisoformat(value['timestamp'])
-                    self.cache = file_data
-                    print(f"Loaded cache from {self.cache_file}")
+                self.sweep()
             except Exception as e:
-                print(f"Error loading cache file: {e}")
-                self.cache = {}
+                print(f"Error sweeping cache: {e}")
     
-    def _save_cache_to_file(self):
-        """Save cache to JSON file for persistence"""
-        try:
-            # Convert datetime objects to ISO strings for JSON serialization
-            file_data = {}
-            for key, value in self.cache.items():
-                file_data[key] = {
-                    'data': value['data'],
-                    'timestamp': value['timestamp'].isoformat()
-                }
-            
-            with open(self.cache_file, 'w') as f:
-                json.dump(file_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving cache file: {e}")
+    def _count(self, key: str, field: str):
+        """Called with self.lock held"""
+        self.stats[field] += 1
+        counts = self.namespace_stats.setdefault(self._namespace(key) or '(none)', {'hits': 0, 'misses': 0})
+        if field in counts:
+            counts[field] += 1
+    
+    def sweep(self) -> int:
+        """
+        Remove entries that are past their TTL plus the max staleness
+        
+        Returns:
+            Number of entries removed
+        """
+        now = datetime.now()
+        expired = [
+            key for key, item in self.backend.entries()
+            if now - item['timestamp'] >= self._ttl(key, item) + self.max_stale
+        ]
+        removed = self.backend.delete(expired)
+        
+        with self.lock:
+            self.stats['swept'] += removed
+        
+        if removed:
+            print(f"Swept {removed} expired cache entries")
+        return removed
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -59,45 +141,215 @@ class CacheManager:
         
         Args:
             key: Cache key
-            
+        
         Returns:
             Cached data if fresh, None if expired or doesn't exist
         """
+        cached_item = self.backend.get(key)
+        
         with self.lock:
-            if key not in self.cache:
+            if cached_item is None:
+                self._count(key, 'misses')
                 return None
             
-            cached_item = self.cache[key]
-            timestamp = cached_item['timestamp']
-            data = cached_item['data']
-            
-            # Check if cache is still fresh
-            if datetime.now() - timestamp < self.cache_duration:
-                age_hours = (datetime.now() - timestamp).total_seconds() / 3600
-                print(f"Cache hit for '{key}' (age: {age_hours:.1f} hours)")
-                return data
+            age = datetime.now() - cached_item['timestamp']
+            fresh = age < self._ttl(key, cached_item)
+            if fresh:
+                self._count(key, 'hits')
             else:
-                age_hours = (datetime.now() - timestamp).total_seconds() / 3600
-                print(f"Cache expired for '{key}' (age: {age_hours:.1f} hours)")
-                return None
+                self._count(key, 'misses')
+                self.stats['expired'] += 1
+        
+        age_hours = age.total_seconds() / 3600
+        
+        # Check if cache is still fresh
+        if fresh:
+            print(f"Cache hit for '{key}' (age: {age_hours:.1f} hours)")
+            return cached_item['data']
+        else:
+            print(f"Cache expired for '{key}' (age: {age_hours:.1f} hours)")
+            return None
     
-    def set(self, key: str, data: Any):
+    def set(self, key: str, data: Any, ttl_hours: Optional[float] = None):
         """
         Store data in cache with current timestamp
         
         Args:
-            key: Cache key
+            key: Cache key ("namespace:key" to use a namespace TTL)
             data: Data to cache
+            ttl_hours: TTL for this key, overriding the namespace/default TTL
+        """
+        now = datetime.now()
+        
+        # Size as JSON, counted against the byte budget
+        size = self._size(data)
+        if size > self.max_bytes:
+            with self.lock:
+                self.stats['rejected'] += 1
+            print(f"Not caching '{key}': {size} bytes is over the {self.max_bytes} byte budget")
+            return
+        
+        self.backend.put(key, {
+            'data': data,
+            'timestamp': now,
+            'ttl': timedelta(hours=ttl_hours) if ttl_hours is not None else None,
+            'size': size
+        })
+        evicted = self.backend.evict(self.max_entries, self.max_bytes)
+        
+        if evicted:
+            with self.lock:
+                self.stats['evictions'] += evicted
+        
+        print(f"Cached '{key}' at {now.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    def _wait_for_other_worker(self, key: str, seen: Optional[datetime]) -> Optional[Dict[str, Any]]:
+        """
+        Take the cross-worker lease for a key, or wait for the worker holding it
+        
+        Returns the item another worker stored (newer than seen), or None once
+        this worker holds the lease and should load itself
+        """
+        waited = False
+        while not self.backend.acquire_lease(key, self.lease_seconds):
+            if not waited:
+                waited = True
+                with self.lock:
+                    self.stats['lease_waits'] += 1
+            
+            item = self.backend.get(key)
+            if item is not None and (seen is None or item['timestamp'] > seen):
+                return item
+            time.sleep(0.1)
+        
+        # The previous holder may have stored the value just before releasing the lease
+        if waited:
+            item = self.backend.get(key)
+            if item is not None and (seen is None or item['timestamp'] > seen):
+                self.backend.release_lease(key)
+                return item
+        return None
+    
+    def _load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        future: Future,
+        ttl_hours: Optional[float],
+        seen: Optional[datetime]
+    ) -> Tuple[Any, str]:
+        """
+        Run the loader for a key this thread owns, store the result and wake any waiters
+        
+        Returns (data, 'loaded'), or (data, 'joined') if another worker loaded it
+        """
+        try:
+            item = self._wait_for_other_worker(key, seen)
+            if item is not None:
+                data = item['data']
+                source = 'joined'
+            else:
+                try:
+                    data = loader()
+                    self.set(key, data, ttl_hours=ttl_hours)
+                finally:
+                    self.backend.release_lease(key)
+                source = 'loaded'
+        except Exception as e:
+            with self.lock:
+                del self.in_flight[key]
+                future.set_exception(e)
+            raise
+        
+        # Resolve and retire the future in one step, so a refresh never joins a finished load
+        with self.lock:
+            del self.in_flight[key]
+            future.set_result(data)
+        return data, source
+    
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any], future: Future, ttl_hours: Optional[float], seen: datetime):
+        try:
+            self._load(key, loader, future, ttl_hours, seen)
+            print(f"Refreshed '{key}' in the background")
+        except Exception as e:
+            with self.lock:
+                self.stats['refresh_errors'] += 1
+            print(f"Error refreshing '{key}' in the background: {e}")
+    
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl_hours: Optional[float] = None,
+        max_stale_hours: Optional[float] = None,
+        refresh: bool = False
+    ) -> Tuple[Any, str]:
         """
+        Get cached data, loading it at most once per key however many callers miss
+        
+        A fresh value is returned as is. An expired value that is no more than
+        max_stale_hours past its TTL is returned immediately while one background
+        load refreshes it. Otherwise the first caller runs loader() and everyone
+        else asking for the same key waits for its result (or its exception).
+        With a shared backend this holds across worker processes too.
+        
+        The source says where the data came from:
+            'fresh': the cached value, within its TTL
+            'stale': the expired cached value (a background load refreshes it)
+            'loaded': this call ran loader()
+            'joined': a load already running here or in another worker
+        
+        Args:
+            key: Cache key
+            loader: Function that fetches the data
+            ttl_hours: TTL for the stored result (see set())
+            max_stale_hours: Staleness limit for this call (defaults to the cache's)
+            refresh: Skip the cached value and load (still joining a load in progress)
+            
+        Returns:
+            (data, source)
+        """
+        max_stale = timedelta(hours=max_stale_hours) if max_stale_hours is not None else self.max_stale
+        item = self.backend.get(key)
+        seen = item['timestamp'] if item is not None else None
+        
         with self.lock:
-            self.cache[key] = {
-                'data': data,
-                'timestamp': datetime.now()
-            }
-            print(f"Cached '{key}' at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            future = self.in_flight.get(key)
             
-            # Save to file for persistence
-            self._save_cache_to_file()
+            if item is not None and not refresh:
+                age = datetime.now() - item['timestamp']
+                ttl = self._ttl(key, item)
+                
+                if age < ttl:
+                    self._count(key, 'hits')
+                    return item['data'], 'fresh'
+                
+                if age < ttl + max_stale:
+                    self._count(key, 'hits')
+                    self.stats['stale_served'] += 1
+                    
+                    if future is None:
+                        future = Future()
+                        self.in_flight[key] = future
+                        self.stats['loads'] += 1
+                        self.refresh_executor.submit(self._refresh_in_background, key, loader, future, ttl_hours, seen)
+                    return item['data'], 'stale'
+            
+            self._count(key, 'misses')
+            if future is not None:
+                self.stats['load_waits'] += 1
+                owner = False
+            else:
+                future = Future()
+                self.in_flight[key] = future
+                self.stats['loads'] += 1
+                owner = True
+        
+        if not owner:
+            return future.result(), 'joined'
+        
+        # Whatever we saw (expired or skipped by refresh) must not count as another worker's load
+        return self._load(key, loader, future, ttl_hours, seen)
     
     def is_stale(self, key: str) -> bool:
         """
@@ -105,16 +357,15 @@ class CacheManager:
         
         Args:
             key: Cache key
-            
+        
         Returns:
             True if data exists but is expired
         """
-        with self.lock:
-            if key not in self.cache:
-                return False
-            
-            timestamp = self.cache[key]['timestamp']
-            return datetime.now() - timestamp >= self.cache_duration
+        item = self.backend.get(key)
+        if item is None:
+            return False
+        
+        return datetime.now() - item['timestamp'] >= self._ttl(key, item)
     
     def clear(self, key: Optional[str] = None):
         """
@@ -123,16 +374,12 @@ class CacheManager:
         Args:
             key: Specific key to clear, or None to clear all
         """
-        with self.lock:
-            if key:
-                if key in self.cache:
-                    del self.cache[key]
-                    print(f"Cleared cache for '{key}'")
-            else:
-                self.cache = {}
-                print("Cleared all cache")
-            
-            self._save_cache_to_file()
+        if key:
+            if self.backend.delete([key]):
+                print(f"Cleared cache for '{key}'")
+        else:
+            self.backend.clear()
+            print("Cleared all cache")
     
     def get_cache_info(self) -> Dict[str, Any]:
         """
@@ -141,21 +388,54 @@ class CacheManager:
         Returns:
             Dictionary with cache statistics
         """
-        with self.lock:
-            info = {}
-            for key, value in self.cache.items():
-                timestamp = value['timestamp']
-                age = datetime.now() - timestamp
-                age_hours = age.total_seconds() / 3600
-                
-                info[key] = {
-                    'cached_at': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    'age_hours': round(age_hours, 1),
-                    'is_fresh': age < self.cache_duration,
-                    'expires_in_hours': round((self.cache_duration.total_seconds() / 3600) - age_hours, 1)
-                }
+        info = {}
+        for key, value in self.backend.entries():
+            timestamp = value['timestamp']
+            ttl = self._ttl(key, value)
+            age = datetime.now() - timestamp
+            age_hours = age.total_seconds() / 3600
             
-            return info
+            info[key] = {
+                'cached_at': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                'age_hours': round(age_hours, 1),
+                'is_fresh': age < ttl,
+                'expires_in_hours': round((ttl.total_seconds() / 3600) - age_hours, 1),
+                'ttl_hours': round(ttl.total_seconds() / 3600, 2),
+                'bytes': value['size']
+            }
+        
+        return info
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss/eviction counters and current size
+        
+        Returns:
+            Dictionary with counters since startup (this process) and budget usage
+        """
+        entries, total_bytes = self.backend.usage()
+        
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_rate': round(self.stats['hits'] / lookups * 100, 1) if lookups else 0.0,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'bytes': total_bytes,
+                'max_bytes': self.max_bytes,
+                **self.backend.get_stats(),
+                'namespaces': {namespace: dict(counts) for namespace, counts in self.namespace_stats.items()}
+            }
 
 # Global cache instance
-cache_manager = CacheManager(cache_duration_hours=12)
\ No newline at end of file
+settings = get_settings()
+cache_manager = CacheManager(
+    cache_duration_hours=12,
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_mb * 1024 * 1024,
+    namespace_ttl_hours=settings.cache_namespace_ttl_hours,
+    sweep_interval_seconds=settings.cache_sweep_seconds,
+    max_stale_hours=settings.cache_max_stale_hours,
+    backend=SQLiteCacheBackend(settings.cache_sqlite_path) if settings.cache_backend == 'sqlite' else None
+)
@@ -1,12 +1,70 @@
 # app/config.py
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Dict
 
 class Settings(BaseSettings):
     database_url: str
     odds_api_key: str
     odds_api_base_url: str = "https://api.the-odds-api.com/v4"
     
+    # SQLite: page cache and memory-mapped I/O per connection (MB), how long a
+    # writer waits for the write lock, and connections kept for read-only routes
+    database_cache_mb: int = 16
+    database_mmap_mb: int = 256
+    database_busy_timeout_seconds: float = 30
+    database_reader_pool_size: int = 8
+    
+    # Database server (e.g. DATABASE_URL=postgresql+psycopg2://...): pooled
+    # connections per process, idle recycle time and a per-statement limit (0 = none)
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_recycle_seconds: int = 1800
+    database_statement_timeout_seconds: float = 30
+    
+    # NBA Stats API client (shared by the stats and grading services)
+    nba_requests_per_second: float = 2.0
+    nba_timeout_seconds: float = 10
+    nba_max_connections: int = 8
+    nba_max_workers: int = 4
+    nba_max_games_in_flight: int = 2
+    nba_max_retries: int = 3
+    
+    # Local player game log store: refetch (new games only) after this many hours
+    game_log_refresh_hours: int = 12
+    
+    # generate_all_projections.py: reuse roster/game log lookups across games for this long
+    slate_memo_hours: float = 12
+    
+    # Check for a new projections file this often (seconds, 0 disables hot reload)
+    projections_reload_seconds: int = 30
+    
+    # Shared cache budget, sweep interval and per-namespace TTLs (e.g. {"games": 12, "boxscore": 1})
+    cache_max_entries: int = 1000
+    cache_max_mb: int = 64
+    cache_sweep_seconds: int = 300
+    cache_namespace_ttl_hours: Dict[str, float] = {}
+    # get_or_load serves an expired entry this long past its TTL while refreshing it
+    cache_max_stale_hours: float = 24
+    # "memory" (per process, saved to data_cache.json) or "sqlite" (one file shared by all workers)
+    cache_backend: str = "memory"
+    cache_sqlite_path: str = "cache.db"
+    
+    # Projection engine: recent-game windows to blend (e.g. [5, 10, 20]),
+    # recency half-life in games (0 = plain mean) and share of the projection
+    # taken from same-venue games (0 = ignore home/away)
+    projection_windows: List[int] = [10]
+    projection_ewma_halflife: float = 0
+    projection_home_away_weight: float = 0
+    
+    # Background jobs (intervals in minutes, 0 disables the schedule)
+    job_workers: int = 2
+    odds_refresh_interval_minutes: int = 720
+    grading_interval_minutes: int = 60
+    # Workers heartbeat their queued/running jobs; a job that misses three
+    # heartbeats belonged to a worker that died and is marked failed
+    job_heartbeat_seconds: int = 30
+    
     class Config:
         env_file = ".env"
 
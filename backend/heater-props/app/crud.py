@@ -1,33 +1,104 @@
 # app/crud.py
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 from app import models, schemas
 
-def create_game(db: Session, game: schemas.GameCreate) -> models.Game:
-    """Create a new game"""
+def create_game(db: Session, game: schemas.GameCreate, commit: bool = True) -> models.Game:
+    """Create a new game (commit=False only flushes, so the caller can batch the transaction)"""
     db_game = models.Game(**game.dict())
     db.add(db_game)
-    db.commit()
-    db.refresh(db_game)
+    if commit:
+        db.commit()
+        db.refresh(db_game)
+    else:
+        db.flush()
     return db_game
 
+def _upsert_insert(db: Session, model):
+    """INSERT with on_conflict_do_update() for the session's database (SQLite or PostgreSQL)"""
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise ValueError(f"Upserts are not supported on {dialect}")
+
+def upsert_game(db: Session, game: schemas.GameCreate) -> models.Game:
+    """
+    Insert a game, or update teams/start time if its external_id already exists
+    
+    Safe when two refreshes add the same game at once. Nothing is committed.
+    """
+    values = game.dict()
+    values['updated_at'] = datetime.utcnow()
+    
+    stmt = _upsert_insert(db, models.Game).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['external_id'],
+        set_={field: stmt.excluded[field] for field in ('home_team', 'away_team', 'commence_time', 'updated_at')}
+    ).returning(models.Game.id)
+    
+    game_id = db.execute(stmt).scalar_one()
+    return db.get(models.Game, game_id)
+
+def upsert_pick(db: Session, user_id: int, player_prop_id: int, selection: str, line: float) -> int:
+    """
+    Save a user's pick on a prop, replacing the selection and line if they already picked it
+    
+    One statement, so double submits can't create two picks. Nothing is committed.
+    
+    Returns the pick id
+    """
+    stmt = _upsert_insert(db, models.Pick).values(
+        user_id=user_id,
+        player_prop_id=player_prop_id,
+        selection=selection,
+        line=line,
+        created_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'player_prop_id'],
+        set_={'selection': stmt.excluded.selection, 'line': stmt.excluded.line}
+    ).returning(models.Pick.id)
+    
+    return db.execute(stmt).scalar_one()
+
+def get_game(db: Session, game_id: int) -> Optional[models.Game]:
+    """Get a game with its player props loaded (two queries total)"""
+    return db.query(models.Game).options(
+        selectinload(models.Game.player_props.and_(models.PlayerProp.retired_at.is_(None)))
+    ).filter(models.Game.id == game_id).first()
+
 def get_game_by_external_id(db: Session, external_id: str) -> Optional[models.Game]:
     """Get game by external ID"""
     return db.query(models.Game).filter(models.Game.external_id == external_id).first()
 
-def get_upcoming_games(db: Session, days_ahead: int = 14) -> List[models.Game]:
-    """Get games in the next N days"""
+def _upcoming_games_query(days_ahead: int):
     now = datetime.utcnow()
     future = now + timedelta(days=days_ahead)
     
-    return db.query(models.Game).filter(
+    # selectinload fetches every game's props in one extra IN query,
+    # instead of one lazy SELECT per game during serialization
+    return select(models.Game).options(
+        selectinload(models.Game.player_props.and_(models.PlayerProp.retired_at.is_(None)))
+    ).where(
         and_(
             models.Game.commence_time >= now,
             models.Game.commence_time <= future
         )
-    ).order_by(models.Game.commence_time).all()
+    ).order_by(models.Game.commence_time)
+
+def get_upcoming_games(db: Session, days_ahead: int = 14) -> List[models.Game]:
+    """Get games in the next N days, with player props eagerly loaded"""
+    return db.scalars(_upcoming_games_query(days_ahead)).all()
+
+async def get_upcoming_games_async(db: AsyncSession, days_ahead: int = 14) -> List[models.Game]:
+    """get_upcoming_games() for async routes"""
+    return (await db.scalars(_upcoming_games_query(days_ahead))).all()
 
 def create_player_prop(db: Session, prop: schemas.PlayerPropCreate) -> models.PlayerProp:
     """Create a new player prop"""
@@ -37,20 +108,217 @@ def create_player_prop(db: Session, prop: schemas.PlayerPropCreate) -> models.Pl
     db.refresh(db_prop)
     return db_prop
 
-def delete_game_props(db: Session, game_id: int):
-    """Delete all props for a game (before updating)"""
-    db.query(models.PlayerProp).filter(models.PlayerProp.game_id == game_id).delete()
+def bulk_create_player_props(db: Session, props: List[Dict[str, Any]]) -> int:
+    """
+    Insert many player props in a single transaction
+    
+    Uses one executemany-style core INSERT with no per-row refresh, and commits
+    once together with anything else pending on the session. A prop that is
+    already live (e.g. inserted by a concurrent refresh) gets the new line
+    and odds instead of a duplicate row.
+    
+    Returns the number of rows inserted
+    """
+    if not props:
+        db.commit()
+        return 0
+    
+    now = datetime.utcnow()
+    rows = {}
+    for prop in props:
+        row = schemas.PlayerPropCreate(**prop).dict()
+        row['updated_at'] = now
+        # A statement can't insert and update the same key, so the last one wins
+        rows[(row['game_id'], row['player_name'], row['prop_type'], row['bookmaker'])] = row
+    rows = list(rows.values())
+    
+    stmt = _upsert_insert(db, models.PlayerProp)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['game_id', 'player_name', 'prop_type', 'bookmaker'],
+        index_where=models.PlayerProp.retired_at.is_(None),
+        set_={field: stmt.excluded[field] for field in ('line', 'over_odds', 'under_odds', 'updated_at')}
+    )
+    db.execute(stmt, rows)
+    
+    # Opening line for each new prop, copied over in one INSERT ... SELECT
+    game_ids = {row['game_id'] for row in rows}
+    record_new_prop_lines(db, game_ids, now)
+    
     db.commit()
+    return len(rows)
+
+def record_new_prop_lines(db: Session, game_ids, inserted_at: datetime):
+    """Append history rows for props inserted at inserted_at (ids are unknown after a bulk insert)"""
+    snapshot_source = db.query(
+        models.PlayerProp.id,
+        models.PlayerProp.game_id,
+        models.PlayerProp.updated_at,
+        models.PlayerProp.line,
+        models.PlayerProp.over_odds,
+        models.PlayerProp.under_odds
+    ).filter(
+        models.PlayerProp.game_id.in_(game_ids),
+        models.PlayerProp.updated_at == inserted_at
+    )
+    
+    db.execute(insert(models.PropLineSnapshot).from_select(
+        ['player_prop_id', 'game_id', 'recorded_at', 'line', 'over_odds', 'under_odds'],
+        snapshot_source
+    ))
+
+def _line_snapshot(prop: models.PlayerProp, recorded_at: datetime) -> models.PropLineSnapshot:
+    return models.PropLineSnapshot(
+        player_prop_id=prop.id,
+        game_id=prop.game_id,
+        recorded_at=recorded_at,
+        line=float(prop.line),
+        over_odds=prop.over_odds,
+        under_odds=prop.under_odds
+    )
+
+def sync_game_props(db: Session, game_id: int, props: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Diff a game's current props against a fresh set, keyed on (player_name, prop_type, bookmaker)
+    
+    Changed lines/odds are updated in place (and appended to the line
+    history), previously retired props that
+    reappear are revived, and props missing from the new set are retired
+    (not deleted, so picks keep pointing at them). Unchanged rows are not touched.
+    Nothing is committed; new props are returned for bulk_create_player_props.
+    
+    Returns:
+        Dictionary with 'new_props' (rows still to insert) and
+        'updated', 'retired', 'unchanged' counts
+    """
+    now = datetime.utcnow()
+    existing = {}
+    duplicates = []
+    
+    for prop in db.query(models.PlayerProp).filter(models.PlayerProp.game_id == game_id):
+        key = (prop.player_name, prop.prop_type, prop.bookmaker)
+        if key not in existing:
+            existing[key] = prop
+        elif existing[key].retired_at is not None and prop.retired_at is None:
+            # Keep the live row, so reviving a key never makes two live rows
+            duplicates.append(existing[key])
+            existing[key] = prop
+        else:
+            duplicates.append(prop)
+    
+    # Props that predate line history get their previous line recorded before the first change
+    has_history = {
+        prop_id for (prop_id,) in db.query(models.PropLineSnapshot.player_prop_id).filter(
+            models.PropLineSnapshot.game_id == game_id
+        ).distinct()
+    }
+    
+    new_props = []
+    snapshots = []
+    seen = set()
+    updated_count = 0
+    unchanged_count = 0
+    
+    for prop_data in props:
+        key = (prop_data['player_name'], prop_data['prop_type'], prop_data['bookmaker'])
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        prop = existing.get(key)
+        if prop is None:
+            new_props.append({**prop_data, 'game_id': game_id})
+            continue
+        
+        changed = (
+            prop.retired_at is not None
+            or float(prop.line) != float(prop_data['line'])
+            or prop.over_odds != prop_data['over_odds']
+            or prop.under_odds != prop_data['under_odds']
+        )
+        
+        if changed:
+            if prop.id not in has_history:
+                snapshots.append(_line_snapshot(prop, prop.updated_at or now))
+            
+            prop.line = prop_data['line']
+            prop.over_odds = prop_data['over_odds']
+            prop.under_odds = prop_data['under_odds']
+            prop.retired_at = None
+            prop.updated_at = now
+            snapshots.append(_line_snapshot(prop, now))
+            updated_count += 1
+        else:
+            unchanged_count += 1
+    
+    retired_count = 0
+    for key, prop in existing.items():
+        if key not in seen and prop.retired_at is None:
+            prop.retired_at = now
+            retired_count += 1
+    
+    for prop in duplicates:
+        if prop.retired_at is None:
+            prop.retired_at = now
+            retired_count += 1
+    
+    db.add_all(snapshots)
+    db.flush()
+    
+    return {
+        'new_props': new_props,
+        'updated': updated_count,
+        'retired': retired_count,
+        'unchanged': unchanged_count
+    }
 
 def get_props_by_game(db: Session, game_id: int) -> List[models.PlayerProp]:
-    """Get all props for a specific game"""
-    return db.query(models.PlayerProp).filter(models.PlayerProp.game_id == game_id).all()
+    """Get all active props for a specific game"""
+    return db.query(models.PlayerProp).filter(
+        models.PlayerProp.game_id == game_id,
+        models.PlayerProp.retired_at == None
+    ).all()
 
 def get_props_by_player(db: Session, player_name: str, prop_type: Optional[str] = None) -> List[models.PlayerProp]:
-    """Get props for a specific player, optionally filtered by prop type"""
-    query = db.query(models.PlayerProp).filter(models.PlayerProp.player_name == player_name)
+    """Get active props for a specific player, optionally filtered by prop type"""
+    query = db.query(models.PlayerProp).filter(
+        models.PlayerProp.player_name == player_name,
+        models.PlayerProp.retired_at == None
+    )
     
     if prop_type:
         query = query.filter(models.PlayerProp.prop_type == prop_type)
     
-    return query.all()
\ No newline at end of file
+    return query.all()
+
+def get_line_history_for_game(db: Session, game_id: int) -> List[Tuple[models.PropLineSnapshot, models.PlayerProp]]:
+    """Line history for every prop in a game, oldest first per prop"""
+    return db.query(models.PropLineSnapshot, models.PlayerProp).join(
+        models.PlayerProp, models.PlayerProp.id == models.PropLineSnapshot.player_prop_id
+    ).filter(
+        models.PropLineSnapshot.game_id == game_id
+    ).order_by(
+        models.PropLineSnapshot.player_prop_id,
+        models.PropLineSnapshot.recorded_at
+    ).all()
+
+def get_line_history_for_player(
+    db: Session,
+    player_name: str,
+    prop_type: Optional[str] = None,
+    game_id: Optional[int] = None
+) -> List[Tuple[models.PropLineSnapshot, models.PlayerProp]]:
+    """Line history for a player's props, optionally narrowed to one prop type and/or game"""
+    query = db.query(models.PropLineSnapshot, models.PlayerProp).join(
+        models.PlayerProp, models.PlayerProp.id == models.PropLineSnapshot.player_prop_id
+    ).filter(models.PlayerProp.player_name == player_name)
+    
+    if prop_type:
+        query = query.filter(models.PlayerProp.prop_type == prop_type)
+    
+    if game_id:
+        query = query.filter(models.PropLineSnapshot.game_id == game_id)
+    
+    return query.order_by(
+        models.PropLineSnapshot.player_prop_id,
+        models.PropLineSnapshot.recorded_at
+    ).all()
\ No newline at end of file
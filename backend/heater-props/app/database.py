@@ -1,31 +1,285 @@
 # app/database.py
-from sqlalchemy import create_engine
+from datetime import datetime
+from sqlalchemy import Table, case, create_engine, delete, event, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, Dict, Optional, Tuple
 from app.config import get_settings
 
 settings = get_settings()
 
-# Create SQLite engine with better concurrency handling
-engine = create_engine(
-    settings.database_url,
-    connect_args={
+def _is_file_sqlite(database_url: str) -> bool:
+    """SQLite database in a file (in-memory databases can't be shared between connections)"""
+    return database_url.startswith("sqlite") and ":memory:" not in database_url and database_url.rstrip("/") != "sqlite:"
+
+def _apply_sqlite_pragmas(engine: Engine, read_only: bool):
+    """Tune every new SQLite connection of an engine"""
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            # WAL lets readers keep reading while a writer commits (persistent, stored in the file)
+            cursor.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: only a power loss can drop the last commits, never corrupt the file
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{settings.database_cache_mb * 1024}")
+        cursor.execute(f"PRAGMA mmap_size={settings.database_mmap_mb * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            # A write on a reader session fails instead of taking the write lock
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+def _server_engine_options(database_url: str) -> Dict[str, Any]:
+    """Pool and statement settings for a database server (PostgreSQL, MySQL)"""
+    options = {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_pre_ping": True,  # Replace connections the server closed (restarts, idle timeouts)
+        "pool_recycle": settings.database_pool_recycle_seconds
+    }
+    
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql" and settings.database_statement_timeout_seconds > 0:
+        # Abort runaway queries on the server instead of holding a pooled connection
+        timeout_ms = int(settings.database_statement_timeout_seconds * 1000)
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+def create_engines(database_url: str) -> Tuple[Engine, Engine]:
+    """
+    Build the read-write engine and the engine for read-only sessions
+    
+    For a SQLite file, reads get their own pool of query_only connections,
+    so GET routes never wait behind a slow writer (WAL readers see the last
+    committed data). SQLite itself lets one connection write at a time; other
+    writers wait up to the busy timeout. A database server (e.g. PostgreSQL)
+    handles concurrent readers itself, so one pooled engine serves both.
+    
+    Returns (engine, read_engine)
+    """
+    if not database_url.startswith("sqlite"):
+        engine = create_engine(database_url, echo=False, **_server_engine_options(database_url))
+        return engine, engine
+    
+    connect_args = {
         "check_same_thread": False,  # Needed for SQLite
-        "timeout": 30  # Wait up to 30 seconds if database is locked
-    },
-    poolclass=StaticPool,  # Use single connection pool for SQLite
-    echo=False  # Set to True for SQL debugging
-)
+        "timeout": settings.database_busy_timeout_seconds  # Wait if database is locked
+    }
+    
+    # Each session gets its own pooled connection: with a single shared connection,
+    # one thread's rollback/close would discard another thread's open transaction
+    # (e.g. a background job's writes while requests are being served)
+    engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        echo=False  # Set to True for SQL debugging
+    )
+    
+    if not _is_file_sqlite(database_url):
+        return engine, engine
+    
+    _apply_sqlite_pragmas(engine, read_only=False)
+    
+    read_engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        pool_size=settings.database_reader_pool_size,
+        max_overflow=0,
+        echo=False
+    )
+    _apply_sqlite_pragmas(read_engine, read_only=True)
+    return engine, read_engine
+
+def async_database_url(database_url: str) -> str:
+    """The same database through an asyncio driver (aiosqlite or asyncpg)"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for {backend}")
+
+def create_async_engines(database_url: str) -> Tuple[AsyncEngine, AsyncEngine]:
+    """
+    Async counterparts of create_engines() (same pools and pragmas)
+    
+    Returns (async_engine, async_read_engine)
+    """
+    async_url = async_database_url(database_url)
+    
+    if not database_url.startswith("sqlite"):
+        engine = create_async_engine(async_url, echo=False, **_server_engine_options(async_url))
+        return engine, engine
+    
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": settings.database_busy_timeout_seconds
+    }
+    # aiosqlite defaults to opening a connection per session; pool them like the sync engines
+    engine = create_async_engine(async_url, connect_args=connect_args, poolclass=AsyncAdaptedQueuePool, echo=False)
+    
+    if not _is_file_sqlite(database_url):
+        return engine, engine
+    
+    _apply_sqlite_pragmas(engine.sync_engine, read_only=False)
+    
+    read_engine = create_async_engine(
+        async_url,
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.database_reader_pool_size,
+        max_overflow=0,
+        echo=False
+    )
+    _apply_sqlite_pragmas(read_engine.sync_engine, read_only=True)
+    return engine, read_engine
+
+engine, read_engine = create_engines(settings.database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Async sessions for async def routes (nothing is lazy loaded there, so load
+# relationships up front; objects stay usable after commit)
+async_engine, async_read_engine = create_async_engines(settings.database_url)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+def _delete_duplicate_picks(conn: Connection, picks: Table) -> int:
+    """
+    Keep one pick per user and prop: a graded one if any, else the first
+    (the one the save route used to update)
+    
+    If graded picks had to go, the leaderboard is rebuilt in the same
+    transaction so their wins and losses don't linger there.
+    """
+    ranked = select(
+        picks.c.id,
+        picks.c.result,
+        func.row_number().over(
+            partition_by=(picks.c.user_id, picks.c.player_prop_id),
+            order_by=(case((picks.c.result.is_(None), 1), else_=0), picks.c.id)
+        ).label('rank')
+    ).where(picks.c.user_id.isnot(None)).subquery()
+    duplicates = select(ranked.c.id).where(ranked.c.rank > 1)
+    
+    graded_deleted = conn.execute(
+        select(func.count()).select_from(ranked).where(ranked.c.rank > 1, ranked.c.result.isnot(None))
+    ).scalar()
+    deleted = conn.execute(delete(picks).where(picks.c.id.in_(duplicates))).rowcount
+    
+    if graded_deleted:
+        # Imported here: the leaderboard service imports the models, which import this module
+        from app.leaderboard_service import leaderboard_service
+        with Session(bind=conn) as session:
+            leaderboard_service.rebuild(session)
+        print(f"Rebuilt the leaderboard after deleting {graded_deleted} duplicate graded picks")
+    
+    return deleted
+
+def _retire_duplicate_props(conn: Connection, props: Table) -> int:
+    """Keep the first live prop per key live and retire the others (retired props keep their picks)"""
+    first_props = select(func.min(props.c.id)).where(
+        props.c.retired_at.is_(None)
+    ).group_by(props.c.game_id, props.c.player_name, props.c.prop_type, props.c.bookmaker)
+    
+    return conn.execute(
+        update(props).where(
+            props.c.retired_at.is_(None),
+            props.c.id.not_in(first_props)
+        ).values(retired_at=datetime.utcnow())
+    ).rowcount
+
+def _fail_duplicate_jobs(conn: Connection, jobs: Table) -> int:
+    """Keep the first active job per kind and params and mark the others failed"""
+    active = jobs.c.status.in_(['queued', 'running'])
+    first_jobs = select(func.min(jobs.c.id)).where(active).group_by(jobs.c.kind, jobs.c.params)
+    
+    return conn.execute(
+        update(jobs).where(active, jobs.c.id.not_in(first_jobs)).values(
+            status='failed',
+            error='Duplicate of an active job',
+            finished_at=datetime.utcnow()
+        )
+    ).rowcount
+
+# Unique indexes added after their table existed, and how to clear rows that would violate them
+UNIQUE_INDEX_MIGRATIONS = {
+    'idx_pick_user_prop': _delete_duplicate_picks,
+    'idx_player_prop_active_key': _retire_duplicate_props,
+    'idx_job_active_kind_params': _fail_duplicate_jobs
+}
+
+def sync_schema(bind: Optional[Engine] = None):
+    """
+    Create missing tables, then add columns and indexes introduced after
+    a table was first created (create_all never alters existing tables)
+    
+    Duplicates that would block a new unique index are cleared in the same
+    transaction that builds it. Any other failure stops startup: the upserts
+    need these indexes as their ON CONFLICT targets.
+    """
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            print(f"Added column {table.name}.{column.name}")
+        
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            with bind.begin() as conn:
+                migrate = UNIQUE_INDEX_MIGRATIONS.get(index.name)
+                if migrate:
+                    cleared = migrate(conn, table)
+                    if cleared:
+                        print(f"Cleared {cleared} duplicate {table.name} rows for {index.name}")
+                index.create(bind=conn)
+            print(f"Created index {index.name}")
+
 def get_db():
     """Dependency for FastAPI routes"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Dependency for routes that only read (query_only connections from the reader pool)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    """Async dependency for async def routes"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """Async dependency for async def routes that only read (reader pool)"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
\ No newline at end of file
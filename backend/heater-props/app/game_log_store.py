@@ -0,0 +1,197 @@
+# app/game_log_store.py
+# Local per-player game log store with delta refresh bookkeeping
+
+import json
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app import models
+
+class GameLogStore:
+    # playergamelog column positions
+    GAME_ID_INDEX = 2
+    GAME_DATE_INDEX = 3
+
+    def __init__(self, refresh_after_hours: int = 12):
+        """
+        Player game logs kept in the database
+
+        Args:
+            refresh_after_hours: How long a player's log counts as current before
+                the next read asks the API for games newer than the last stored one
+        """
+        self.refresh_after = timedelta(hours=refresh_after_hours)
+        self.tables_ready = False
+        self.lock = threading.Lock()
+
+    def _ensure_tables(self):
+        """Scripts use the store without going through the API startup, so create the tables on first use"""
+        if self.tables_ready:
+            return
+        with self.lock:
+            if not self.tables_ready:
+                models.Base.metadata.create_all(
+                    bind=engine,
+                    tables=[models.PlayerGameLog.__table__, models.PlayerGameLogSync.__table__]
+                )
+                self.tables_ready = True
+
+    def parse_game_date(self, value: str) -> date:
+        """playergamelog dates look like 'DEC 03, 2025'; league logs use '2025-12-03'"""
+        value = value.strip()
+        try:
+            return datetime.strptime(value, '%b %d, %Y').date()
+        except ValueError:
+            return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+    def get_sync(self, player_id: int, season: str) -> Optional[Dict[str, Any]]:
+        """Last refresh time and last stored game date, or None if never synced"""
+        self._ensure_tables()
+        db = SessionLocal()
+        try:
+            sync = db.query(models.PlayerGameLogSync).filter(
+                models.PlayerGameLogSync.player_id == player_id,
+                models.PlayerGameLogSync.season == season
+            ).first()
+
+            if not sync:
+                return None
+
+            return {
+                'last_synced_at': sync.last_synced_at,
+                'last_game_date': sync.last_game_date
+            }
+        finally:
+            db.close()
+
+    def is_fresh(self, sync: Optional[Dict[str, Any]]) -> bool:
+        return sync is not None and datetime.utcnow() - sync['last_synced_at'] < self.refresh_after
+
+    def append(self, player_id: int, season: str, rows: List[List[Any]]) -> int:
+        """
+        Add new game log rows (already stored games are skipped) and mark the player synced
+
+        Returns the number of rows inserted
+        """
+        return self.append_many(season, {player_id: rows})
+
+    def append_many(self, season: str, rows_by_player: Dict[int, List[List[Any]]], mark_synced: bool = True) -> int:
+        """
+        append() for many players in one transaction (used by league-wide ingestion)
+
+        Args:
+            mark_synced: Also mark the players synced; pass False while a download
+                is partial, then call mark_synced() once it is complete
+
+        Returns the number of rows inserted
+        """
+        self._ensure_tables()
+        db = SessionLocal()
+        try:
+            player_ids = list(rows_by_player)
+            game_ids = list({str(row[self.GAME_ID_INDEX]) for rows in rows_by_player.values() for row in rows})
+
+            # Only these games can already be stored, not the players' whole season
+            existing = set()
+            if game_ids:
+                for start in range(0, len(player_ids), 500):
+                    chunk = player_ids[start:start + 500]
+                    existing.update(
+                        db.query(models.PlayerGameLog.player_id, models.PlayerGameLog.game_id).filter(
+                            models.PlayerGameLog.player_id.in_(chunk),
+                            models.PlayerGameLog.game_id.in_(game_ids)
+                        )
+                    )
+
+            new_rows = []
+            last_game_dates = {player_id: None for player_id in player_ids}
+            for player_id, rows in rows_by_player.items():
+                for row in rows:
+                    game_id = str(row[self.GAME_ID_INDEX])
+                    game_date = self.parse_game_date(row[self.GAME_DATE_INDEX])
+                    last_game_dates[player_id] = max(last_game_dates[player_id] or game_date, game_date)
+
+                    if (player_id, game_id) in existing:
+                        continue
+                    existing.add((player_id, game_id))
+                    new_rows.append({
+                        'player_id': player_id,
+                        'game_id': game_id,
+                        'season': season,
+                        'game_date': game_date,
+                        'row': json.dumps(row)
+                    })
+
+            if new_rows:
+                db.bulk_insert_mappings(models.PlayerGameLog, new_rows)
+
+            if mark_synced:
+                self._mark_synced(db, season, last_game_dates)
+
+            db.commit()
+            return len(new_rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _mark_synced(self, db, season: str, last_game_dates: Dict[int, Optional[date]]):
+        now = datetime.utcnow()
+        player_ids = list(last_game_dates)
+
+        syncs = {}
+        for start in range(0, len(player_ids), 500):
+            chunk = player_ids[start:start + 500]
+            syncs.update(
+                (sync.player_id, sync) for sync in db.query(models.PlayerGameLogSync).filter(
+                    models.PlayerGameLogSync.player_id.in_(chunk),
+                    models.PlayerGameLogSync.season == season
+                )
+            )
+
+        for player_id in player_ids:
+            sync = syncs.get(player_id)
+            if sync is None:
+                sync = models.PlayerGameLogSync(player_id=player_id, season=season)
+                db.add(sync)
+
+            sync.last_synced_at = now
+            newest = last_game_dates[player_id]
+            if newest and (sync.last_game_date is None or newest > sync.last_game_date):
+                sync.last_game_date = newest
+
+    def mark_synced(self, season: str, last_game_dates: Dict[int, Optional[date]]):
+        """Mark players synced now, keeping the newest of their stored and given game dates"""
+        self._ensure_tables()
+        db = SessionLocal()
+        try:
+            self._mark_synced(db, season, last_game_dates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_recent(self, player_id: int, season: str, limit: int = 10) -> List[List[Any]]:
+        """Most recent stored games first, in playergamelog row format"""
+        self._ensure_tables()
+        db = SessionLocal()
+        try:
+            rows = db.query(models.PlayerGameLog.row).filter(
+                models.PlayerGameLog.player_id == player_id,
+                models.PlayerGameLog.season == season
+            ).order_by(
+                models.PlayerGameLog.game_date.desc(),
+                models.PlayerGameLog.game_id.desc()
+            ).limit(limit).all()
+
+            return [json.loads(row) for (row,) in rows]
+        finally:
+            db.close()
+
+# Global instance
+game_log_store = GameLogStore(refresh_after_hours=get_settings().game_log_refresh_hours)
@@ -3,9 +3,13 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
-from app.database import get_db
+from datetime import date
+from app.database import get_db, get_read_db, get_async_db
 from app.grading_service import grading_service
+from app.leaderboard_service import leaderboard_service
+from app.job_runner import job_runner
 from app import models
 
 router = APIRouter(prefix="/api/grading", tags=["grading"])
@@ -26,14 +30,9 @@ def grade_game_picks(game_id: int, db: Session = Depends(get_db)):
     
     return result
 
-@router.post("/grade-all")
-def grade_all_picks(db: Session = Depends(get_db)):
-    """
-    Grade picks for all completed games
-    
-    This will check all games that have passed and grade any ungraded picks
-    """
-    results = grading_service.grade_all_completed_games(db)
+def grade_all_job(db: Session, progress=None) -> Dict[str, Any]:
+    """Job handler for grading all completed games"""
+    results = grading_service.grade_all_completed_games(db, progress=progress)
     
     return {
         "message": "Grading completed",
@@ -41,11 +40,55 @@ def grade_all_picks(db: Session = Depends(get_db)):
         "results": results
     }
 
+@router.post("/grade-all")
+def grade_all_picks(background: bool = False, db: Session = Depends(get_db)):
+    """
+    Grade picks for all completed games
+    
+    This will check all games that have passed and grade any ungraded picks.
+    Set background=True to run as a job and return its id immediately.
+    """
+    if background:
+        return job_runner.enqueue('grade-all')
+    
+    return grade_all_job(db)
+
+def preload_boxscores_job(db: Session, start_date: str, end_date: str, progress=None) -> Dict[str, Any]:
+    """Job handler for storing final boxscores (dates as YYYY-MM-DD)"""
+    return grading_service.preload_boxscores(
+        date.fromisoformat(start_date),
+        date.fromisoformat(end_date),
+        progress=progress
+    )
+
+@router.post("/boxscores/preload")
+def preload_boxscores(start_date: date, end_date: date):
+    """
+    Queue storing every final boxscore between start_date and end_date (YYYY-MM-DD, inclusive)
+    
+    Later grading, re-grading and audits of those games make no network calls.
+    Returns the job (poll /api/jobs/{job_id}); if a preload of the same range
+    is already queued or running, that job is returned instead. Other ranges
+    get their own job.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    
+    return job_runner.enqueue('preload-boxscores', {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat()
+    })
+
+@router.get("/boxscores/stats")
+def get_boxscore_store_stats():
+    """Local boxscore store size and hit/miss counters"""
+    return grading_service.store.get_stats()
+
 @router.get("/pick-results")
 def get_pick_results(
     user_id: int = None,
     result: str = None,  # 'won', 'lost', 'push'
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all graded picks with optional filters
@@ -66,7 +109,7 @@ def get_pick_results(
     }
 
 @router.get("/user-record/{user_id}")
-def get_user_record(user_id: int, db: Session = Depends(get_db)):
+def get_user_record(user_id: int, db: Session = Depends(get_read_db)):
     """
     Get win/loss record for a specific user
     """
@@ -98,137 +141,37 @@ def get_user_record(user_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/leaderboard")
-def get_leaderboard(
+async def get_leaderboard(
     timeframe: str = "overall",
     current_user_id: int = None,
-    db: Session = Depends(get_db)
+    limit: int = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get leaderboard of all users ranked by win percentage
-    """
-    from datetime import datetime, timedelta
-    
-    # Calculate date filter based on timeframe
-    date_filter = None
-    if timeframe == "week":
-        date_filter = datetime.utcnow() - timedelta(days=7)
-    elif timeframe == "month":
-        date_filter = datetime.utcnow() - timedelta(days=30)
     
-    # Get all users with graded picks
-    query = db.query(models.Pick.user_id).filter(
-        models.Pick.result != None
-    )
-    
-    if date_filter:
-        query = query.filter(models.Pick.graded_at >= date_filter)
-    
-    users = query.distinct().all()
-    
-    leaderboard = []
-    current_user_found = False
-    
-    for (user_id,) in users:
-        if user_id is None:
-            continue
-        
-        # Skip test data for current user (user_id 1-5 are test users)
-        if user_id == current_user_id and user_id <= 5:
-            current_user_found = True
-            continue
-            
-        # Get picks for this user
-        picks_query = db.query(models.Pick).filter(
-            models.Pick.user_id == user_id,
-            models.Pick.result != None
+    Reads the materialized leaderboard maintained by the grading service.
+    Pass limit to return only the top K users (plus the current user).
+    """
+    # The service is shared with grading (sync); run_sync drives it on the
+    # async connection without a worker thread. It may refresh expired rows,
+    # so this uses the read-write session.
+    return await db.run_sync(
+        lambda session: leaderboard_service.get_leaderboard(
+            session,
+            timeframe=timeframe,
+            current_user_id=current_user_id,
+            limit=limit
         )
-        
-        if date_filter:
-            picks_query = picks_query.filter(models.Pick.graded_at >= date_filter)
-        
-        picks = picks_query.all()
-        
-        won = sum(1 for p in picks if p.result == 'won')
-        lost = sum(1 for p in picks if p.result == 'lost')
-        push = sum(1 for p in picks if p.result == 'push')
-        
-        if (won + lost) > 0:
-            win_rate = round((won / (won + lost)) * 100, 1)
-            
-            # Calculate streak
-            streak = calculate_streak(picks)
-            
-            leaderboard.append({
-                "user_id": str(user_id),
-                "wins": won,
-                "losses": lost,
-                "push": push,
-                "total": won + lost + push,
-                "win_rate": win_rate,
-                "streak": streak,
-                "is_user": user_id == current_user_id
-            })
-            
-            if user_id == current_user_id:
-                current_user_found = True
-    
-    # Sort by wins first, then win rate
-    leaderboard.sort(key=lambda x: (x['wins'], x['win_rate']), reverse=True)
-    
-    # Add ranks
-    for idx, entry in enumerate(leaderboard, 1):
-        entry['rank'] = idx
-    
-    # If current user not found (no picks yet), add them with 0-0 record
-    if current_user_id and not current_user_found:
-        leaderboard.append({
-            "user_id": str(current_user_id),
-            "wins": 0,
-            "losses": 0,
-            "push": 0,
-            "total": 0,
-            "win_rate": 0.0,
-            "streak": "0",
-            "is_user": True,
-            "rank": len(leaderboard) + 1
-        })
-    
-    # Find current user rank
-    current_user_rank = None
-    if current_user_id:
-        for entry in leaderboard:
-            if entry['user_id'] == str(current_user_id):
-                current_user_rank = entry['rank']
-                break
-    
-    return {
-        "leaderboard": leaderboard,
-        "current_user_rank": current_user_rank,
-        "total_users": len(leaderboard)
-    }
+    )
 
-def calculate_streak(picks: list) -> str:
-    """Calculate current win/loss streak"""
-    if not picks:
-        return "0"
-    
-    # Sort by graded_at descending (most recent first)
-    sorted_picks = sorted(picks, key=lambda p: p.graded_at, reverse=True)
-    
-    # Ignore pushes for streak calculation
-    relevant_picks = [p for p in sorted_picks if p.result in ['won', 'lost']]
-    
-    if not relevant_picks:
-        return "0"
-    
-    current_result = relevant_picks[0].result
-    streak_count = 1
+@router.post("/leaderboard/rebuild")
+def rebuild_leaderboard(db: Session = Depends(get_db)):
+    """
+    Recompute the materialized leaderboard from all graded picks
     
-    for pick in relevant_picks[1:]:
-        if pick.result == current_result:
-            streak_count += 1
-        else:
-            break
+    Only needed after picks are graded outside the grading service (e.g. test data scripts)
+    """
+    leaderboard_service.rebuild(db)
     
-    streak_letter = "W" if current_result == "won" else "L"
-    return f"{streak_letter}{streak_count}"
\ No newline at end of file
+    return {"message": "Leaderboard rebuilt"}
\ No newline at end of file
@@ -1,25 +1,35 @@
 # app/grading_service.py
-import requests
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from datetime import date, datetime, timedelta
+from sqlalchemy import Float, String, and_, case, func, literal, select, union_all, update
 from sqlalchemy.orm import Session
 from app import models
+from app.config import get_settings
+from app.http_client import NBAStatsClient, nba_stats_client
+from app.boxscore_store import BoxscoreStore, boxscore_store
+from app.leaderboard_service import leaderboard_service
 
 class PickGradingService:
-    def __init__(self):
-        self.base_url = "https://stats.nba.com/stats"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.nba.com/',
-            'Origin': 'https://www.nba.com'
-        }
+    # Status values that mean a game is over (3 is also final status)
+    FINAL_STATUSES = ['Final', '3']
+    
+    def __init__(
+        self,
+        http_client: NBAStatsClient = nba_stats_client,
+        max_workers: int = 4,
+        store: BoxscoreStore = boxscore_store
+    ):
+        # Pooled client shared with the stats service
+        self.http = http_client
+        self.max_workers = max_workers
+        
+        # Final boxscores are kept on disk, so re-grading never hits the network
+        self.store = store
     
     def fetch_game_boxscore(self, game_id: str) -> Optional[Dict[str, Any]]:
         """Fetch boxscore for a completed game"""
-        url = f"{self.base_url}/boxscoretraditionalv2"
+        endpoint = "boxscoretraditionalv2"
         
         params = {
             'GameID': game_id,
@@ -31,9 +41,7 @@ class PickGradingService:
         }
         
         try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self.http.get_json(endpoint, params)
             
             if 'resultSets' in data:
                 # resultSets[0] contains player stats
@@ -72,16 +80,14 @@ class PickGradingService:
     
     def check_game_status(self, game_id: str) -> str:
         """Check if a game is completed"""
-        url = f"{self.base_url}/boxscoresummaryv2"
+        endpoint = "boxscoresummaryv2"
         
         params = {
             'GameID': game_id
         }
         
         try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self.http.get_json(endpoint, params)
             
             if 'resultSets' in data and len(data['resultSets']) > 0:
                 game_summary = data['resultSets'][0]['rowSet'][0]
@@ -95,133 +101,329 @@ class PickGradingService:
             print(f"Error checking game status for {game_id}: {e}")
             return "Unknown"
     
-    def grade_pick(self, pick: models.Pick, actual_stat: float) -> str:
+    def fetch_final_stats(self, game_id: str) -> Tuple[str, Optional[Dict[str, Dict[str, float]]]]:
         """
-        Grade a single pick based on actual result
+        Check a game's status and fetch its boxscore if it is final
+        
+        Games already in the local boxscore store are answered with no network
+        calls; newly final boxscores are written to it.
         
-        Returns: 'won', 'lost', or 'push'
+        Returns (status, player_stats); player_stats is None unless the game is final
         """
-        line = pick.line
-        selection = pick.selection  # 'over' or 'under'
-        
-        if actual_stat == line:
-            return 'push'
-        elif selection == 'over' and actual_stat > line:
-            return 'won'
-        elif selection == 'under' and actual_stat < line:
-            return 'won'
-        else:
-            return 'lost'
+        stored = self.store.get(game_id)
+        if stored is not None:
+            return 'Final', stored
+        
+        game_status = self.check_game_status(game_id)
+        
+        if game_status not in self.FINAL_STATUSES:
+            return game_status, None
+        
+        player_stats = self.fetch_game_boxscore(game_id)
+        if player_stats:
+            self.store.put(game_id, player_stats)
+        
+        return game_status, player_stats
     
-    def grade_picks_for_game(self, db: Session, game: models.Game) -> Dict[str, Any]:
+    def _final_games_on(self, game_date: date) -> List[str]:
+        """External ids of games on a date that are final, from one scoreboard request"""
+        params = {
+            'GameDate': game_date.strftime('%Y-%m-%d'),
+            'LeagueID': '00',
+            'DayOffset': '0'
+        }
+        
+        try:
+            data = self.http.get_json("scoreboardv2", params)
+        except Exception as e:
+            print(f"Error fetching scoreboard for {game_date}: {e}")
+            return []
+        
+        if 'resultSets' not in data or len(data['resultSets']) == 0:
+            return []
+        
+        # GameHeader: GAME_STATUS_ID is index 3 (3 = final), GAME_ID is index 2
+        return [game[2] for game in data['resultSets'][0]['rowSet'] if game[3] == 3]
+    
+    def preload_boxscores(
+        self,
+        start_date: date,
+        end_date: date,
+        progress: Optional[Callable[[int, int, str], None]] = None
+    ) -> Dict[str, Any]:
         """
-        Grade all picks for a completed game
+        Fetch and store every final boxscore in a date range (inclusive)
         
-        Returns summary of grading results
+        Uses one scoreboard request per day, then fetches only boxscores that
+        are not stored yet, in parallel under the shared rate limit.
         """
-        # Check if game is completed
-        game_status = self.check_game_status(game.external_id)
-        
-        if game_status not in ['Final', '3']:  # 3 is also final status
-            return {
-                'game_id': game.id,
-                'status': 'not_completed',
-                'message': f'Game not completed yet. Status: {game_status}'
-            }
+        days = (end_date - start_date).days + 1
+        game_ids = []
+        for offset in range(days):
+            game_ids.extend(self._final_games_on(start_date + timedelta(days=offset)))
         
-        print(f"Grading picks for {game.away_team} @ {game.home_team}...")
+        game_ids = list(dict.fromkeys(game_ids))
+        missing = [game_id for game_id in game_ids if not self.store.has(game_id)]
+        print(f"Preloading {len(missing)} of {len(game_ids)} final boxscores...")
         
-        # Fetch actual game stats
-        player_stats = self.fetch_game_boxscore(game.external_id)
+        stored = 0
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_game_boxscore, game_id): game_id for game_id in missing}
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                game_id = futures[future]
+                player_stats = future.result()
+                
+                if player_stats and self.store.put(game_id, player_stats):
+                    stored += 1
+                elif not player_stats:
+                    failed.append(game_id)
+                
+                if progress:
+                    progress(done, len(missing), game_id)
         
-        if not player_stats:
-            return {
-                'game_id': game.id,
-                'status': 'error',
-                'message': 'Could not fetch game boxscore'
-            }
+        return {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'final_games': len(game_ids),
+            'already_stored': len(game_ids) - len(missing),
+            'stored': stored,
+            'failed': failed
+        }
+    
+    def _staged_stats(self, player_stats: Dict[str, Dict[str, float]], stat_names: List[str]):
+        """
+        A boxscore as a derived table: one row per player with a column per stat
         
-        # Get all ungraded picks for this game
-        picks = db.query(models.Pick).join(models.PlayerProp).filter(
-            models.PlayerProp.game_id == game.id,
-            models.Pick.result == None  # Only ungraded picks
-        ).all()
-        
-        if not picks:
-            return {
-                'game_id': game.id,
-                'status': 'no_picks',
-                'message': 'No ungraded picks found for this game'
-            }
+        Built from UNION ALL of literal rows, which SQLite and PostgreSQL both
+        accept (a boxscore has ~30 players, well under SQLite's compound limit)
+        """
+        rows = [
+            select(
+                literal(player_name, String).label('player_name'),
+                *[literal(float(stats.get(name, 0.0)), Float).label(name) for name in stat_names]
+            )
+            for player_name, stats in player_stats.items()
+        ]
+        return union_all(*rows).subquery('boxscore_stats')
+    
+    def _grade_game(self, db: Session, game_id: int, player_stats: Dict[str, Dict[str, float]]) -> Tuple[Dict[str, int], set]:
+        """
+        Grade every ungraded pick for a game against its boxscore in one UPDATE (nothing is committed)
+        
+        The actual value comes from the staged boxscore row for the prop's player
+        (0 for a stat the boxscore doesn't have). The pick is a push if the actual
+        value equals its line, won if it is over/under the line as selected, and
+        lost otherwise. Picks whose player isn't in the boxscore are left
+        ungraded and counted as not_found.
         
-        graded_count = 0
+        Returns (result counts, ids of users whose picks were graded)
+        """
         results = {'won': 0, 'lost': 0, 'push': 0, 'not_found': 0}
+        if not player_stats:
+            return results, set()
         
-        for pick in picks:
-            prop = pick.player_prop
-            player_name = prop.player_name
-            prop_type = prop.prop_type  # 'points', 'rebounds', 'assists'
-            
-            # Find player in actual stats
-            if player_name not in player_stats:
-                print(f"  ⚠ Player not found in boxscore: {player_name}")
-                results['not_found'] += 1
-                continue
-            
-            # Get actual stat value
-            actual_value = player_stats[player_name].get(prop_type, 0.0)
-            
-            # Grade the pick
-            result = self.grade_pick(pick, actual_value)
-            
-            # Update pick in database
-            pick.result = result
-            pick.actual_value = actual_value
-            pick.graded_at = datetime.utcnow()
-            
-            results[result] += 1
-            graded_count += 1
-            
-            print(f"  ✓ {player_name} {prop_type}: {actual_value} vs {pick.line} ({pick.selection}) = {result.upper()}")
+        Pick = models.Pick
+        Prop = models.PlayerProp
+        stat_names = sorted({name for stats in player_stats.values() for name in stats})
+        staged = self._staged_stats(player_stats, stat_names)
         
-        # Commit all updates
-        db.commit()
+        actual = select(
+            case({name: staged.c[name] for name in stat_names}, value=Prop.prop_type, else_=0.0)
+        ).join_from(
+            Prop, staged, staged.c.player_name == Prop.player_name
+        ).where(
+            Prop.id == Pick.player_prop_id
+        ).scalar_subquery()
+        
+        in_boxscore = select(Prop.id).join(
+            staged, staged.c.player_name == Prop.player_name
+        ).where(Prop.game_id == game_id)
+        
+        graded_at = datetime.utcnow()
+        db.execute(
+            update(Pick).where(
+                Pick.result == None,  # Only ungraded picks
+                Pick.player_prop_id.in_(in_boxscore)
+            ).values(
+                actual_value=actual,
+                result=case(
+                    (actual == Pick.line, 'push'),
+                    (and_(Pick.selection == 'over', actual > Pick.line), 'won'),
+                    (and_(Pick.selection == 'under', actual < Pick.line), 'won'),
+                    else_='lost'
+                ),
+                graded_at=graded_at
+            ).execution_options(synchronize_session=False)
+        )
         
+        # Summarize from the rows this update wrote (all share graded_at)
+        game_picks = select(Prop.id).where(Prop.game_id == game_id)
+        graded_users = set()
+        for result, user_id, count in db.query(Pick.result, Pick.user_id, func.count()).filter(
+            Pick.player_prop_id.in_(game_picks),
+            Pick.graded_at == graded_at
+        ).group_by(Pick.result, Pick.user_id):
+            results[result] += count
+            graded_users.add(user_id)
+        
+        missing = db.query(Prop.player_name, func.count()).join(Pick).filter(
+            Prop.game_id == game_id,
+            Pick.result == None
+        ).group_by(Prop.player_name).all()
+        
+        for player_name, count in missing:
+            results['not_found'] += count
+        if missing:
+            print(f"  ⚠ Players not found in boxscore: {', '.join(sorted(name for name, _ in missing))}")
+        
+        print(f"  ✓ Graded {results['won'] + results['lost'] + results['push']} picks "
+              f"({results['won']} won, {results['lost']} lost, {results['push']} push)")
+        
+        return results, graded_users
+    
+    def _not_completed(self, game: models.Game, game_status: str) -> Dict[str, Any]:
+        return {
+            'game_id': game.id,
+            'status': 'not_completed',
+            'message': f'Game not completed yet. Status: {game_status}'
+        }
+    
+    def _boxscore_error(self, game: models.Game) -> Dict[str, Any]:
+        return {
+            'game_id': game.id,
+            'status': 'error',
+            'message': 'Could not fetch game boxscore'
+        }
+    
+    def _no_picks(self, game: models.Game) -> Dict[str, Any]:
+        return {
+            'game_id': game.id,
+            'status': 'no_picks',
+            'message': 'No ungraded picks found for this game'
+        }
+    
+    def _completed(self, game: models.Game, results: Dict[str, int]) -> Dict[str, Any]:
         return {
             'game_id': game.id,
             'game': f"{game.away_team} @ {game.home_team}",
             'status': 'completed',
-            'graded': graded_count,
+            'graded': results['won'] + results['lost'] + results['push'],
             'results': results
         }
     
-    def grade_all_completed_games(self, db: Session) -> List[Dict[str, Any]]:
+    def grade_picks_for_game(self, db: Session, game: models.Game) -> Dict[str, Any]:
         """
-        Grade picks for all completed games
+        Grade all picks for a completed game
+        
+        Returns summary of grading results
         """
-        # Get all games that have passed
+        # Check if game is completed, then fetch actual game stats
+        game_status, player_stats = self.fetch_final_stats(game.external_id)
+        
+        if game_status not in self.FINAL_STATUSES:
+            return self._not_completed(game, game_status)
+        
+        print(f"Grading picks for {game.away_team} @ {game.home_team}...")
+        
+        if not player_stats:
+            return self._boxscore_error(game)
+        
+        results, graded_users = self._grade_game(db, game.id, player_stats)
+        
+        if not any(results.values()):
+            return self._no_picks(game)
+        
+        # Commit all updates
+        db.commit()
+        
+        # Keep the materialized leaderboard in sync
+        leaderboard_service.update_users(db, graded_users)
+        
+        return self._completed(game, results)
+    
+    def games_with_ungraded_picks(self, db: Session) -> List[models.Game]:
+        """Past games that still have at least one ungraded pick"""
         now = datetime.utcnow()
-        completed_games = db.query(models.Game).filter(
-            models.Game.commence_time < now
-        ).all()
         
-        if not completed_games:
+        pending = db.query(models.PlayerProp.game_id).join(models.Pick).filter(
+            models.Pick.result == None
+        )
+        
+        return db.query(models.Game).filter(
+            models.Game.commence_time < now,
+            models.Game.id.in_(pending)
+        ).order_by(models.Game.commence_time).all()
+    
+    def grade_all_completed_games(
+        self,
+        db: Session,
+        progress: Optional[Callable[[int, int, str], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Grade picks for all completed games
+        
+        Only games that still have ungraded picks are checked. Their statuses and
+        boxscores are fetched concurrently (the shared client enforces the rate
+        limit), then each final game's picks are graded with one set-based
+        UPDATE, all in one commit.
+        
+        progress is an optional callback(done, total, message) for job status
+        """
+        games = self.games_with_ungraded_picks(db)
+        
+        if not games:
             return [{
                 'status': 'no_games',
                 'message': 'No completed games found'
             }]
         
+        print(f"Checking {len(games)} games with ungraded picks...")
+        
+        # Fetch statuses and boxscores in parallel
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_final_stats, game.external_id): game for game in games}
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                game = futures[future]
+                fetched[game.id] = future.result()
+                
+                if progress:
+                    progress(done, len(games), f"{game.away_team} @ {game.home_team}")
+        
         results = []
+        graded_users = set()
         
-        for game in completed_games:
-            print(f"\nProcessing game: {game.away_team} @ {game.home_team}")
-            result = self.grade_picks_for_game(db, game)
-            results.append(result)
+        for game in games:
+            game_status, player_stats = fetched[game.id]
+            
+            if game_status not in self.FINAL_STATUSES:
+                results.append(self._not_completed(game, game_status))
+                continue
+            
+            if not player_stats:
+                results.append(self._boxscore_error(game))
+                continue
+            
+            print(f"\nGrading picks for {game.away_team} @ {game.home_team}...")
+            game_results, game_users = self._grade_game(db, game.id, player_stats)
             
-            # Rate limiting
-            sleep(1)
+            if not any(game_results.values()):
+                results.append(self._no_picks(game))
+                continue
+            
+            graded_users |= game_users
+            results.append(self._completed(game, game_results))
+        
+        # Commit all updates
+        db.commit()
+        
+        # Keep the materialized leaderboard in sync
+        leaderboard_service.update_users(db, graded_users)
         
         return results
 
 # Global instance
-grading_service = PickGradingService()
\ No newline at end of file
+grading_service = PickGradingService(max_workers=get_settings().nba_max_workers)
\ No newline at end of file
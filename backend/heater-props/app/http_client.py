@@ -0,0 +1,126 @@
+# app/http_client.py
+# Shared, pooled HTTP client for the NBA Stats API
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Any
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import get_settings
+from app.rate_limiter import TokenBucket, retry_with_backoff
+
+# Headers required by NBA Stats API
+NBA_STATS_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Referer': 'https://www.nba.com/',
+    'Origin': 'https://www.nba.com'
+}
+
+class NBAStatsClient:
+    def __init__(
+        self,
+        base_url: str = "https://stats.nba.com/stats",
+        timeout: float = 10,
+        max_connections: int = 8,
+        requests_per_second: float = 2.0,
+        max_retries: int = 3
+    ):
+        """
+        Keep-alive session shared by every service that talks to stats.nba.com
+
+        Args:
+            base_url: NBA Stats API root
+            timeout: Per-request timeout in seconds
+            max_connections: Connection pool size per host (callers block when exhausted)
+            requests_per_second: Rate ceiling shared by all threads
+            max_retries: Retries for network errors, 429s and 5xx responses
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(requests_per_second)
+
+        self.session = requests.Session()
+        self.session.headers.update(NBA_STATS_HEADERS)
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Per-endpoint request metrics
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {
+            'requests': 0,
+            'errors': 0,
+            'bytes': 0,
+            'total_seconds': 0.0,
+            'max_seconds': 0.0
+        })
+
+    def _record(self, endpoint: str, elapsed: float, num_bytes: int, error: bool):
+        with self.lock:
+            stats = self.stats[endpoint]
+            stats['requests'] += 1
+            stats['bytes'] += num_bytes
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            if error:
+                stats['errors'] += 1
+
+    def get_json(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Rate-limited GET of an NBA Stats endpoint (e.g. 'playergamelog')
+
+        Retries with jittered backoff and raises once retries are exhausted.
+        """
+        url = f"{self.base_url}/{endpoint}"
+
+        def attempt():
+            self.rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.json()
+            except Exception:
+                self._record(endpoint, time.monotonic() - start, 0, error=True)
+                raise
+
+            self._record(endpoint, time.monotonic() - start, len(response.content), error=False)
+            return data
+
+        return retry_with_backoff(attempt, max_retries=self.max_retries)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Requests, errors, bytes and latency per endpoint"""
+        with self.lock:
+            summary = {}
+            for endpoint, stats in self.stats.items():
+                requests_made = stats['requests']
+                summary[endpoint] = {
+                    'requests': requests_made,
+                    'errors': stats['errors'],
+                    'bytes': stats['bytes'],
+                    'total_seconds': round(stats['total_seconds'], 3),
+                    'avg_ms': round(stats['total_seconds'] / requests_made * 1000, 1) if requests_made else 0.0,
+                    'max_ms': round(stats['max_seconds'] * 1000, 1)
+                }
+            return summary
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats.clear()
+
+# Global client shared by the stats and grading services
+settings = get_settings()
+nba_stats_client = NBAStatsClient(
+    timeout=settings.nba_timeout_seconds,
+    max_connections=settings.nba_max_connections,
+    requests_per_second=settings.nba_requests_per_second,
+    max_retries=settings.nba_max_retries
+)
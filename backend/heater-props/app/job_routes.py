@@ -0,0 +1,38 @@
+# app/job_routes.py
+from fastapi import APIRouter, HTTPException
+from app.job_runner import job_runner
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.post("/update-odds")
+def enqueue_update_odds(force_refresh: bool = False, use_cached_projections: bool = True):
+    """Queue an odds/projections refresh (returns the already running job if there is one)"""
+    return job_runner.enqueue('update-odds', {
+        'force_refresh': force_refresh,
+        'use_cached_projections': use_cached_projections
+    })
+
+@router.post("/grade-all")
+def enqueue_grade_all():
+    """Queue grading of all completed games (returns the already running job if there is one)"""
+    return job_runner.enqueue('grade-all')
+
+@router.get("/")
+def list_jobs(limit: int = 20):
+    """Most recent jobs, newest first"""
+    jobs = job_runner.list_jobs(limit=limit)
+
+    return {
+        "jobs": jobs,
+        "total": len(jobs)
+    }
+
+@router.get("/{job_id}")
+def get_job(job_id: int):
+    """Status, progress and result of a job"""
+    job = job_runner.get_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
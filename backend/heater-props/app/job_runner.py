@@ -0,0 +1,305 @@
+# app/job_runner.py
+# In-process background jobs with a jobs table, deduplication and a periodic schedule
+
+import inspect
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Optional, List
+from sqlalchemy.exc import IntegrityError
+from app.config import get_settings
+from app.database import SessionLocal
+from app import models
+
+class JobRunner:
+    def __init__(self, max_workers: int = 2, heartbeat_seconds: int = 30):
+        """
+        Run long tasks (odds refresh, grading) off the request thread
+
+        Args:
+            max_workers: Number of jobs that may run at the same time
+            heartbeat_seconds: How often this process marks its queued/running jobs alive
+        """
+        self.handlers = {}
+        self.defaults = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.lock = threading.Lock()
+
+        # Live progress for running jobs, kept in memory to avoid a write per step
+        self.progress = {}
+
+        # Jobs queued or running in this process, and the heartbeat that keeps
+        # other workers from treating them as abandoned
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.active = set()
+        self.heartbeat_seconds = heartbeat_seconds
+        self.heartbeat_thread = None
+
+        self.stop_event = threading.Event()
+        self.scheduler_thread = None
+
+    def register(self, kind: str, handler: Callable[..., Dict[str, Any]]):
+        """
+        Register a job handler
+
+        The handler is called as handler(db, progress=callback, **params) and
+        returns a JSON-serializable dict; callback(done, total, message) reports progress.
+        """
+        self.handlers[kind] = handler
+
+        # Omitted params mean the handler's defaults, so enqueue(kind) and an
+        # explicit request for the same defaults count as the same job
+        self.defaults[kind] = {
+            name: parameter.default
+            for name, parameter in inspect.signature(handler).parameters.items()
+            if name not in ('db', 'progress') and parameter.default is not inspect.Parameter.empty
+        }
+
+    def _to_dict(self, job: models.Job, deduplicated: bool = False) -> Dict[str, Any]:
+        info = {
+            'job_id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'params': json.loads(job.params) if job.params else {},
+            'result': json.loads(job.result) if job.result else None,
+            'error': job.error,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+            'owner': job.owner,
+            'progress': self.progress.get(job.id)
+        }
+        if deduplicated:
+            info['deduplicated'] = True
+        return info
+
+    def _active_job(self, db, kind: str, params: str) -> Optional[models.Job]:
+        return db.query(models.Job).filter(
+            models.Job.kind == kind,
+            models.Job.params == params,
+            models.Job.status.in_(['queued', 'running'])
+        ).order_by(models.Job.id).first()
+
+    def enqueue(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Queue a job and return immediately
+
+        If a job of the same kind with the same params is already queued or
+        running, in this or another worker process, that job is returned
+        instead, so concurrent triggers share one run. A request with other
+        params (a forced refresh, another date range) gets its own job. A
+        unique index over active jobs settles races between processes; a job
+        whose worker stopped heartbeating is failed first so it can't block
+        its kind forever.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        # Stored sorted so equal params compare equal in SQL
+        params = json.dumps({**self.defaults[kind], **(params or {})}, sort_keys=True)
+
+        self._start_heartbeat()
+
+        with self.lock:
+            db = SessionLocal()
+            try:
+                self._fail_stale(db, kind)
+
+                active = self._active_job(db, kind, params)
+                if active:
+                    return self._to_dict(active, deduplicated=True)
+
+                job = models.Job(
+                    kind=kind,
+                    status='queued',
+                    params=params,
+                    owner=self.owner,
+                    heartbeat_at=datetime.utcnow()
+                )
+                db.add(job)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another process queued one between our check and insert
+                    db.rollback()
+                    active = self._active_job(db, kind, params)
+                    if active:
+                        return self._to_dict(active, deduplicated=True)
+                    raise
+                db.refresh(job)
+
+                self.active.add(job.id)
+                self.executor.submit(self._run, job.id)
+                print(f"Queued job {job.id} ({kind})")
+                return self._to_dict(job)
+            finally:
+                db.close()
+
+    def _set_status(self, job_id: int, **fields):
+        db = SessionLocal()
+        try:
+            db.query(models.Job).filter(models.Job.id == job_id).update(fields)
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            kind = job.kind
+            params = json.loads(job.params) if job.params else {}
+        finally:
+            db.close()
+
+        self._set_status(job_id, status='running', started_at=datetime.utcnow())
+        self.progress[job_id] = {'done': 0, 'total': 0, 'message': 'Starting'}
+
+        def report(done: int, total: int, message: str = ''):
+            self.progress[job_id] = {'done': done, 'total': total, 'message': message}
+
+        db = SessionLocal()
+        try:
+            result = self.handlers[kind](db, progress=report, **params)
+            self._set_status(
+                job_id,
+                status='completed',
+                result=json.dumps(result, default=str),
+                finished_at=datetime.utcnow()
+            )
+            print(f"Job {job_id} ({kind}) completed")
+        except Exception as e:
+            db.rollback()
+            print(f"Job {job_id} ({kind}) failed: {e}")
+            self._set_status(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+        finally:
+            db.close()
+            self.progress.pop(job_id, None)
+            with self.lock:
+                self.active.discard(job_id)
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            return self._to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            jobs = db.query(models.Job).order_by(models.Job.id.desc()).limit(limit).all()
+            return [self._to_dict(job) for job in jobs]
+        finally:
+            db.close()
+
+    def _heartbeat(self):
+        """Mark this process's queued/running jobs alive"""
+        with self.lock:
+            job_ids = list(self.active)
+        if not job_ids:
+            return
+
+        db = SessionLocal()
+        try:
+            db.query(models.Job).filter(models.Job.id.in_(job_ids)).update(
+                {'heartbeat_at': datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating job heartbeats: {e}")
+        finally:
+            db.close()
+
+    def _start_heartbeat(self):
+        if self.heartbeat_thread is not None:
+            return
+
+        with self.lock:
+            if self.heartbeat_thread is not None:
+                return
+
+            def loop():
+                while not self.stop_event.wait(self.heartbeat_seconds):
+                    self._heartbeat()
+
+            self.heartbeat_thread = threading.Thread(target=loop, name="job-heartbeat", daemon=True)
+            self.heartbeat_thread.start()
+
+    def _fail_stale(self, db, kind: Optional[str] = None) -> int:
+        """
+        Mark queued/running jobs whose worker stopped heartbeating as failed
+
+        Jobs of live workers (this process or others) keep their status. Rows
+        from before heartbeats existed have none and count as stale.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=3 * self.heartbeat_seconds)
+        query = db.query(models.Job).filter(
+            models.Job.status.in_(['queued', 'running']),
+            (models.Job.heartbeat_at == None) | (models.Job.heartbeat_at < stale_before)
+        )
+        if kind is not None:
+            query = query.filter(models.Job.kind == kind)
+
+        count = query.update({
+            'status': 'failed',
+            'error': 'Interrupted: its worker process stopped',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+        return count
+
+    def recover_interrupted(self):
+        """Mark jobs left queued/running by a worker that is no longer running as failed"""
+        db = SessionLocal()
+        try:
+            count = self._fail_stale(db)
+            if count:
+                print(f"Marked {count} interrupted jobs as failed")
+        finally:
+            db.close()
+
+    def start_scheduler(self, intervals: Dict[str, int]):
+        """
+        Enqueue jobs periodically
+
+        Args:
+            intervals: Dictionary of job kind -> interval in minutes (0 disables)
+        """
+        intervals = {kind: minutes for kind, minutes in intervals.items() if minutes > 0}
+        if not intervals or self.scheduler_thread is not None:
+            return
+
+        def loop():
+            start = datetime.utcnow()
+            next_run = {kind: start + timedelta(minutes=minutes) for kind, minutes in intervals.items()}
+            while not self.stop_event.is_set():
+                now = datetime.utcnow()
+                for kind, minutes in intervals.items():
+                    if now >= next_run[kind]:
+                        try:
+                            self.enqueue(kind)
+                        except Exception as e:
+                            print(f"Error scheduling job {kind}: {e}")
+                        next_run[kind] = now + timedelta(minutes=minutes)
+
+                self.stop_event.wait(30)
+
+        self.scheduler_thread = threading.Thread(target=loop, name="job-scheduler", daemon=True)
+        self.scheduler_thread.start()
+        print(f"Job scheduler started: {intervals}")
+
+    def shutdown(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=False)
+
+# Global instance
+job_runner = JobRunner(
+    max_workers=get_settings().job_workers,
+    heartbeat_seconds=get_settings().job_heartbeat_seconds
+)
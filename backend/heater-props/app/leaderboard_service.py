@@ -0,0 +1,287 @@
+# app/leaderboard_service.py
+# Materialized leaderboard, kept up to date by the grading service
+
+from typing import List, Dict, Any, Optional, Iterable
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, or_, and_
+from sqlalchemy.orm import Session
+from app import models
+
+class LeaderboardService:
+    # Timeframe name -> rolling window (None means all time)
+    TIMEFRAMES = {
+        'overall': None,
+        'week': timedelta(days=7),
+        'month': timedelta(days=30)
+    }
+
+    def normalize_timeframe(self, timeframe: str) -> str:
+        """Unknown timeframes fall back to 'overall'"""
+        return timeframe if timeframe in self.TIMEFRAMES else 'overall'
+
+    def _aggregate(self, db: Session, user_ids: Optional[List[int]], since: Optional[datetime]) -> Dict[int, Dict[str, Any]]:
+        """Won/lost/push counts and oldest graded_at per user in one grouped query"""
+        query = db.query(
+            models.Pick.user_id,
+            func.sum(case((models.Pick.result == 'won', 1), else_=0)),
+            func.sum(case((models.Pick.result == 'lost', 1), else_=0)),
+            func.sum(case((models.Pick.result == 'push', 1), else_=0)),
+            func.min(models.Pick.graded_at)
+        ).filter(
+            models.Pick.result != None,
+            models.Pick.user_id != None
+        )
+
+        if user_ids is not None:
+            query = query.filter(models.Pick.user_id.in_(user_ids))
+
+        if since:
+            query = query.filter(models.Pick.graded_at >= since)
+
+        aggregates = {}
+        for user_id, won, lost, push, oldest in query.group_by(models.Pick.user_id):
+            aggregates[user_id] = {
+                'won': int(won or 0),
+                'lost': int(lost or 0),
+                'push': int(push or 0),
+                'oldest': oldest
+            }
+
+        return aggregates
+
+    def _streaks(self, db: Session, user_ids: Optional[List[int]], since: Optional[datetime]) -> Dict[int, str]:
+        """
+        Current win/loss streak per user (pushes ignored)
+
+        Streams (user_id, result) ordered most recent first in a single query
+        and stops counting for a user as soon as the result changes.
+        """
+        query = db.query(models.Pick.user_id, models.Pick.result).filter(
+            models.Pick.result.in_(['won', 'lost']),
+            models.Pick.user_id != None
+        )
+
+        if user_ids is not None:
+            query = query.filter(models.Pick.user_id.in_(user_ids))
+
+        if since:
+            query = query.filter(models.Pick.graded_at >= since)
+
+        query = query.order_by(models.Pick.user_id, models.Pick.graded_at.desc())
+
+        streaks = {}
+        current_user = None
+        current_result = None
+        count = 0
+        done = False
+
+        for user_id, result in query.yield_per(1000):
+            if user_id != current_user:
+                if current_user is not None:
+                    streaks[current_user] = self._format_streak(current_result, count)
+                current_user = user_id
+                current_result = result
+                count = 0
+                done = False
+
+            if done:
+                continue
+
+            if result == current_result:
+                count += 1
+            else:
+                done = True
+
+        if current_user is not None:
+            streaks[current_user] = self._format_streak(current_result, count)
+
+        return streaks
+
+    def _format_streak(self, result: Optional[str], count: int) -> str:
+        if not result or count == 0:
+            return "0"
+        streak_letter = "W" if result == "won" else "L"
+        return f"{streak_letter}{count}"
+
+    def _recompute(self, db: Session, timeframe: str, user_ids: Optional[List[int]], now: datetime):
+        """Rebuild the rows for one timeframe (for the given users, or everyone)"""
+        window = self.TIMEFRAMES[timeframe]
+        since = now - window if window else None
+
+        aggregates = self._aggregate(db, user_ids, since)
+        streaks = self._streaks(db, user_ids, since)
+
+        delete_query = db.query(models.LeaderboardStat).filter(
+            models.LeaderboardStat.timeframe == timeframe
+        )
+        if user_ids is not None:
+            delete_query = delete_query.filter(models.LeaderboardStat.user_id.in_(user_ids))
+        delete_query.delete(synchronize_session=False)
+
+        rows = []
+        for user_id, counts in aggregates.items():
+            won, lost, push = counts['won'], counts['lost'], counts['push']
+            win_rate = round((won / (won + lost)) * 100, 1) if (won + lost) > 0 else 0.0
+
+            expires_at = None
+            if window and counts['oldest'] is not None:
+                expires_at = counts['oldest'] + window
+
+            rows.append({
+                'user_id': user_id,
+                'timeframe': timeframe,
+                'wins': won,
+                'losses': lost,
+                'pushes': push,
+                'total': won + lost + push,
+                'win_rate': win_rate,
+                'streak': streaks.get(user_id, "0"),
+                'expires_at': expires_at,
+                'updated_at': now
+            })
+
+        if rows:
+            db.bulk_insert_mappings(models.LeaderboardStat, rows)
+
+    def update_users(self, db: Session, user_ids: Iterable[Optional[int]]):
+        """Refresh every timeframe for users whose picks were just graded"""
+        user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not user_ids:
+            return
+
+        now = datetime.utcnow()
+        for timeframe in self.TIMEFRAMES:
+            self._recompute(db, timeframe, user_ids, now)
+
+        db.commit()
+
+    def rebuild(self, db: Session):
+        """Recompute the whole leaderboard from the picks table"""
+        now = datetime.utcnow()
+        for timeframe in self.TIMEFRAMES:
+            self._recompute(db, timeframe, None, now)
+
+        db.commit()
+
+    def _ensure_built(self, db: Session):
+        """Backfill once if graded picks exist but nothing has been materialized yet"""
+        if db.query(models.LeaderboardStat.id).first() is not None:
+            return
+
+        if db.query(models.Pick.id).filter(models.Pick.result != None).first() is not None:
+            print("Leaderboard empty - rebuilding from graded picks...")
+            self.rebuild(db)
+
+    def _refresh_expired(self, db: Session, timeframe: str):
+        """Recompute rolling-window rows whose oldest pick has aged out of the window"""
+        if self.TIMEFRAMES[timeframe] is None:
+            return
+
+        now = datetime.utcnow()
+        expired = db.query(models.LeaderboardStat.user_id).filter(
+            models.LeaderboardStat.timeframe == timeframe,
+            models.LeaderboardStat.expires_at <= now
+        ).all()
+
+        if expired:
+            self._recompute(db, timeframe, [user_id for (user_id,) in expired], now)
+            db.commit()
+
+    def _to_entry(self, stat: models.LeaderboardStat, current_user_id: Optional[int], rank: int) -> Dict[str, Any]:
+        return {
+            "user_id": str(stat.user_id),
+            "wins": stat.wins,
+            "losses": stat.losses,
+            "push": stat.pushes,
+            "total": stat.total,
+            "win_rate": stat.win_rate,
+            "streak": stat.streak,
+            "is_user": stat.user_id == current_user_id,
+            "rank": rank
+        }
+
+    def get_leaderboard(
+        self,
+        db: Session,
+        timeframe: str = "overall",
+        current_user_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Ranked leaderboard read from the materialized table
+
+        Args:
+            timeframe: 'week', 'month' or 'overall'
+            current_user_id: User to flag and rank in the response
+            limit: Return only the top K entries (the current user is still included)
+        """
+        timeframe = self.normalize_timeframe(timeframe)
+
+        self._ensure_built(db)
+        self._refresh_expired(db, timeframe)
+
+        Stat = models.LeaderboardStat
+        query = db.query(Stat).filter(
+            Stat.timeframe == timeframe,
+            (Stat.wins + Stat.losses) > 0
+        )
+
+        current_user_found = False
+
+        # Skip test data for current user (user_id 1-5 are test users)
+        if current_user_id is not None and current_user_id <= 5:
+            query = query.filter(Stat.user_id != current_user_id)
+            current_user_found = True
+
+        total_users = query.count()
+
+        ranked = query.order_by(Stat.wins.desc(), Stat.win_rate.desc(), Stat.user_id)
+        if limit:
+            ranked = ranked.limit(limit)
+
+        leaderboard = []
+        current_user_rank = None
+
+        for idx, stat in enumerate(ranked, 1):
+            leaderboard.append(self._to_entry(stat, current_user_id, idx))
+            if stat.user_id == current_user_id:
+                current_user_found = True
+                current_user_rank = idx
+
+        # Current user ranked below the top K - count how many users are ahead of them
+        if current_user_id is not None and not current_user_found:
+            stat = query.filter(Stat.user_id == current_user_id).first()
+            if stat:
+                ahead = query.filter(or_(
+                    Stat.wins > stat.wins,
+                    and_(Stat.wins == stat.wins, Stat.win_rate > stat.win_rate),
+                    and_(Stat.wins == stat.wins, Stat.win_rate == stat.win_rate, Stat.user_id < stat.user_id)
+                )).count()
+                current_user_rank = ahead + 1
+                leaderboard.append(self._to_entry(stat, current_user_id, current_user_rank))
+                current_user_found = True
+
+        # If current user not found (no picks yet), add them with 0-0 record
+        if current_user_id and not current_user_found:
+            total_users += 1
+            current_user_rank = total_users
+            leaderboard.append({
+                "user_id": str(current_user_id),
+                "wins": 0,
+                "losses": 0,
+                "push": 0,
+                "total": 0,
+                "win_rate": 0.0,
+                "streak": "0",
+                "is_user": True,
+                "rank": current_user_rank
+            })
+
+        return {
+            "leaderboard": leaderboard,
+            "current_user_rank": current_user_rank,
+            "total_users": total_users
+        }
+
+# Global instance
+leaderboard_service = LeaderboardService()
@@ -0,0 +1,65 @@
+# app/line_history_routes.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from app.database import get_read_db
+from app import models, crud
+
+router = APIRouter(prefix="/api/line-history", tags=["line-history"])
+
+def group_by_prop(rows: List[Tuple[models.PropLineSnapshot, models.PlayerProp]]) -> List[Dict[str, Any]]:
+    """Group (snapshot, prop) rows, already ordered by prop and time, into one entry per prop"""
+    props = []
+    current = None
+
+    for snapshot, prop in rows:
+        if current is None or current['player_prop_id'] != prop.id:
+            current = {
+                'player_prop_id': prop.id,
+                'game_id': prop.game_id,
+                'player_name': prop.player_name,
+                'prop_type': prop.prop_type,
+                'bookmaker': prop.bookmaker,
+                'retired': prop.retired_at is not None,
+                'history': []
+            }
+            props.append(current)
+
+        current['history'].append({
+            'recorded_at': snapshot.recorded_at,
+            'line': snapshot.line,
+            'over_odds': snapshot.over_odds,
+            'under_odds': snapshot.under_odds
+        })
+
+    return props
+
+@router.get("/game/{game_id}")
+def get_game_line_history(game_id: int, db: Session = Depends(get_read_db)):
+    """Line movement for every prop in a game"""
+    props = group_by_prop(crud.get_line_history_for_game(db, game_id))
+
+    return {
+        'game_id': game_id,
+        'props': props,
+        'total': len(props)
+    }
+
+@router.get("/player/{player_name}")
+def get_player_line_history(
+    player_name: str,
+    prop_type: Optional[str] = None,
+    game_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Line movement for a player's props, optionally for one prop type and/or game"""
+    props = group_by_prop(crud.get_line_history_for_player(db, player_name, prop_type, game_id))
+
+    if not props:
+        raise HTTPException(status_code=404, detail="No line history found for this player")
+
+    return {
+        'player_name': player_name,
+        'props': props,
+        'total': len(props)
+    }
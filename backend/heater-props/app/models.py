@@ -1,5 +1,5 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, Float, ForeignKey, Index
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, Date, DateTime, Numeric, Float, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -34,6 +34,7 @@ class PlayerProp(Base):
     under_odds = Column(Integer, nullable=False)
     bookmaker = Column(String(100), nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    retired_at = Column(DateTime, nullable=True, index=True)  # Set when the prop drops off the board (kept for picks)
     
     # Relationships
     game = relationship("Game", back_populates="player_props")
@@ -42,12 +43,41 @@ class PlayerProp(Base):
     # Composite index for efficient queries
     __table_args__ = (
         Index('idx_player_prop_type', 'player_name', 'prop_type'),
+        Index('idx_player_prop_game_key', 'game_id', 'player_name', 'prop_type', 'bookmaker'),
+        # One live prop per key (retired ones stay for picks); the conflict target of the props upsert
+        Index(
+            'idx_player_prop_active_key', 'game_id', 'player_name', 'prop_type', 'bookmaker',
+            unique=True,
+            sqlite_where=text('retired_at IS NULL'),
+            postgresql_where=text('retired_at IS NULL')
+        ),
     )
     
     def __repr__(self):
         return f"<PlayerProp {self.player_name} {self.prop_type} {self.line}>"
 
 
+class PropLineSnapshot(Base):
+    """Append-only line/odds history: one narrow row per change to a PlayerProp"""
+    __tablename__ = "prop_line_history"
+    
+    id = Column(Integer, primary_key=True)
+    player_prop_id = Column(Integer, ForeignKey("player_props.id"), nullable=False)
+    game_id = Column(Integer, nullable=False)  # Denormalized so a whole game is one range scan
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    line = Column(Float, nullable=False)
+    over_odds = Column(SmallInteger, nullable=False)
+    under_odds = Column(SmallInteger, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_line_history_prop_time', 'player_prop_id', 'recorded_at'),
+        Index('idx_line_history_game_time', 'game_id', 'recorded_at'),
+    )
+    
+    def __repr__(self):
+        return f"<PropLineSnapshot {self.player_prop_id} {self.line} @ {self.recorded_at}>"
+
+
 class Pick(Base):
     __tablename__ = "picks"
     
@@ -70,7 +100,101 @@ class Pick(Base):
     # Composite index for efficient queries
     __table_args__ = (
         Index('idx_pick_user_result', 'user_id', 'result'),
+        # One pick per user and prop; the conflict target of the pick upsert
+        Index('idx_pick_user_prop', 'user_id', 'player_prop_id', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<Pick {self.selection} {self.line} - {self.result or 'pending'}>"
+
+
+class LeaderboardStat(Base):
+    """Materialized leaderboard row per user and timeframe ('overall', 'week', 'month')"""
+    __tablename__ = "leaderboard_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    timeframe = Column(String(10), nullable=False)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    pushes = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    win_rate = Column(Float, nullable=False, default=0.0)
+    streak = Column(String(10), nullable=False, default="0")
+    # For rolling timeframes: when the oldest counted pick falls out of the window
+    expires_at = Column(DateTime, nullable=True, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Ranking index: timeframe, then wins and win rate descending
+    __table_args__ = (
+        UniqueConstraint('user_id', 'timeframe', name='uq_leaderboard_user_timeframe'),
+        Index('idx_leaderboard_rank', 'timeframe', 'wins', 'win_rate'),
+    )
+    
+    def __repr__(self):
+        return f"<LeaderboardStat {self.user_id} {self.timeframe} {self.wins}-{self.losses}>"
+
+
+class Job(Base):
+    """Background job run by the in-process job runner (odds refresh, grading)"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # 'update-odds', 'grade-all', 'preload-boxscores'
+    status = Column(String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed', 'failed'
+    params = Column(Text, nullable=True)  # JSON
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    owner = Column(String(255), nullable=True)  # host:pid of the worker process running it
+    heartbeat_at = Column(DateTime, nullable=True)  # Refreshed by that worker while the job is active
+    
+    # Deduplication looks up active jobs by kind and params
+    __table_args__ = (
+        Index('idx_job_kind_status', 'kind', 'status'),
+        # One queued/running job per kind and params across all worker processes
+        Index(
+            'idx_job_active_kind_params', 'kind', 'params',
+            unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
     )
     
     def __repr__(self):
-        return f"<Pick {self.selection} {self.line} - {self.result or 'pending'}>"
\ No newline at end of file
+        return f"<Job {self.id} {self.kind} {self.status}>"
+
+
+class PlayerGameLog(Base):
+    """One row of a player's NBA Stats game log, stored locally so refreshes only fetch new games"""
+    __tablename__ = "player_game_logs"
+    
+    id = Column(Integer, primary_key=True)
+    player_id = Column(Integer, nullable=False)
+    game_id = Column(String(20), nullable=False)  # NBA external game id
+    season = Column(String(10), nullable=False)  # '2024-25'
+    game_date = Column(Date, nullable=False)
+    row = Column(Text, nullable=False)  # JSON list in playergamelog column order
+    
+    __table_args__ = (
+        UniqueConstraint('player_id', 'game_id', name='uq_player_game_log'),
+        Index('idx_player_game_log_recent', 'player_id', 'season', 'game_date'),
+    )
+    
+    def __repr__(self):
+        return f"<PlayerGameLog {self.player_id} {self.game_id} {self.game_date}>"
+
+
+class PlayerGameLogSync(Base):
+    """When a player's game log was last refreshed from the API, per season"""
+    __tablename__ = "player_game_log_sync"
+    
+    player_id = Column(Integer, primary_key=True)
+    season = Column(String(10), primary_key=True)
+    last_synced_at = Column(DateTime, nullable=False)
+    last_game_date = Column(Date, nullable=True)
+    
+    def __repr__(self):
+        return f"<PlayerGameLogSync {self.player_id} {self.season} {self.last_synced_at}>"
@@ -0,0 +1,141 @@
+# app/odds_refresh.py
+# Loads the schedule and projections into the database (used by /api/update-odds and the job runner)
+
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable
+from sqlalchemy.orm import Session
+from app import models, schemas, crud
+from app.odds_service import stats_service
+from app.cache_manager import cache_manager
+from app.projection_service import projection_service
+
+def refresh_odds(
+    db: Session,
+    force_refresh: bool = False,
+    use_cached_projections: bool = True,
+    progress: Optional[Callable[[int, int, str], None]] = None
+) -> Dict[str, Any]:
+    """
+    Fetch latest games and load pre-generated projections
+    
+    Args:
+        force_refresh: Reload the schedule even if the cached copy is fresh
+        use_cached_projections: False generates projections live (slow)
+        progress: Optional callback(done, total, message) for job status
+    """
+    cache_key = "games_dec_5_12"
+    
+    def load_schedule():
+        print("Loading schedule from static file...")
+        return stats_service.fetch_schedule()
+    
+    # Concurrent refreshes share one schedule load; an expired copy is served
+    # while it is reloaded in the background (force_refresh always reloads)
+    if force_refresh:
+        print("Force refresh requested")
+    games_data, source = cache_manager.get_or_load(cache_key, load_schedule, refresh=force_refresh)
+    
+    # A load this call ran or joined is new data; only cached copies skip games
+    used_cache = source in ('fresh', 'stale')
+    if used_cache:
+        print(f"Using cached game data ({source})")
+    
+    if not games_data:
+        return {"message": "No games data received", "updated": 0}
+    
+    print(f"Found {len(games_data)} games")
+    updated_count = 0
+    skipped_count = 0
+    prop_changes = {'updated': 0, 'retired': 0, 'unchanged': 0}
+    
+    # New props for the whole slate, inserted in one transaction at the end
+    pending_props = []
+    
+    for index, game_data in enumerate(games_data):
+        if progress:
+            progress(index, len(games_data), f"Game {index + 1} of {len(games_data)}")
+        
+        # Parse game info
+        game_info = stats_service.parse_game_data(game_data)
+        
+        # Check if game already exists
+        existing_game = crud.get_game_by_external_id(db, game_info['external_id'])
+        
+        if existing_game:
+            # If using cache and game already has projections, skip
+            if used_cache:
+                existing_props = db.query(models.PlayerProp).filter(
+                    models.PlayerProp.game_id == existing_game.id,
+                    models.PlayerProp.retired_at == None
+                ).count()
+                
+                if existing_props > 0:
+                    print(f"  Skipping {game_info['away_team']} @ {game_info['home_team']} (already has {existing_props} projections)")
+                    skipped_count += 1
+                    continue
+            
+            # Update existing game (only touch the row if something changed)
+            for field in ('home_team', 'away_team', 'commence_time'):
+                if getattr(existing_game, field) != game_info[field]:
+                    setattr(existing_game, field, game_info[field])
+            
+            game = existing_game
+        else:
+            # Create new game (committed with the props; a concurrent refresh may have added it)
+            game = crud.upsert_game(db, schemas.GameCreate(**game_info))
+        
+        print(f"Loading projections for {game_info['away_team']} @ {game_info['home_team']}...")
+        
+        # Get projections - either from cache or generate live
+        if use_cached_projections:
+            # Load from pre-generated cache
+            projections = projection_service.get_projections_for_game(game_data['game_id'])
+            if projections:
+                print(f"  ✓ Loaded {len(projections)} cached projections")
+            else:
+                print(f"  ⚠ No cached projections found for this game")
+                projections = []
+        else:
+            # Generate live (slow)
+            print(f"  Generating projections live (this will take a while)...")
+            projections = stats_service.generate_projections_for_game(game_data)
+            print(f"  ✓ Generated {len(projections)} projections")
+        
+        if existing_game:
+            # Diff against the stored props so unchanged rows (and pick references) are kept
+            changes = crud.sync_game_props(db, game.id, projections)
+            pending_props.extend(changes['new_props'])
+            for key in prop_changes:
+                prop_changes[key] += changes[key]
+        else:
+            # Queue projections for the bulk insert
+            for proj_data in projections:
+                pending_props.append({**proj_data, 'game_id': game.id})
+        
+        updated_count += 1
+    
+    if progress:
+        progress(len(games_data), len(games_data), "Saving props")
+    
+    insert_start = time.perf_counter()
+    inserted_count = crud.bulk_create_player_props(db, pending_props)
+    insert_seconds = time.perf_counter() - insert_start
+    rows_per_sec = round(inserted_count / insert_seconds, 1) if insert_seconds > 0 else 0.0
+    print(f"Inserted {inserted_count} props in {insert_seconds:.3f}s ({rows_per_sec} rows/sec)")
+    
+    return {
+        "message": "Projections updated successfully",
+        "updated": updated_count,
+        "skipped": skipped_count,
+        "props_inserted": inserted_count,
+        "props_updated": prop_changes['updated'],
+        "props_retired": prop_changes['retired'],
+        "props_unchanged": prop_changes['unchanged'],
+        "insert_seconds": round(insert_seconds, 3),
+        "rows_per_sec": rows_per_sec,
+        "timestamp": datetime.utcnow().isoformat(),
+        "from_cache": used_cache,
+        "schedule_source": source,
+        "using_cached_projections": use_cached_projections
+    }
@@ -1,25 +1,51 @@
 # app/odds_service.py
-import requests
 import json
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+from datetime import date, datetime, timedelta
+from app.config import get_settings
+from app.http_client import NBAStatsClient, nba_stats_client
+from app.game_log_store import GameLogStore, game_log_store
+from app.projection_engine import ProjectionEngine
+from app.slate_memo import SlateMemo
 
 class NBAStatsService:
-    def __init__(self, use_static_file=False, static_file_path="schedule.json"):
-        self.base_url = "https://stats.nba.com/stats"
+    def __init__(
+        self,
+        use_static_file=False,
+        static_file_path="schedule.json",
+        http_client: NBAStatsClient = nba_stats_client,
+        max_workers: int = 4,
+        max_games_in_flight: int = 2,
+        game_logs: GameLogStore = game_log_store,
+        engine: Optional[ProjectionEngine] = None,
+        memo: Optional[SlateMemo] = None
+    ):
         self.use_static_file = use_static_file
         self.static_file_path = static_file_path
         
-        # Headers required by NBA Stats API
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.nba.com/',
-            'Origin': 'https://www.nba.com'
-        }
+        # Pooled client with the shared rate limit and retry policy
+        self.http = http_client
+        self.max_workers = max_workers
+        self.max_games_in_flight = max_games_in_flight
+        
+        # Local game logs, refreshed incrementally
+        self.game_logs = game_logs
+        
+        # Batch projection math (defaults match calculate_projection)
+        self.engine = engine or ProjectionEngine()
+        
+        # Optional run-wide memo for rosters and game logs (set by generate_all_projections)
+        self.memo = memo
+        
+        # Column order of the NBA Stats playergamelog endpoint (what the game log store holds)
+        self.GAME_LOG_COLUMNS = [
+            'SEASON_ID', 'PLAYER_ID', 'GAME_ID', 'GAME_DATE', 'MATCHUP', 'WL', 'MIN',
+            'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT',
+            'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS',
+            'PLUS_MINUS', 'VIDEO_AVAILABLE'
+        ]
         
         # Stat column indices for NBA Stats API game log
         self.STATS_INDICES = {
@@ -77,7 +103,7 @@ class NBAStatsService:
     
     def fetch_todays_games(self) -> List[Dict[str, Any]]:
         """Fetch today's NBA games"""
-        url = f"{self.base_url}/scoreboardv2"
+        endpoint = "scoreboardv2"
         
         today = datetime.now().strftime('%Y-%m-%d')
         
@@ -88,9 +114,7 @@ class NBAStatsService:
         }
         
         try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self.http.get_json(endpoint, params)
             
             # Get team name mapping
             team_mapping = self.get_all_teams()
@@ -146,7 +170,7 @@ class NBAStatsService:
             target_date = datetime.now() + timedelta(days=day_offset)
             date_str = target_date.strftime('%Y-%m-%d')
             
-            url = f"{self.base_url}/scoreboardv2"
+            endpoint = "scoreboardv2"
             params = {
                 'GameDate': date_str,
                 'LeagueID': '00',
@@ -154,9 +178,7 @@ class NBAStatsService:
             }
             
             try:
-                response = requests.get(url, params=params, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                data = response.json()
+                data = self.http.get_json(endpoint, params)
                 
                 if 'resultSets' in data and len(data['resultSets']) > 0:
                     game_header = data['resultSets'][0]
@@ -188,43 +210,178 @@ class NBAStatsService:
                         
                         all_games.append(games_dict)
                 
-                # Be nice to the API
-                sleep(0.5)
-                
             except Exception as e:
                 print(f"Error fetching games for {date_str}: {e}")
         
         return all_games
     
-    def fetch_player_game_log(self, player_id: str, season: str = "2024-25") -> List[Dict[str, Any]]:
-        """Fetch recent game log for a player"""
-        url = f"{self.base_url}/playergamelog"
-        
-        params = {
-            'PlayerID': player_id,
-            'Season': season,
-            'SeasonType': 'Regular Season',
-            'LeagueID': '00'
-        }
+    def fetch_player_game_log(self, player_id: str, season: str = "2024-25", limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Fetch recent game log for a player
         
+        Reads from the local game log store. When the stored log is older than
+        the refresh window, only games after the last stored date are requested.
+        If that request fails, the stored games are returned (and not memoized,
+        so the next lookup tries the API again).
+        """
         try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            if self.memo:
+                return self.memo.get_or_fetch(
+                    'game_log',
+                    f"{player_id}:{season}:{limit}",
+                    lambda: self._load_player_game_log(player_id, season, limit)
+                )
+            
+            return self._load_player_game_log(player_id, season, limit)
+        
+        except Exception as e:
+            # Fall back to whatever is stored
+            print(f"Error fetching game log for player {player_id}: {e}")
+            return self.game_logs.get_recent(player_id, season, limit=limit)
+    
+    def _load_player_game_log(self, player_id: str, season: str, limit: int) -> List[Dict[str, Any]]:
+        """Refresh the stored log if needed and read it (raises on failure so a failed lookup isn't memoized)"""
+        sync = self.game_logs.get_sync(player_id, season)
+        
+        if not self.game_logs.is_fresh(sync):
+            endpoint = "playergamelog"
+            
+            params = {
+                'PlayerID': player_id,
+                'Season': season,
+                'SeasonType': 'Regular Season',
+                'LeagueID': '00'
+            }
+            
+            # Delta refresh: only games after the newest one we already have
+            if sync and sync['last_game_date']:
+                params['DateFrom'] = (sync['last_game_date'] + timedelta(days=1)).strftime('%m/%d/%Y')
+            
+            data = self.http.get_json(endpoint, params)
             
             if 'resultSets' in data and len(data['resultSets']) > 0:
-                games = data['resultSets'][0]['rowSet']
-                return games[:10]  # Last 10 games
+                self.game_logs.append(player_id, season, data['resultSets'][0]['rowSet'])
+        
+        return self.game_logs.get_recent(player_id, season, limit=limit)
+    
+    def _to_player_game_log_row(self, headers: List[str], row: List[Any]) -> List[Any]:
+        """Reorder a leaguegamelog row into playergamelog column order"""
+        positions = {header.upper(): index for index, header in enumerate(headers)}
+        converted = [row[positions[column]] if column in positions else None for column in self.GAME_LOG_COLUMNS]
+        
+        # playergamelog dates look like 'DEC 03, 2025'
+        game_date_index = self.GAME_LOG_COLUMNS.index('GAME_DATE')
+        game_date = self.game_logs.parse_game_date(converted[game_date_index])
+        converted[game_date_index] = game_date.strftime('%b %d, %Y').upper()
+        
+        return converted
+    
+    def ingest_league_game_logs(
+        self,
+        date_from: date,
+        date_to: date,
+        season: str = "2024-25",
+        days_per_request: int = 7
+    ) -> Dict[str, Any]:
+        """
+        Load every player's games in a date range with league-wide requests
+        
+        One leaguegamelog request covers all players for up to days_per_request
+        days, so the cost is O(days) instead of one playergamelog call per player.
+        Rows are split per player into the game log store, which then serves
+        fetch_player_game_log without further requests until the refresh window
+        passes. Use a range that covers the projection window (10+ games).
+        
+        Each request's rows are committed as soon as they arrive, so a failed
+        request only loses its own days; players are marked synced only when
+        every request succeeded.
+        
+        Returns a summary of requests made and rows stored
+        """
+        last_game_dates = {}
+        requests_made = 0
+        stored = 0
+        errors = []
+        
+        chunk_start = date_from
+        while chunk_start <= date_to:
+            chunk_end = min(chunk_start + timedelta(days=days_per_request - 1), date_to)
             
-            return []
+            params = {
+                'Counter': '0',
+                'Direction': 'DESC',
+                'LeagueID': '00',
+                'PlayerOrTeam': 'P',
+                'Season': season,
+                'SeasonType': 'Regular Season',
+                'Sorter': 'DATE',
+                'DateFrom': chunk_start.strftime('%m/%d/%Y'),
+                'DateTo': chunk_end.strftime('%m/%d/%Y')
+            }
             
-        except Exception as e:
-            print(f"Error fetching game log for player {player_id}: {e}")
-            return []
+            try:
+                data = self.http.get_json("leaguegamelog", params)
+                requests_made += 1
+                
+                rows_by_player = {}
+                if 'resultSets' in data and len(data['resultSets']) > 0:
+                    result_set = data['resultSets'][0]
+                    headers = result_set['headers']
+                    player_index = [header.upper() for header in headers].index('PLAYER_ID')
+                    
+                    for row in result_set['rowSet']:
+                        rows_by_player.setdefault(row[player_index], []).append(
+                            self._to_player_game_log_row(headers, row)
+                        )
+                
+                if rows_by_player:
+                    stored += self.game_logs.append_many(season, rows_by_player, mark_synced=False)
+                
+                for player_id, rows in rows_by_player.items():
+                    newest = max(self.game_logs.parse_game_date(row[self.game_logs.GAME_DATE_INDEX]) for row in rows)
+                    last_game_dates[player_id] = max(last_game_dates.get(player_id, newest), newest)
+            
+            except Exception as e:
+                print(f"Error fetching league game log {chunk_start} - {chunk_end}: {e}")
+                errors.append(f"{chunk_start} - {chunk_end}: {e}")
+            
+            chunk_start = chunk_end + timedelta(days=1)
+        
+        # Don't mark players as synced from a partial download (the next
+        # fetch for them still asks the API); rows already stored are kept
+        if last_game_dates and not errors:
+            self.game_logs.mark_synced(season, last_game_dates)
+        
+        print(f"League game logs: {requests_made} requests, {len(last_game_dates)} players, {stored} new rows")
+        
+        return {
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'requests': requests_made,
+            'players': len(last_game_dates),
+            'rows_stored': stored,
+            'errors': errors
+        }
     
     def fetch_team_roster(self, team_id: int, season: str = "2024-25") -> List[Dict[str, Any]]:
         """Fetch roster for a team"""
-        url = f"{self.base_url}/commonteamroster"
+        try:
+            if self.memo:
+                return self.memo.get_or_fetch(
+                    'roster',
+                    f"{team_id}:{season}",
+                    lambda: self._request_team_roster(team_id, season)
+                )
+            
+            return self._request_team_roster(team_id, season)
+            
+        except Exception as e:
+            print(f"Error fetching roster for team {team_id}: {e}")
+            return []
+    
+    def _request_team_roster(self, team_id: int, season: str) -> List[Dict[str, Any]]:
+        """Roster request (raises on failure so a failed lookup isn't memoized)"""
+        endpoint = "commonteamroster"
         
         params = {
             'TeamID': team_id,
@@ -232,31 +389,24 @@ class NBAStatsService:
             'LeagueID': '00'
         }
         
-        try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'resultSets' in data and len(data['resultSets']) > 0:
-                players = data['resultSets'][0]['rowSet']
-                
-                roster = []
-                for player in players:
-                    roster.append({
-                        'player_id': player[14],  # PLAYER_ID
-                        'player_name': player[3]   # PLAYER
-                    })
-                
-                return roster
+        data = self.http.get_json(endpoint, params)
+        
+        if 'resultSets' in data and len(data['resultSets']) > 0:
+            players = data['resultSets'][0]['rowSet']
             
-            return []
+            roster = []
+            for player in players:
+                roster.append({
+                    'player_id': player[14],  # PLAYER_ID
+                    'player_name': player[3]   # PLAYER
+                })
             
-        except Exception as e:
-            print(f"Error fetching roster for team {team_id}: {e}")
-            return []
+            return roster
+        
+        return []
     
     def calculate_projection(self, game_log: List[Any], stat_type: str) -> Optional[float]:
-        """Calculate average from recent games"""
+        """Calculate average from recent games (per-player reference for ProjectionEngine)"""
         if not game_log:
             return None
         
@@ -282,74 +432,129 @@ class NBAStatsService:
         rounded = round(avg * 2) / 2
         return rounded
     
-    def generate_projections_for_game(self, game_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate projections for a game"""
+    def _build_projections(self, player_name: str, game_log: List[Any]) -> List[Dict[str, Any]]:
+        """Turn a player's recent game log into prop projections"""
         projections = []
         
-        home_team_id = game_data['home_team_id']
-        away_team_id = game_data['away_team_id']
+        # Calculate projections using the stat type names
+        points_proj = self.calculate_projection(game_log, 'points')
+        rebounds_proj = self.calculate_projection(game_log, 'rebounds')
+        assists_proj = self.calculate_projection(game_log, 'assists')
         
-        # Get rosters
-        print(f"  Fetching home team roster...")
-        home_roster = self.fetch_team_roster(home_team_id)
-        sleep(0.5)
+        if points_proj and points_proj > 5:
+            projections.append({
+                'player_name': player_name,
+                'prop_type': 'points',
+                'line': points_proj,
+                'over_odds': -110,
+                'under_odds': -110,
+                'bookmaker': 'projection'
+            })
+        
+        if rebounds_proj and rebounds_proj > 2:
+            projections.append({
+                'player_name': player_name,
+                'prop_type': 'rebounds',
+                'line': rebounds_proj,
+                'over_odds': -110,
+                'under_odds': -110,
+                'bookmaker': 'projection'
+            })
         
-        print(f"  Fetching away team roster...")
-        away_roster = self.fetch_team_roster(away_team_id)
-        sleep(0.5)
+        if assists_proj and assists_proj > 1:
+            projections.append({
+                'player_name': player_name,
+                'prop_type': 'assists',
+                'line': assists_proj,
+                'over_odds': -110,
+                'under_odds': -110,
+                'bookmaker': 'projection'
+            })
+        
+        return projections
+    
+    def _fetch_recent_games(self, player: Dict[str, Any]) -> List[Any]:
+        print(f"  Getting stats for {player['player_name']}...")
+        return self.fetch_player_game_log(player['player_id'], limit=self.engine.depth)
+    
+    def generate_projections_for_game(
+        self,
+        game_data: Dict[str, Any],
+        executor: Optional[ThreadPoolExecutor] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate projections for a game
+        
+        Roster and game log requests run concurrently on the given executor
+        (or a private one), throttled by the shared rate limiter. The projections
+        themselves are computed for all players at once by the projection engine.
+        Output order matches the roster order, same as the serial version.
+        """
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as own_executor:
+                return self.generate_projections_for_game(game_data, own_executor)
+        
+        # Get rosters
+        print(f"  Fetching team rosters...")
+        home_future = executor.submit(self.fetch_team_roster, game_data['home_team_id'])
+        away_future = executor.submit(self.fetch_team_roster, game_data['away_team_id'])
         
         # Combine and limit to top 6 players per team (12 total)
-        all_players = home_roster[:6] + away_roster[:6]
+        home_players = home_future.result()[:6]
+        away_players = away_future.result()[:6]
+        all_players = home_players + away_players
         
-        for player in all_players:
-            player_id = player['player_id']
-            player_name = player['player_name']
-            
-            print(f"  Getting stats for {player_name}...")
-            
-            # Fetch game log
-            game_log = self.fetch_player_game_log(player_id)
-            sleep(0.5)  # Rate limiting
-            
-            if not game_log:
-                continue
-            
-            # Calculate projections using the stat type names
-            points_proj = self.calculate_projection(game_log, 'points')
-            rebounds_proj = self.calculate_projection(game_log, 'rebounds')
-            assists_proj = self.calculate_projection(game_log, 'assists')
-            
-            if points_proj and points_proj > 5:
-                projections.append({
-                    'player_name': player_name,
-                    'prop_type': 'points',
-                    'line': points_proj,
-                    'over_odds': -110,
-                    'under_odds': -110,
-                    'bookmaker': 'projection'
-                })
+        game_logs = list(executor.map(self._fetch_recent_games, all_players))
+        
+        return self.engine.project_players(
+            [player['player_name'] for player in all_players],
+            game_logs,
+            is_home=[True] * len(home_players) + [False] * len(away_players)
+        )
+    
+    def generate_projections_for_games(
+        self,
+        games: List[Dict[str, Any]],
+        on_game_complete: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]], Optional[str]], None]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Generate projections for a whole slate with bounded parallelism
+        
+        Up to max_games_in_flight games run at once and share one pool of
+        max_workers fetch threads, so total wall time is bounded by the rate
+        limiter rather than by per-call latency.
+        
+        Args:
+            games: Schedule entries (same shape as schedule.json)
+            on_game_complete: Optional callback(game, projections, error), called in schedule order
             
-            if rebounds_proj and rebounds_proj > 2:
-                projections.append({
-                    'player_name': player_name,
-                    'prop_type': 'rebounds',
-                    'line': rebounds_proj,
-                    'over_odds': -110,
-                    'under_odds': -110,
-                    'bookmaker': 'projection'
-                })
+        Returns:
+            Dictionary of game_id -> projections
+        """
+        results = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as fetch_executor, \
+                ThreadPoolExecutor(max_workers=self.max_games_in_flight) as game_executor:
+            futures = {
+                game['game_id']: game_executor.submit(self.generate_projections_for_game, game, fetch_executor)
+                for game in games
+            }
             
-            if assists_proj and assists_proj > 1:
-                projections.append({
-                    'player_name': player_name,
-                    'prop_type': 'assists',
-                    'line': assists_proj,
-                    'over_odds': -110,
-                    'under_odds': -110,
-                    'bookmaker': 'projection'
-                })
+            for game in games:
+                error = None
+                try:
+                    projections = futures[game['game_id']].result()
+                except Exception as e:
+                    print(f"Error generating projections for game {game['game_id']}: {e}")
+                    projections = []
+                    error = str(e)
+                
+                results[game['game_id']] = projections
+                
+                if on_game_complete:
+                    on_game_complete(game, projections, error)
         
-        return projections
+        return results
     
     def parse_game_data(self, game_data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse game data into our format"""
@@ -364,4 +569,15 @@ class NBAStatsService:
         }
 
 # For class project: use static file
-stats_service = NBAStatsService(use_static_file=True, static_file_path="schedule.json")
\ No newline at end of file
+settings = get_settings()
+stats_service = NBAStatsService(
+    use_static_file=True,
+    static_file_path="schedule.json",
+    max_workers=settings.nba_max_workers,
+    max_games_in_flight=settings.nba_max_games_in_flight,
+    engine=ProjectionEngine(
+        windows=settings.projection_windows,
+        ewma_halflife=settings.projection_ewma_halflife,
+        home_away_weight=settings.projection_home_away_weight
+    )
+)
\ No newline at end of file
@@ -1,14 +1,17 @@
 # app/picks_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 import hashlib
 import jwt
 
-from app.database import get_db
-from app import models, schemas
+from app.database import get_db, get_read_db, get_async_read_db
+from app import models, schemas, crud
+from app.leaderboard_service import leaderboard_service
 
 router = APIRouter(prefix="/api/picks", tags=["picks"])
 
@@ -86,60 +89,34 @@ def save_pick(
     prop = db.query(models.PlayerProp).filter(
         models.PlayerProp.game_id == game.id,
         models.PlayerProp.player_name == pick.player_name,
-        models.PlayerProp.prop_type == pick.prop_type
+        models.PlayerProp.prop_type == pick.prop_type,
+        models.PlayerProp.retired_at == None  # Can't pick a prop that is off the board
     ).first()
     
     if not prop:
         raise HTTPException(status_code=404, detail="Player prop not found")
     
-    # Check if pick already exists
-    existing_pick = db.query(models.Pick).filter(
+    # Check if pick already exists (only decides the message; the upsert handles races)
+    existing_pick = db.query(models.Pick.id).filter(
         models.Pick.user_id == user_id,
         models.Pick.player_prop_id == prop.id
     ).first()
     
-    if existing_pick:
-        # Update existing pick
-        existing_pick.selection = pick.prediction
-        existing_pick.line = pick.line
-        db.commit()
-        db.refresh(existing_pick)
-        
-        return {
-            'success': True,
-            'pick_id': existing_pick.id,
-            'message': 'Pick updated successfully',
-            'pick': {
-                'id': existing_pick.id,
-                'player_name': prop.player_name,
-                'prop_type': prop.prop_type,
-                'line': existing_pick.line,
-                'selection': existing_pick.selection
-            }
-        }
-    
-    # Create new pick
-    new_pick = models.Pick(
-        player_prop_id=prop.id,
-        user_id=user_id,
-        selection=pick.prediction,
-        line=pick.line
-    )
-    
-    db.add(new_pick)
+    # Insert, or update the selection and line of the existing pick
+    pick_id = crud.upsert_pick(db, user_id, prop.id, pick.prediction, pick.line)
     db.commit()
-    db.refresh(new_pick)
+    saved_pick = db.get(models.Pick, pick_id)
     
     return {
         'success': True,
-        'pick_id': new_pick.id,
-        'message': 'Pick saved successfully',
+        'pick_id': saved_pick.id,
+        'message': 'Pick updated successfully' if existing_pick else 'Pick saved successfully',
         'pick': {
-            'id': new_pick.id,
+            'id': saved_pick.id,
             'player_name': prop.player_name,
             'prop_type': prop.prop_type,
-            'line': new_pick.line,
-            'selection': new_pick.selection
+            'line': saved_pick.line,
+            'selection': saved_pick.selection
         }
     }
 
@@ -180,9 +157,15 @@ def delete_pick(
     if not pick_to_delete:
         raise HTTPException(status_code=404, detail='Pick not found')
     
+    was_graded = pick_to_delete.result is not None
+    
     db.delete(pick_to_delete)
     db.commit()
     
+    # Graded picks count towards the leaderboard
+    if was_graded:
+        leaderboard_service.update_users(db, [user_id])
+    
     return {
         'success': True,
         'message': 'Pick deleted successfully'
@@ -190,17 +173,22 @@ def delete_pick(
 
 
 @router.get("/active")
-def get_active_picks(
-    db: Session = Depends(get_db),
+async def get_active_picks(
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all active (ungraded) picks for the current user"""
     user_id = current_user['id']
     
-    picks = db.query(models.Pick).filter(
-        models.Pick.user_id == user_id,
-        models.Pick.result == None  # Only ungraded picks
-    ).all()
+    # Props and games are loaded with the picks (no lazy loading in async sessions)
+    picks = (await db.scalars(
+        select(models.Pick).options(
+            selectinload(models.Pick.player_prop).selectinload(models.PlayerProp.game)
+        ).where(
+            models.Pick.user_id == user_id,
+            models.Pick.result == None  # Only ungraded picks
+        )
+    )).all()
     
     result = []
     for pick in picks:
@@ -227,41 +215,37 @@ def get_active_picks(
 
 
 @router.get("/check/{game_id}")
-def check_user_picks_for_game(
+async def check_user_picks_for_game(
     game_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Check which picks the user has made for a specific game"""
     user_id = current_user['id']
     
     # Find the game
-    game = db.query(models.Game).filter(
-        models.Game.external_id == game_id
-    ).first()
+    game = (await db.scalars(
+        select(models.Game).where(models.Game.external_id == game_id)
+    )).first()
     
     if not game:
         return {'picks': {}}
     
-    # Get all props for this game
-    props = db.query(models.PlayerProp).filter(
-        models.PlayerProp.game_id == game.id
-    ).all()
-    
-    prop_ids = [p.id for p in props]
-    
-    # Get user's picks for these props
-    picks = db.query(models.Pick).filter(
-        models.Pick.user_id == user_id,
-        models.Pick.player_prop_id.in_(prop_ids)
-    ).all()
+    # Get user's picks for this game's props, with the prop they're on
+    rows = await db.execute(
+        select(models.PlayerProp.player_name, models.PlayerProp.prop_type, models.Pick.selection).join(
+            models.Pick, models.Pick.player_prop_id == models.PlayerProp.id
+        ).where(
+            models.PlayerProp.game_id == game.id,
+            models.Pick.user_id == user_id
+        )
+    )
     
     # Create lookup dict
     user_picks = {}
-    for pick in picks:
-        prop = pick.player_prop
-        key = f"{prop.player_name}-{prop.prop_type}"
-        user_picks[key] = pick.selection
+    for player_name, prop_type, selection in rows:
+        key = f"{player_name}-{prop_type}"
+        user_picks[key] = selection
     
     return {'picks': user_picks}
 
@@ -271,7 +255,7 @@ def get_pick_history(
     result: Optional[str] = None,
     prop_type: Optional[str] = None,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get graded pick history for the current user"""
@@ -318,7 +302,7 @@ def get_pick_history(
 
 @router.get("/stats")
 def get_user_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get user's overall statistics"""
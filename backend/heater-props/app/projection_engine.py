@@ -0,0 +1,192 @@
+# app/projection_engine.py
+# Vectorized prop projections for many players at once
+
+import numpy as np
+from itertools import chain
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+class ProjectionEngine:
+    # playergamelog column positions
+    STATS_INDICES = {
+        'points': 24,
+        'rebounds': 18,
+        'assists': 19
+    }
+    MATCHUP_INDEX = 4
+
+    # A prop is only offered when the projection clears this line
+    MIN_LINES = {
+        'points': 5,
+        'rebounds': 2,
+        'assists': 1
+    }
+
+    def __init__(
+        self,
+        windows: Sequence[int] = (10,),
+        ewma_halflife: float = 0,
+        home_away_weight: float = 0
+    ):
+        """
+        Projection engine over (players x games x stats) arrays
+
+        With the defaults this reproduces the original projection: the plain
+        mean of the last 10 games, rounded to the nearest half point.
+
+        Args:
+            windows: Recent-game windows to average; several windows are blended equally
+            ewma_halflife: Weight games by recency with this half-life in games (0 = equal weights)
+            home_away_weight: Share of the projection taken from games at the same
+                venue (home/away) as the upcoming game (0 = ignore venue)
+        """
+        if not windows or min(windows) < 1:
+            raise ValueError("windows must be positive game counts")
+
+        self.windows = sorted(set(windows))
+        self.ewma_halflife = ewma_halflife
+        self.home_away_weight = home_away_weight
+        self.stat_types = list(self.STATS_INDICES)
+
+        # Number of recent games needed per player
+        self.depth = self.windows[-1]
+
+        recency = np.arange(self.depth)
+        if ewma_halflife > 0:
+            self.recency_weights = 0.5 ** (recency / ewma_halflife)
+        else:
+            self.recency_weights = np.ones(self.depth)
+
+        # (windows x games): which games each window covers
+        self.window_masks = np.array([recency < window for window in self.windows], dtype=float)
+
+    def _to_float(self, value: Any) -> float:
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return np.nan
+
+    def stat_arrays(self, game_logs: List[List[List[Any]]], with_venue: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pack game logs (most recent game first) into arrays
+
+        Args:
+            game_logs: Each player's playergamelog rows
+            with_venue: Parse home/away from the matchup (skipped when splits are off)
+
+        Returns:
+            stats: float array (players x depth x stats), NaN where a game or value is missing
+            home: bool array (players x depth), True for home games
+        """
+        rows = [row for game_log in game_logs for row in game_log[:self.depth]]
+        counts = [min(len(game_log), self.depth) for game_log in game_logs]
+
+        # Pull every stat with one itemgetter call per row and convert in one array call;
+        # fall back to value-by-value parsing for short rows or non-numeric values
+        indices = [self.STATS_INDICES[stat_type] for stat_type in self.stat_types]
+        get_stats = itemgetter(*indices)
+        try:
+            flat = np.fromiter(chain.from_iterable(map(get_stats, rows)), dtype=float, count=len(rows) * len(indices))
+        except (IndexError, ValueError, TypeError):
+            flat = np.array([
+                [self._to_float(row[index]) if len(row) > index else np.nan for index in indices]
+                for row in rows
+            ], dtype=float)
+
+        # Scatter rows into the padded (players x depth) layout
+        counts = np.array(counts, dtype=int)
+        player_index = np.repeat(np.arange(len(game_logs)), counts)
+        game_index = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        stats = np.full((len(game_logs), self.depth, len(self.stat_types)), np.nan)
+        stats[player_index, game_index] = flat.reshape(-1, len(self.stat_types))
+
+        home = np.zeros((len(game_logs), self.depth), dtype=bool)
+        if with_venue:
+            home[player_index, game_index] = [
+                len(row) > self.MATCHUP_INDEX and isinstance(row[self.MATCHUP_INDEX], str) and ' vs. ' in row[self.MATCHUP_INDEX]
+                for row in rows
+            ]
+
+        return stats, home
+
+    def _weighted_mean(self, values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Weighted mean over the games axis, NaN where no game has weight"""
+        total = weights.sum(axis=-2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, (values * weights).sum(axis=-2) / total, np.nan)
+
+    def project_arrays(self, stats: np.ndarray, home: np.ndarray, is_home: np.ndarray) -> np.ndarray:
+        """
+        Projected lines (players x stats) in one pass, NaN where a player has no valid games
+
+        Args:
+            stats: Output of stat_arrays
+            home: Output of stat_arrays
+            is_home: bool array (players,), True if the player is at home in the upcoming game
+        """
+        # Invalid and negative values don't count, same as the per-player version
+        valid = np.isfinite(stats) & (stats >= 0)
+        values = np.where(valid, stats, 0.0)
+        weights = valid * self.recency_weights[None, :, None]
+
+        # (windows x players x games x stats) -> blend the window means
+        window_weights = weights[None] * self.window_masks[:, None, :, None]
+        window_means = self._weighted_mean(values[None], window_weights)
+        counted = np.isfinite(window_means)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            projection = np.where(counted, window_means, 0.0).sum(axis=0) / counted.sum(axis=0)
+
+        if self.home_away_weight > 0:
+            same_venue = home == np.asarray(is_home, dtype=bool)[:, None]
+            venue_mean = self._weighted_mean(values, weights * same_venue[:, :, None])
+            projection = np.where(
+                np.isfinite(venue_mean),
+                (1 - self.home_away_weight) * projection + self.home_away_weight * venue_mean,
+                projection
+            )
+
+        # Nearest half point
+        return np.round(projection * 2) / 2
+
+    def to_projections(self, player_names: List[str], lines: np.ndarray) -> List[Dict[str, Any]]:
+        """Prop dicts in the same shape and order as the per-player version"""
+        projections = []
+
+        for player_name, player_lines in zip(player_names, lines.tolist()):
+            for stat_type, line in zip(self.stat_types, player_lines):
+                if line == line and line > self.MIN_LINES[stat_type]:
+                    projections.append({
+                        'player_name': player_name,
+                        'prop_type': stat_type,
+                        'line': line,
+                        'over_odds': -110,
+                        'under_odds': -110,
+                        'bookmaker': 'projection'
+                    })
+
+        return projections
+
+    def project_players(
+        self,
+        player_names: List[str],
+        game_logs: List[List[List[Any]]],
+        is_home: Optional[List[bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Projections for a batch of players (a game or a whole slate)
+
+        Args:
+            player_names: Player names, in output order
+            game_logs: Each player's game log rows, most recent first
+            is_home: Whether each player is at home in the upcoming game (only used for venue splits)
+        """
+        if not player_names:
+            return []
+
+        if is_home is None:
+            is_home = [False] * len(player_names)
+
+        stats, home = self.stat_arrays(game_logs, with_venue=self.home_away_weight > 0)
+        lines = self.project_arrays(stats, home, np.array(is_home, dtype=bool))
+        return self.to_projections(player_names, lines)
@@ -3,42 +3,299 @@
 
 import json
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from app.projection_store import ProjectionStore
+
+class ProjectionSnapshot:
+    """One loaded version of the projections; reloads replace it as a whole"""
+    
+    def __init__(
+        self,
+        source: str,
+        file_key: Tuple,
+        version: str,
+        built_at: datetime,
+        index: Dict[str, Tuple[int, int]],
+        store: Optional[ProjectionStore] = None,
+        entries: Optional[Dict[str, Any]] = None
+    ):
+        self.source = source
+        self.file_key = file_key
+        self.version = version
+        self.built_at = built_at
+        self.loaded_at = datetime.utcnow()
+        
+        # game_id -> (checksum, projection count)
+        self.index = index
+        
+        # Indexed file mode reads games from the store, JSON mode keeps every entry
+        self.store = store
+        self.entries = entries
+        
+        # Recently read games (indexed file mode)
+        self.cache = OrderedDict()
 
 class ProjectionService:
-    def __init__(self, projections_file='projections_cache.json'):
+    def __init__(
+        self,
+        projections_db='projections.db',
+        projections_file='projections_cache.json',
+        max_cached_games=64,
+        retired_store_close_seconds=30
+    ):
+        """
+        Pre-generated projections, read per game and reloaded when the file changes
+        
+        Reads the indexed projections file when it exists, so startup and memory
+        don't grow with the season. Falls back to loading projections_cache.json
+        whole (run convert_projections.py to build the indexed file).
+        
+        A reload builds a complete new snapshot and swaps it in with one
+        assignment; every read uses a single snapshot, so requests never see
+        a mix of old and new data. The replaced snapshot's file connections
+        are closed retired_store_close_seconds later, once requests that
+        started on it are done.
+        """
+        self.projections_db = projections_db
         self.projections_file = projections_file
-        self.projections = {}
+        self.max_cached_games = max_cached_games
+        self.retired_store_close_seconds = retired_store_close_seconds
+        
+        self.snapshot = None
+        self.last_reload = None
+        self.last_error = None
+        
+        self.reload_lock = threading.Lock()
+        self.cache_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watch_thread = None
+        
         self.load_projections()
     
+    def _file_key(self) -> Optional[Tuple]:
+        """Identity of the current projections file (changes when it is replaced or rewritten)"""
+        for source, path in (('indexed', self.projections_db), ('json', self.projections_file)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return (source, path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return None
+    
+    def _load_snapshot(self, file_key: Tuple, previous: Optional[ProjectionSnapshot]) -> ProjectionSnapshot:
+        source, path, _, mtime_ns, _ = file_key
+        
+        if source == 'indexed':
+            store = ProjectionStore(path)
+            try:
+                if store.is_legacy():
+                    print(f"{path} has no checksums or build metadata; computing them while loading "
+                          f"(run convert_projections.py to rebuild it)")
+                meta = store.meta()
+                snapshot = ProjectionSnapshot(
+                    source,
+                    file_key,
+                    version=meta.get('version') or f"{mtime_ns:x}",
+                    built_at=datetime.fromisoformat(meta['built_at']) if 'built_at' in meta else datetime.utcfromtimestamp(mtime_ns / 1e9),
+                    index=store.index(),
+                    store=store
+                )
+            except Exception:
+                store.close()
+                raise
+            
+            # Keep decoded games that didn't change
+            if previous is not None and previous.source == 'indexed':
+                with self.cache_lock:
+                    for game_id, entry in previous.cache.items():
+                        if previous.index.get(game_id) == snapshot.index.get(game_id):
+                            snapshot.cache[game_id] = entry
+            return snapshot
+        
+        with open(path, 'r') as f:
+            loaded = json.load(f)
+        
+        entries = {}
+        index = {}
+        for game_id, entry in loaded.items():
+            checksum = zlib.crc32(json.dumps(entry, sort_keys=True).encode())
+            index[game_id] = (checksum, len(entry.get('projections', [])))
+            
+            # Reuse the previous object for unchanged games
+            if previous is not None and previous.entries is not None and previous.index.get(game_id) == index[game_id]:
+                entries[game_id] = previous.entries[game_id]
+            else:
+                entries[game_id] = entry
+        
+        return ProjectionSnapshot(
+            source,
+            file_key,
+            version=f"{mtime_ns:x}",
+            built_at=datetime.utcfromtimestamp(mtime_ns / 1e9),
+            index=index,
+            entries=entries
+        )
+    
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Swap in the projections file if it changed since the last load
+        
+        On failure (e.g. a half-copied file) the current snapshot stays in use
+        and the next check tries again.
+        
+        Returns a summary with the games added, changed and removed
+        """
+        with self.reload_lock:
+            previous = self.snapshot
+            file_key = self._file_key()
+            
+            if file_key is None:
+                return {'reloaded': False, 'reason': 'No projections file found'}
+            
+            if not force and previous is not None and previous.file_key == file_key:
+                return {'reloaded': False, 'version': previous.version}
+            
+            try:
+                snapshot = self._load_snapshot(file_key, previous)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error loading projections from {file_key[1]}: {e}")
+                return {'reloaded': False, 'error': str(e)}
+            
+            old_index = previous.index if previous is not None else {}
+            summary = {
+                'reloaded': True,
+                'source': snapshot.source,
+                'version': snapshot.version,
+                'games': len(snapshot.index),
+                'added': sum(1 for game_id in snapshot.index if game_id not in old_index),
+                'changed': sum(
+                    1 for game_id, value in snapshot.index.items()
+                    if game_id in old_index and old_index[game_id] != value
+                ),
+                'removed': sum(1 for game_id in old_index if game_id not in snapshot.index),
+                'reloaded_at': snapshot.loaded_at
+            }
+            
+            self.snapshot = snapshot
+            self.last_reload = summary
+            self.last_error = None
+            
+            if previous is not None and previous.store is not None:
+                self._close_later(previous.store)
+            return summary
+    
+    def _close_later(self, store: ProjectionStore):
+        """Close a replaced store once requests using the old snapshot are done (any later read is a miss)"""
+        timer = threading.Timer(self.retired_store_close_seconds, store.close)
+        timer.daemon = True
+        timer.start()
+    
     def load_projections(self):
-        """Load projections from cache file"""
-        if not os.path.exists(self.projections_file):
+        """Load projections from the indexed file, or the JSON cache file"""
+        summary = self.reload(force=True)
+        
+        if summary['reloaded']:
+            if summary['source'] == 'indexed':
+                print(f"Using indexed projections from {self.projections_db} ({summary['games']} games)")
+            else:
+                print(f"Loaded projections for {summary['games']} games (run convert_projections.py to load per game)")
+        elif 'reason' in summary:
             print(f"Warning: Projections file not found: {self.projections_file}")
+    
+    def start_watching(self, interval_seconds: int):
+        """Check for a new projections file every interval_seconds (0 disables)"""
+        if interval_seconds <= 0 or self.watch_thread is not None:
             return
         
-        try:
-            with open(self.projections_file, 'r') as f:
-                self.projections = json.load(f)
-            print(f"Loaded projections for {len(self.projections)} games")
-        except Exception as e:
-            print(f"Error loading projections: {e}")
-            self.projections = {}
+        def loop():
+            while not self.stop_event.wait(interval_seconds):
+                summary = self.reload()
+                if summary['reloaded']:
+                    print(f"Reloaded projections {summary['version']}: "
+                          f"{summary['added']} added, {summary['changed']} changed, {summary['removed']} removed")
+        
+        self.watch_thread = threading.Thread(target=loop, name="projection-reload", daemon=True)
+        self.watch_thread.start()
+    
+    def stop_watching(self):
+        self.stop_event.set()
+    
+    def _get_entry(self, snapshot: Optional[ProjectionSnapshot], game_id: str) -> Optional[Dict[str, Any]]:
+        if snapshot is None or game_id not in snapshot.index:
+            return None
+        
+        if snapshot.entries is not None:
+            return snapshot.entries.get(game_id)
+        
+        with self.cache_lock:
+            entry = snapshot.cache.get(game_id)
+            if entry is not None:
+                snapshot.cache.move_to_end(game_id)
+                return entry
+        
+        entry = snapshot.store.get(game_id)
+        if entry is None:
+            # The store was closed under a request still holding the old snapshot
+            return None
+        
+        with self.cache_lock:
+            snapshot.cache[game_id] = entry
+            while len(snapshot.cache) > self.max_cached_games:
+                snapshot.cache.popitem(last=False)
+        return entry
     
     def get_projections_for_game(self, game_id: str) -> List[Dict[str, Any]]:
         """Get projections for a specific game"""
-        if game_id not in self.projections:
+        entry = self._get_entry(self.snapshot, game_id)
+        if entry is None:
             return []
         
-        return self.projections[game_id].get('projections', [])
+        return entry.get('projections', [])
     
     def get_all_projections(self) -> Dict[str, Any]:
-        """Get all projections"""
-        return self.projections
+        """Get all projections (loads every game; prefer the per-game methods)"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {}
+        if snapshot.entries is not None:
+            return snapshot.entries
+        return dict(snapshot.store.iter_games())
+    
+    def game_count(self) -> int:
+        """Number of games with a projections entry"""
+        snapshot = self.snapshot
+        return len(snapshot.index) if snapshot is not None else 0
     
     def has_projections_for_game(self, game_id: str) -> bool:
         """Check if projections exist for a game"""
-        return game_id in self.projections and len(self.projections[game_id].get('projections', [])) > 0
+        snapshot = self.snapshot
+        return snapshot is not None and snapshot.index.get(game_id, (0, 0))[1] > 0
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Loaded version, its age and the last reload"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {'loaded': False, 'last_error': self.last_error}
+        
+        return {
+            'loaded': True,
+            'source': snapshot.source,
+            'path': snapshot.file_key[1],
+            'version': snapshot.version,
+            'built_at': snapshot.built_at,
+            'loaded_at': snapshot.loaded_at,
+            'age_seconds': round((datetime.utcnow() - snapshot.built_at).total_seconds()),
+            'games': len(snapshot.index),
+            'cached_games': len(snapshot.cache),
+            'last_reload': self.last_reload,
+            'last_error': self.last_error,
+            'watching': self.watch_thread is not None and not self.stop_event.is_set()
+        }
 
 # Global instance
-projection_service = ProjectionService()
\ No newline at end of file
+projection_service = ProjectionService()
@@ -0,0 +1,242 @@
+# app/projection_store.py
+# Indexed per-game projections file (SQLite, compressed JSON per game)
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, Tuple
+from app.atomic_file import replacing
+
+class ProjectionStore:
+    def __init__(self, path: str = 'projections.db'):
+        """
+        Read-only access to a projections file built by write()
+
+        Each game is one row keyed by game id, holding its game info and a
+        zlib-compressed projections list, so a lookup reads only that game.
+
+        Files written before checksums and build metadata were added are
+        still read; their checksums are computed from the rows instead.
+
+        Args:
+            path: SQLite file built by write() (see convert_projections.py)
+        """
+        self.path = path
+        self.local = threading.local()
+
+        # Every thread's connection, so close() can release the file, and the
+        # reads in progress it waits for
+        self.connections = []
+        self.readers = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One read-only connection per thread"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _reading(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """This thread's connection for one read, or None once the store is closed"""
+        with self.lock:
+            closed = self.closed
+            if not closed:
+                self.readers += 1
+
+        if closed:
+            yield None
+            return
+
+        try:
+            yield self._connection()
+        finally:
+            with self.lock:
+                self.readers -= 1
+                release = self.closed and self.readers == 0
+            if release:
+                self._close_connections()
+
+    def _close_connections(self):
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            connection.close()
+
+    def close(self):
+        """
+        Release the file once reads in progress finish
+
+        Reads after close() find nothing (a miss), instead of failing on a
+        closed connection.
+        """
+        with self.lock:
+            self.closed = True
+            release = self.readers == 0
+        if release:
+            self._close_connections()
+
+    def is_legacy(self) -> bool:
+        """Written before checksums and build metadata were added"""
+        with self._reading() as connection:
+            if connection is None:
+                return False
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(game_projections)")}
+        return 'checksum' not in columns
+
+    @staticmethod
+    def _checksum(game_info: str, error: Optional[str], blob: bytes) -> int:
+        """Changes when anything about the game changes, so reloads can skip unchanged games"""
+        return zlib.crc32(blob, zlib.crc32(f"{game_info}|{error}".encode()))
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """Cache entry for a game ({'game_info', 'projections'[, 'error']}), or None"""
+        with self._reading() as connection:
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT game_info, error, projections FROM game_projections WHERE game_id = ?",
+                (game_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return self._to_entry(*row)
+
+    def index(self) -> Dict[str, Tuple[int, int]]:
+        """game_id -> (checksum, projection count) for every game, without reading projections"""
+        legacy = self.is_legacy()
+        with self._reading() as connection:
+            if connection is None:
+                return {}
+
+            if legacy:
+                # Old files have no checksum column: read each game once to compute it
+                return {
+                    game_id: (self._checksum(game_info, error, blob), count)
+                    for game_id, game_info, error, count, blob in connection.execute(
+                        "SELECT game_id, game_info, error, projection_count, projections FROM game_projections"
+                    )
+                }
+
+            return {
+                game_id: (checksum, count)
+                for game_id, checksum, count in connection.execute(
+                    "SELECT game_id, checksum, projection_count FROM game_projections"
+                )
+            }
+
+    def meta(self) -> Dict[str, str]:
+        """Build metadata ('version', 'built_at'); empty for old files without it"""
+        with self._reading() as connection:
+            if connection is None:
+                return {}
+            has_meta = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'"
+            ).fetchone()
+            if not has_meta:
+                return {}
+            return dict(connection.execute("SELECT key, value FROM meta"))
+
+    def projection_count(self, game_id: str) -> int:
+        """Number of projections for a game, without decompressing them"""
+        with self._reading() as connection:
+            if connection is None:
+                return 0
+            row = connection.execute(
+                "SELECT projection_count FROM game_projections WHERE game_id = ?",
+                (game_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def game_count(self) -> int:
+        with self._reading() as connection:
+            if connection is None:
+                return 0
+            return connection.execute("SELECT COUNT(*) FROM game_projections").fetchone()[0]
+
+    def iter_games(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """All (game_id, entry) pairs, one game in memory at a time"""
+        with self._reading() as connection:
+            if connection is None:
+                return
+            cursor = connection.execute(
+                "SELECT game_id, game_info, error, projections FROM game_projections ORDER BY position"
+            )
+            for game_id, game_info, error, projections in cursor:
+                yield game_id, self._to_entry(game_info, error, projections)
+
+    def _to_entry(self, game_info: str, error: Optional[str], projections: bytes) -> Dict[str, Any]:
+        entry = {
+            'game_info': json.loads(game_info),
+            'projections': json.loads(zlib.decompress(projections))
+        }
+        if error is not None:
+            entry['error'] = error
+        return entry
+
+    @staticmethod
+    def write(path: str, games: Iterator[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Build a projections file from (game_id, entry) pairs
+
+        The file is built under a temporary name and renamed into place, so
+        readers see either the old file or the complete new one.
+
+        Returns the number of games written
+        """
+        # SQLite syncs the file on commit; the rename is synced by replacing()
+        with replacing(path) as tmp_path:
+            connection = sqlite3.connect(tmp_path)
+            connection.execute("""
+                CREATE TABLE game_projections (
+                    game_id TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    game_info TEXT NOT NULL,
+                    error TEXT,
+                    projection_count INTEGER NOT NULL,
+                    checksum INTEGER NOT NULL,
+                    projections BLOB NOT NULL
+                )
+            """)
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+            count = 0
+            digest = hashlib.sha256()
+            for position, (game_id, entry) in enumerate(games):
+                projections = entry.get('projections', [])
+                game_info = json.dumps(entry.get('game_info', {}), separators=(',', ':'))
+                blob = zlib.compress(json.dumps(projections, separators=(',', ':')).encode(), 9)
+
+                checksum = ProjectionStore._checksum(game_info, entry.get('error'), blob)
+                digest.update(f"{game_id}:{checksum};".encode())
+
+                connection.execute(
+                    "INSERT OR REPLACE INTO game_projections VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (str(game_id), position, game_info, entry.get('error'), len(projections), checksum, blob)
+                )
+                count += 1
+
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('version', digest.hexdigest()[:12]),
+                ('built_at', datetime.utcnow().isoformat())
+            ])
+            connection.commit()
+            connection.execute("VACUUM")
+            connection.close()
+
+        return count
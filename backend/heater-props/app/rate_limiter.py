@@ -0,0 +1,74 @@
+# app/rate_limiter.py
+# Shared rate limiting and retry helpers for outbound NBA Stats API calls
+
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+import requests
+
+T = TypeVar('T')
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Thread-safe token bucket
+
+        Args:
+            rate: Tokens added per second (the requests/sec ceiling)
+            capacity: Maximum burst size (defaults to one second worth of tokens)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested number of tokens is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Retry network errors, timeouts, 429s and 5xx responses - not other 4xx"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, requests.RequestException)
+
+
+def retry_with_backoff(
+    func: Callable[[], T],
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 10.0
+) -> T:
+    """
+    Call func, retrying retryable failures with full-jitter exponential backoff
+
+    Raises the last error once retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            print(f"  Request failed ({e}), retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
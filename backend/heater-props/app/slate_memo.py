@@ -0,0 +1,127 @@
+# app/slate_memo.py
+# Memoized roster/game log lookups shared by every game in a projection run
+
+import json
+import os
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any
+from app.atomic_file import write_atomically
+
+class SlateMemo:
+    def __init__(self, path: str = 'slate_memo.json', ttl_hours: float = 12):
+        """
+        Remember roster and game log lookups for the length of a slate
+
+        A team that plays several times in the window is looked up once, and
+        concurrent games asking for the same key wait for the first request
+        instead of sending their own. Entries are saved to disk so a rerun
+        within the TTL starts warm.
+
+        Args:
+            path: JSON file holding the memo between runs
+            ttl_hours: How long an entry is reused
+        """
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.in_flight = {}
+        self.stats = {}
+
+        self._load()
+
+    def _load(self):
+        """Load unexpired entries from the last run"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                file_data = json.load(f)
+        except Exception as e:
+            print(f"Error loading slate memo: {e}")
+            return
+
+        now = datetime.now()
+        for key, value in file_data.items():
+            timestamp = datetime.fromisoformat(value['timestamp'])
+            if now - timestamp < self.ttl:
+                self.entries[key] = {'data': value['data'], 'timestamp': timestamp}
+
+        print(f"Loaded {len(self.entries)} memoized lookups from {self.path}")
+
+    def save(self):
+        """Write unexpired entries to disk (temp file + rename)"""
+        now = datetime.now()
+        with self.lock:
+            file_data = {
+                key: {'data': value['data'], 'timestamp': value['timestamp'].isoformat()}
+                for key, value in self.entries.items()
+                if now - value['timestamp'] < self.ttl
+            }
+
+        write_atomically(self.path, json.dumps(file_data))
+
+    def _count(self, namespace: str, field: str):
+        counts = self.stats.setdefault(namespace, {'lookups': 0, 'fetched': 0, 'saved': 0})
+        counts[field] += 1
+
+    def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the memoized value or call fetch() once for it
+
+        Exceptions from fetch() are passed to every waiting caller and nothing is memoized.
+        """
+        memo_key = f"{namespace}:{key}"
+
+        with self.lock:
+            self._count(namespace, 'lookups')
+
+            entry = self.entries.get(memo_key)
+            if entry and datetime.now() - entry['timestamp'] < self.ttl:
+                self._count(namespace, 'saved')
+                return entry['data']
+
+            future = self.in_flight.get(memo_key)
+            if future is not None:
+                self._count(namespace, 'saved')
+                owner = False
+            else:
+                future = Future()
+                self.in_flight[memo_key] = future
+                self._count(namespace, 'fetched')
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = fetch()
+        except Exception as e:
+            with self.lock:
+                del self.in_flight[memo_key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.entries[memo_key] = {'data': data, 'timestamp': datetime.now()}
+            del self.in_flight[memo_key]
+        future.set_result(data)
+        return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lookups, actual fetches and fetches saved, per namespace and in total"""
+        with self.lock:
+            namespaces = {namespace: dict(counts) for namespace, counts in self.stats.items()}
+
+        lookups = sum(counts['lookups'] for counts in namespaces.values())
+        saved = sum(counts['saved'] for counts in namespaces.values())
+        return {
+            'namespaces': namespaces,
+            'lookups': lookups,
+            'fetched': lookups - saved,
+            'saved': saved,
+            'saved_pct': round(saved / lookups * 100, 1) if lookups else 0.0
+        }
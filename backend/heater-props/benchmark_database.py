@@ -0,0 +1,188 @@
+# benchmark_database.py
+# Concurrent /api/games reads while grading-style writes run, with the old
+# single-engine setup and with WAL + the read-only connection pool
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_engines
+from app import models, crud
+
+def seed(path, games, props_per_game, picks):
+    """Upcoming games with props, and ungraded picks on them"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(models.Game, [
+        {
+            'id': game_id,
+            'external_id': f"game-{game_id}",
+            'home_team': f"Home {game_id}",
+            'away_team': f"Away {game_id}",
+            'commence_time': now + timedelta(hours=1 + game_id % (24 * 13))
+        }
+        for game_id in range(1, games + 1)
+    ])
+    db.bulk_insert_mappings(models.PlayerProp, [
+        {
+            'game_id': 1 + prop_id % games,
+            'player_name': f"Player {prop_id // 3}",
+            'prop_type': ['points', 'rebounds', 'assists'][prop_id % 3],
+            'line': rng.randint(5, 60) / 2,
+            'over_odds': -110,
+            'under_odds': -110,
+            'bookmaker': 'fanduel'
+        }
+        for prop_id in range(games * props_per_game)
+    ])
+    # Distinct (user, prop) pairs: a user has one pick per prop
+    pairs = rng.sample(range(500 * games * props_per_game), min(picks, 500 * games * props_per_game))
+    db.bulk_insert_mappings(models.Pick, [
+        {
+            'player_prop_id': 1 + pair // 500,
+            'user_id': 1 + pair % 500,
+            'selection': rng.choice(['over', 'under']),
+            'line': 20.5
+        }
+        for pair in pairs
+    ])
+    db.commit()
+    db.close()
+    engine.dispose()
+
+    # Start from the old rollback journal; the new setup switches the file to WAL
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=DELETE")
+    connection.close()
+
+def make_session(path, legacy):
+    """Session factories for the old setup (one plain engine) or the new one (writer, readers)"""
+    if legacy:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        return Session, Session
+    engine, read_engine = create_engines(f"sqlite:///{path}")
+    return (
+        sessionmaker(autocommit=False, autoflush=False, bind=engine),
+        sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    )
+
+def grade_loop(path, legacy, stop, batch, commits):
+    """
+    Grade a batch of picks per transaction (one UPDATE per pick, like the grading service)
+
+    Runs in its own process, like a grading job in another worker, so the
+    readers' GIL doesn't slow it down
+    """
+    WriteSession, _ = make_session(path, legacy)
+    rng = random.Random(7)
+    while not stop.is_set():
+        db = WriteSession()
+        try:
+            picks = db.query(models.Pick).order_by(models.Pick.id).offset(rng.randint(0, 1000)).limit(batch).all()
+            for pick in picks:
+                pick.result = None if pick.result else rng.choice(['won', 'lost', 'push'])
+                pick.actual_value = rng.randint(0, 40)
+                pick.graded_at = datetime.utcnow()
+            db.commit()
+            commits.value += 1
+        except Exception as e:
+            db.rollback()
+            print(f"  Write failed: {e}")
+        finally:
+            db.close()
+
+def read_loop(Session, stop, latencies, errors):
+    """What GET /api/games does: load upcoming games with their props"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        db = Session()
+        try:
+            games = crud.get_upcoming_games(db)
+            sum(len(game.player_props) for game in games)
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            db.close()
+
+def run(label, path, legacy, with_grading, readers, seconds, batch):
+    _, ReadSession = make_session(path, legacy)
+    stop = threading.Event()
+    latencies = []
+    errors = []
+
+    writer_stop = multiprocessing.Event()
+    commits = multiprocessing.Value('i', 0)
+    writer = multiprocessing.Process(target=grade_loop, args=(path, legacy, writer_stop, batch, commits))
+    if with_grading:
+        writer.start()
+        time.sleep(0.5)
+
+    threads = [threading.Thread(target=read_loop, args=(ReadSession, stop, latencies, errors)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    if with_grading:
+        writer_stop.set()
+        writer.join()
+
+    if not latencies:
+        print(f"{label:<28} no reads completed ({len(errors)} errors)")
+        return
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{label:<28} {len(latencies) / seconds:8.1f} reads/s  "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  "
+          f"p99 {p99 * 1000:7.1f} ms  max {latencies[-1] * 1000:7.1f} ms  "
+          f"read errors {len(errors)}  grading commits {commits.value}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent game reads during grading writes (SQLite)")
+    parser.add_argument('--games', type=int, default=15)
+    parser.add_argument('--props-per-game', type=int, default=40)
+    parser.add_argument('--picks', type=int, default=40000)
+    parser.add_argument('--readers', type=int, default=4, help="Concurrent request threads")
+    parser.add_argument('--seconds', type=float, default=5, help="Duration of each run")
+    parser.add_argument('--batch', type=int, default=5000, help="Picks graded per write transaction")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        seeded = os.path.join(directory, 'seed.db')
+        seed(seeded, args.games, args.props_per_game, args.picks)
+        print(f"Seeded {args.games} games, {args.games * args.props_per_game} props, {args.picks} picks\n")
+
+        # Old setup: one engine, default rollback journal, reads and writes share the pool
+        legacy_path = os.path.join(directory, 'legacy.db')
+        shutil.copy(seeded, legacy_path)
+
+        # New setup: WAL + pragmas, GET routes on the query_only reader pool
+        split_path = os.path.join(directory, 'split.db')
+        shutil.copy(seeded, split_path)
+
+        run("Old setup, reads only", legacy_path, True, False, args.readers, args.seconds, args.batch)
+        run("Old setup, while grading", legacy_path, True, True, args.readers, args.seconds, args.batch)
+        run("WAL + readers, reads only", split_path, False, False, args.readers, args.seconds, args.batch)
+        run("WAL + readers, while grading", split_path, False, True, args.readers, args.seconds, args.batch)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
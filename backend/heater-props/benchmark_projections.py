@@ -0,0 +1,75 @@
+# benchmark_projections.py
+# Compare the per-player projection loop with the vectorized projection engine (no API calls)
+
+import argparse
+import random
+import time
+import numpy as np
+from app.odds_service import NBAStatsService
+from app.projection_engine import ProjectionEngine
+
+def make_game_log(rng, games):
+    """Synthetic playergamelog rows, most recent first"""
+    team = rng.choice(['LAL', 'BOS', 'DEN', 'MIA', 'GSW'])
+    rows = []
+    for game in range(games):
+        row = [0] * 27
+        row[2] = f"00224{game:05d}"
+        row[4] = f"{team} vs. OPP" if rng.random() < 0.5 else f"{team} @ OPP"
+        row[18] = rng.randint(0, 15)   # REB
+        row[19] = rng.randint(0, 12)   # AST
+        row[24] = rng.randint(0, 40)   # PTS
+        rows.append(row)
+    return rows
+
+def time_it(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark projection generation")
+    parser.add_argument('--players', type=int, default=1200, help="Players in the slate (about 12 per game)")
+    parser.add_argument('--games', type=int, default=10, help="Games per player log")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = [f"Player {i}" for i in range(args.players)]
+    logs = [make_game_log(rng, args.games) for _ in names]
+
+    service = NBAStatsService(use_static_file=True)
+    engine = ProjectionEngine()
+
+    def per_player():
+        projections = []
+        for name, log in zip(names, logs):
+            projections.extend(service._build_projections(name, log))
+        return projections
+
+    def vectorized():
+        return engine.project_players(names, logs)
+
+    loop_seconds, loop_result = time_it(per_player, args.repeat)
+    engine_seconds, engine_result = time_it(vectorized, args.repeat)
+
+    stats, home = engine.stat_arrays(logs)
+    is_home = [i % 2 == 0 for i in range(args.players)]
+    math_seconds, _ = time_it(lambda: engine.project_arrays(stats, home, np.array(is_home)), args.repeat)
+
+    print("Projection Benchmark")
+    print("=" * 80)
+    print(f"{args.players} players x {args.games} games, best of {args.repeat}")
+    print(f"Per-player loop:        {loop_seconds * 1000:8.2f} ms")
+    print(f"Engine (pack + math):   {engine_seconds * 1000:8.2f} ms  ({loop_seconds / engine_seconds:.1f}x)")
+    print(f"Engine (math only):     {math_seconds * 1000:8.2f} ms  ({loop_seconds / math_seconds:.1f}x)")
+    print(f"Identical output: {loop_result == engine_result}")
+
+    # Same slate with the optional weighting enabled
+    tuned = ProjectionEngine(windows=(5, 10), ewma_halflife=4, home_away_weight=0.25)
+    tuned_seconds, tuned_result = time_it(lambda: tuned.project_players(names, logs, is_home), args.repeat)
+    print(f"Windows 5+10, EWMA, home/away: {tuned_seconds * 1000:8.2f} ms ({len(tuned_result)} props)")
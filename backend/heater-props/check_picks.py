@@ -1,14 +1,13 @@
 # check_picks.py
-import sqlite3
+from app.database import SessionLocal
+from app import models
    
-conn = sqlite3.connect('heater-props-new.db')
-cursor = conn.cursor()
+db = SessionLocal()
    
-cursor.execute('SELECT * FROM picks')
-picks = cursor.fetchall()
+picks = db.query(models.Pick).order_by(models.Pick.id).all()
    
 print(f"Total picks in database: {len(picks)}")
 for pick in picks:
-    print(pick)
+    print(pick.id, pick.user_id, pick.player_prop_id, pick.selection, pick.line, pick.result, pick.created_at)
    
-conn.close()
\ No newline at end of file
+db.close()
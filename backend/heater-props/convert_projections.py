@@ -0,0 +1,25 @@
+# convert_projections.py
+# Convert projections_cache.json into the indexed projections.db read by the API
+
+import argparse
+import json
+import os
+import time
+from app.projection_store import ProjectionStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the per-game projections file from the JSON cache")
+    parser.add_argument('--input', default='projections_cache.json')
+    parser.add_argument('--output', default='projections.db')
+    args = parser.parse_args()
+
+    print(f"Converting {args.input} -> {args.output}")
+    start = time.perf_counter()
+
+    with open(args.input, 'r') as f:
+        projections = json.load(f)
+
+    games = ProjectionStore.write(args.output, projections.items())
+
+    print(f"✓ Wrote {games} games in {time.perf_counter() - start:.2f}s")
+    print(f"✓ {os.path.getsize(args.input) / 1024:.0f} KB JSON -> {os.path.getsize(args.output) / 1024:.0f} KB")
@@ -0,0 +1,2 @@
+-- Separate database for the test suite, which drops its tables
+CREATE DATABASE heater_test OWNER heater;
@@ -1,19 +1,14 @@
-import sqlite3
+# fix_database.py
+# Create missing tables, columns and indexes in the database at DATABASE_URL (SQLite or PostgreSQL)
+from sqlalchemy import inspect
+from app.database import engine, sync_schema
+from app import models  # noqa: F401 (registers the tables)
 
-conn = sqlite3.connect('heater-props.db')
-
-with open('app/schema.sql', 'r') as f:
-    conn.executescript(f.read())
-
-conn.commit()
+sync_schema()
 
 # Verify
-cursor = conn.cursor()
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('picks', 'pick_history', 'user_stats');")
-tables = cursor.fetchall()
-
-print("✓ Tables created in heater-props.db:")
-for table in tables:
-    print(f"  - {table[0]}")
+tables = inspect(engine).get_table_names()
 
-conn.close()
\ No newline at end of file
+print(f"✓ Tables in {engine.url.render_as_string(hide_password=True)}:")
+for table in sorted(tables):
+    print(f"  - {table}")
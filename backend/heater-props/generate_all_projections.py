@@ -1,12 +1,83 @@
 # generate_all_projections.py
 # run just once
 
+import argparse
 import json
+import os
 import sys
-from time import sleep
+import time
+from app.atomic_file import write_atomically
+from app.config import get_settings
 from app.odds_service import stats_service
+from app.projection_store import ProjectionStore
+from app.slate_memo import SlateMemo
 
-def generate_all_projections():
+CACHE_FILE = 'projections_cache.json'
+PROJECTIONS_DB = 'projections.db'
+CHECKPOINT_FILE = 'projections_checkpoint.jsonl'
+MEMO_FILE = 'slate_memo.json'
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """
+    Games finished by a previous (interrupted) run
+    
+    The checkpoint has one JSON line per finished game; a torn last line from
+    a crash is ignored. Games that failed are left out so they are retried.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            
+            game_id = entry['game_info']['game_id']
+            if 'error' in entry:
+                done.pop(game_id, None)
+            else:
+                done[game_id] = entry
+    
+    return done
+
+def compact_checkpoint(games, path=CHECKPOINT_FILE, cache_file=CACHE_FILE):
+    """
+    Write the checkpoint out as the final cache (schedule order) and indexed file, atomically
+    
+    The checkpoint is then dropped, unless games failed: it is rewritten
+    with only the finished games, so the next run retries just the failures.
+    """
+    entries = {}
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[entry['game_info']['game_id']] = entry
+    
+    all_projections = {game['game_id']: entries[game['game_id']] for game in games if game['game_id'] in entries}
+    
+    write_atomically(cache_file, json.dumps(all_projections, indent=2))
+    
+    # Indexed copy the API reads per game
+    ProjectionStore.write(PROJECTIONS_DB, all_projections.items())
+    
+    if any('error' in entry for entry in entries.values()):
+        write_atomically(path, ''.join(json.dumps(entry) + '\n' for entry in entries.values() if 'error' not in entry))
+    else:
+        os.remove(path)
+    return all_projections
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+def generate_all_projections(fresh=False):
     """Generate projections for all games in the schedule"""
     
     # Load the schedule
@@ -15,76 +86,112 @@ def generate_all_projections():
         games = json.load(f)
     
     print(f"Found {len(games)} games")
+    
+    if fresh and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+    
+    done = load_checkpoint()
+    pending = [game for game in games if game['game_id'] not in done]
+    if done:
+        print(f"Resuming: {len(done)} games already in {CHECKPOINT_FILE}, {len(pending)} to go")
     print("=" * 80)
     
-    all_projections = {}
+    # Teams playing several times share one roster lookup, and their players one game log lookup
+    memo = SlateMemo(MEMO_FILE, ttl_hours=get_settings().slate_memo_hours)
+    stats_service.memo = memo
     
-    for i, game in enumerate(games, 1):
-        game_id = game['game_id']
-        away_team = game['away_team_name']
-        home_team = game['home_team_name']
-        game_date = game['game_date'][:10]  # Just the date
-        
-        print(f"\n[{i}/{len(games)}] Processing: {away_team} @ {home_team} ({game_date})")
-        print("-" * 80)
+    completed = 0
+    errors = 0
+    started = time.monotonic()
+    
+    with open(CHECKPOINT_FILE, 'a+') as checkpoint:
+        # Start on a fresh line if a crash left a torn record at the end
+        if checkpoint.tell() > 0:
+            checkpoint.seek(checkpoint.tell() - 1)
+            if checkpoint.read(1) != '\n':
+                checkpoint.write('\n')
         
-        try:
-            # Generate projections for this game
-            projections = stats_service.generate_projections_for_game(game)
+        def save_game(game, projections, error):
+            """Append a finished game to the checkpoint (in case script crashes)"""
+            nonlocal completed, errors
+            completed += 1
+            game_id = game['game_id']
             
-            # Store by game_id
-            all_projections[game_id] = {
+            entry = {
                 'game_info': {
                     'game_id': game_id,
-                    'away_team': away_team,
-                    'home_team': home_team,
+                    'away_team': game['away_team_name'],
+                    'home_team': game['home_team_name'],
                     'game_date': game['game_date']
                 },
                 'projections': projections
             }
+            if error:
+                entry['error'] = error
+                errors += 1
             
-            print(f"✓ Generated {len(projections)} projections")
-            
-            # Save after each game (in case script crashes)
-            with open('projections_cache.json', 'w') as f:
-                json.dump(all_projections, f, indent=2)
+            checkpoint.write(json.dumps(entry) + '\n')
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
             
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            all_projections[game_id] = {
-                'game_info': {
-                    'game_id': game_id,
-                    'away_team': away_team,
-                    'home_team': home_team,
-                    'game_date': game['game_date']
-                },
-                'projections': [],
-                'error': str(e)
-            }
+            elapsed = time.monotonic() - started
+            eta = elapsed / completed * (len(pending) - completed)
+            print(f"\n[{len(done) + completed}/{len(games)}] {game['away_team_name']} @ {game['home_team_name']} ({game['game_date'][:10]})")
+            if error:
+                print(f"✗ Error: {error}")
+            else:
+                print(f"✓ Generated {len(projections)} projections")
+            print(f"  Elapsed {format_duration(elapsed)}, ETA {format_duration(eta)}")
+        
+        # Games and player fetches run concurrently under the shared rate limiter
+        try:
+            stats_service.generate_projections_for_games(pending, on_game_complete=save_game)
+        finally:
+            memo.save()
+            stats_service.memo = None
+    
+    all_projections = compact_checkpoint(games)
     
     print("\n" + "=" * 80)
-    print(f"✓ Complete! Generated projections for {len(all_projections)} games")
-    print(f"✓ Saved to: projections_cache.json")
+    print(f"✓ Complete! Generated projections for {len(all_projections)} games in {format_duration(time.monotonic() - started)}")
+    print(f"✓ Saved to: {CACHE_FILE} and {PROJECTIONS_DB}")
+    if errors:
+        print(f"✗ {errors} games failed - run again to retry them ({CHECKPOINT_FILE} keeps the finished ones)")
     
     # Summary stats
     total_projections = sum(len(p['projections']) for p in all_projections.values())
     print(f"✓ Total player projections: {total_projections}")
     
+    memo_stats = memo.get_stats()
+    print(f"✓ Lookups: {memo_stats['lookups']}, fetched: {memo_stats['fetched']}, saved: {memo_stats['saved']} ({memo_stats['saved_pct']}%)")
+    for namespace, counts in memo_stats['namespaces'].items():
+        print(f"    {namespace}: {counts['lookups']} lookups, {counts['saved']} saved")
+    
     return all_projections
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate projections for every game in schedule.json")
+    parser.add_argument('--games-in-flight', type=int, default=stats_service.max_games_in_flight,
+                        help="Games processed in parallel")
+    parser.add_argument('--fresh', action='store_true', help="Ignore an existing checkpoint and start over")
+    parser.add_argument('--yes', action='store_true', help="Don't ask for confirmation")
+    args = parser.parse_args()
+    
+    stats_service.max_games_in_flight = args.games_in_flight
+    
     print("NBA Player Projections Generator")
     print("=" * 80)
-    print("This will take 20-40 minutes due to NBA API rate limits.")
-    print("The script saves progress after each game, so you can stop and resume.")
+    print(f"Requests are capped at {stats_service.http.rate_limiter.rate:g}/sec across {stats_service.max_workers} workers, {args.games_in_flight} games at a time.")
+    print(f"Finished games are appended to {CHECKPOINT_FILE}, so you can stop and resume.")
     print("=" * 80)
     
-    response = input("\nContinue? (yes/no): ")
-    if response.lower() != 'yes':
-        print("Cancelled.")
-        sys.exit(0)
+    if not args.yes:
+        response = input("\nContinue? (yes/no): ")
+        if response.lower() != 'yes':
+            print("Cancelled.")
+            sys.exit(0)
     
     print("\nStarting projection generation...\n")
-    generate_all_projections()
+    generate_all_projections(fresh=args.fresh)
     
-    print("\n✓ Done! You can now use projections_cache.json in your app.")
\ No newline at end of file
+    print(f"\n✓ Done! You can now use {CACHE_FILE} in your app.")
@@ -0,0 +1,43 @@
+# ingest_game_logs.py
+# Load every player's game logs with a few league-wide requests before generating projections
+
+import argparse
+from datetime import date, datetime, timedelta
+from app.odds_service import stats_service
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load player game logs into the local game log store")
+    parser.add_argument('--from', dest='date_from', type=parse_date,
+                        default=date.today() - timedelta(days=35),
+                        help="First game date (YYYY-MM-DD), default 35 days ago")
+    parser.add_argument('--to', dest='date_to', type=parse_date, default=date.today(),
+                        help="Last game date (YYYY-MM-DD), default today")
+    parser.add_argument('--season', default="2024-25")
+    parser.add_argument('--days-per-request', type=int, default=7)
+    args = parser.parse_args()
+
+    print("NBA League Game Log Ingestion")
+    print("=" * 80)
+    print(f"Season {args.season}: {args.date_from} to {args.date_to}")
+    print("=" * 80)
+
+    summary = stats_service.ingest_league_game_logs(
+        args.date_from,
+        args.date_to,
+        season=args.season,
+        days_per_request=args.days_per_request
+    )
+
+    print(f"\nRequests: {summary['requests']}")
+    print(f"Players: {summary['players']}")
+    print(f"New rows stored: {summary['rows_stored']}")
+
+    if summary['errors']:
+        print("\nSome date ranges failed, nothing was marked as synced:")
+        for error in summary['errors']:
+            print(f"  {error}")
+    else:
+        print("\n✓ Done! generate_all_projections.py will now read these players from the local store.")
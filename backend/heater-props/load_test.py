@@ -0,0 +1,183 @@
+# load_test.py
+# Requests/sec and latency at high concurrency: the async read routes against
+# the previous sync handlers, each served by uvicorn on a seeded SQLite copy
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import shutil
+import httpx
+from benchmark_database import seed
+
+PATHS = [
+    '/api/games',
+    '/api/picks/active',
+    '/api/picks/check/game-1',
+    '/api/grading/leaderboard?limit=50'
+]
+
+def create_sync_app():
+    """The four routes as sync handlers on the threadpool, as they were before the async port"""
+    from fastapi import FastAPI, Depends
+    from sqlalchemy.orm import Session
+    from app.database import get_db, get_read_db
+    from app.leaderboard_service import leaderboard_service
+    from app.picks_routes import get_current_user
+    from app import models, schemas, crud
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/api/games", response_model=schemas.GameListResponse)
+    def get_games(days_ahead: int = 14, db: Session = Depends(get_read_db)):
+        games = crud.get_upcoming_games(db, days_ahead=days_ahead)
+        return {"games": games, "total": len(games)}
+
+    @sync_app.get("/api/picks/active")
+    def get_active_picks(db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
+        picks = db.query(models.Pick).filter(
+            models.Pick.user_id == current_user['id'],
+            models.Pick.result == None
+        ).all()
+        result = []
+        for pick in picks:
+            prop = pick.player_prop
+            game = prop.game
+            result.append({
+                'id': pick.id,
+                'player_name': prop.player_name,
+                'prop_type': prop.prop_type,
+                'line': pick.line,
+                'prediction': pick.selection,
+                'game_id': game.external_id,
+                'home_team': game.home_team,
+                'away_team': game.away_team,
+                'game_date': game.commence_time,
+                'created_at': pick.created_at
+            })
+        return {'picks': result, 'total': len(result)}
+
+    @sync_app.get("/api/picks/check/{game_id}")
+    def check_user_picks_for_game(game_id: str, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
+        game = db.query(models.Game).filter(models.Game.external_id == game_id).first()
+        if not game:
+            return {'picks': {}}
+        props = db.query(models.PlayerProp).filter(models.PlayerProp.game_id == game.id).all()
+        picks = db.query(models.Pick).filter(
+            models.Pick.user_id == current_user['id'],
+            models.Pick.player_prop_id.in_([p.id for p in props])
+        ).all()
+        return {'picks': {f"{pick.player_prop.player_name}-{pick.player_prop.prop_type}": pick.selection for pick in picks}}
+
+    @sync_app.get("/api/grading/leaderboard")
+    def get_leaderboard(timeframe: str = "overall", current_user_id: int = None, limit: int = None, db: Session = Depends(get_db)):
+        return leaderboard_service.get_leaderboard(db, timeframe=timeframe, current_user_id=current_user_id, limit=limit)
+
+    return sync_app
+
+def start_server(target, factory, port, database_path):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database_path}",
+        ODDS_API_KEY=os.environ.get('ODDS_API_KEY', 'load-test'),
+        # No scheduled jobs or projection reloads during the run
+        ODDS_REFRESH_INTERVAL_MINUTES='0',
+        GRADING_INTERVAL_MINUTES='0',
+        PROJECTIONS_RELOAD_SECONDS='0'
+    )
+    command = [sys.executable, '-m', 'uvicorn', target, '--port', str(port), '--log-level', 'warning', '--no-access-log']
+    if factory:
+        command.append('--factory')
+    server = subprocess.Popen(command, env=env)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + PATHS[0], timeout=5).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"{target} did not start")
+
+async def run_clients(base_url, clients, seconds):
+    """clients concurrent connections, each cycling through PATHS until time is up"""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        for path in PATHS:
+            await client.get(path)
+
+        stop_at = time.perf_counter() + seconds
+
+        async def worker(offset):
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(PATHS[index % len(PATHS)])
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                index += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, errors, elapsed
+
+def report(label, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{label:<14} no successful requests ({errors} errors)")
+        return
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{label:<14} {len(latencies) / elapsed:8.1f} req/s  p50 {p50 * 1000:8.1f} ms  "
+          f"p99 {p99 * 1000:8.1f} ms  max {latencies[-1] * 1000:8.1f} ms  errors {errors}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the async read routes against the previous sync handlers")
+    parser.add_argument('--clients', type=int, default=500, help="Concurrent client connections")
+    parser.add_argument('--seconds', type=float, default=20, help="Duration of each run")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--props-per-game', type=int, default=12)
+    parser.add_argument('--picks', type=int, default=40000)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        seeded = os.path.join(directory, 'seed.db')
+        seed(seeded, args.games, args.props_per_game, args.picks)
+        print(f"Seeded {args.games} games, {args.games * args.props_per_game} props, {args.picks} picks; "
+              f"{args.clients} clients over {', '.join(PATHS)}\n")
+
+        for label, target, factory in (
+            ("Sync handlers", "load_test:create_sync_app", True),
+            ("Async routes", "app.main:app", False)
+        ):
+            database_path = os.path.join(directory, f"{target.split(':')[0]}.db")
+            shutil.copy(seeded, database_path)
+
+            server, base_url = start_server(target, factory, args.port, database_path)
+            try:
+                latencies, errors, elapsed = asyncio.run(run_clients(base_url, args.clients, args.seconds))
+                report(label, latencies, errors, elapsed)
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,89 @@
+# tests/conftest.py
+# Every test that takes `db` runs once on SQLite and once on PostgreSQL.
+# PostgreSQL runs need TEST_DATABASE_URL (docker compose sets it) and are
+# skipped without it. The database it points at is wiped by the tests.
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# app.config reads these at import time; the app's own engines are never used here
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}")
+os.environ.setdefault('ODDS_API_KEY', 'test')
+
+# The global services read and write files relative to the working directory
+# (data_cache.json, projections.db); keep them out of the checkout
+os.chdir(tempfile.mkdtemp())
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, create_engines
+from app.game_log_store import GameLogStore
+from app import models
+import app.game_log_store
+
+POSTGRES_URL = os.environ.get('TEST_DATABASE_URL')
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def engine(request, tmp_path):
+    """Empty schema on a fresh SQLite file, or on the PostgreSQL test database"""
+    if request.param == 'sqlite':
+        engine, _ = create_engines(f"sqlite:///{tmp_path / 'test.db'}")
+    else:
+        if not POSTGRES_URL:
+            pytest.skip("TEST_DATABASE_URL is not set")
+        engine, _ = create_engines(POSTGRES_URL)
+        Base.metadata.drop_all(bind=engine)
+
+    Base.metadata.create_all(bind=engine)
+    yield engine
+
+    if request.param != 'sqlite':
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+@pytest.fixture
+def make_game(db):
+    """Add a game (started an hour ago unless commence_time is given)"""
+    def make_game(external_id, commence_time=None):
+        game = models.Game(
+            external_id=external_id,
+            home_team=f"Home {external_id}",
+            away_team=f"Away {external_id}",
+            commence_time=commence_time or datetime.utcnow() - timedelta(hours=1)
+        )
+        db.add(game)
+        db.commit()
+        return game
+    return make_game
+
+@pytest.fixture
+def make_prop(db):
+    """Add a live prop on a game"""
+    def make_prop(game, player_name, prop_type='points', line=20.5, bookmaker='fanduel'):
+        prop = models.PlayerProp(
+            game_id=game.id,
+            player_name=player_name,
+            prop_type=prop_type,
+            line=line,
+            over_odds=-110,
+            under_odds=-110,
+            bookmaker=bookmaker
+        )
+        db.add(prop)
+        db.commit()
+        return prop
+    return make_prop
+
+@pytest.fixture
+def game_log_store(engine, monkeypatch):
+    """A game log store on the test database"""
+    monkeypatch.setattr(app.game_log_store, 'SessionLocal', sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    monkeypatch.setattr(app.game_log_store, 'engine', engine)
+    return GameLogStore()
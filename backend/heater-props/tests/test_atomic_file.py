@@ -0,0 +1,26 @@
+# tests/test_atomic_file.py
+import os
+import pytest
+from app.atomic_file import replacing, write_atomically
+
+def test_write_atomically_replaces_the_file(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text('old')
+
+    write_atomically(str(path), 'new')
+
+    assert path.read_text() == 'new'
+    assert os.listdir(tmp_path) == ['cache.json']
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / 'projections.db'
+    path.write_text('old')
+
+    with pytest.raises(RuntimeError):
+        with replacing(str(path)) as tmp_path_name:
+            with open(tmp_path_name, 'w') as f:
+                f.write('half')
+            raise RuntimeError("build failed")
+
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['projections.db']
@@ -0,0 +1,34 @@
+# tests/test_boxscore_store.py
+import json
+from app.boxscore_store import BoxscoreStore
+
+STATS = {'LeBron James': {'points': 30.0, 'rebounds': 7.0}}
+
+def test_put_is_write_once(tmp_path):
+    store = BoxscoreStore(str(tmp_path))
+
+    assert store.put('g1', STATS)
+    assert not store.put('g1', {'LeBron James': {'points': 0.0}})
+    assert store.get('g1') == STATS
+
+def test_put_replaces_a_file_failing_its_checksum(tmp_path):
+    store = BoxscoreStore(str(tmp_path))
+    store.put('g1', STATS)
+
+    path = tmp_path / 'g1.json'
+    record = json.loads(path.read_text())
+    record['player_stats']['LeBron James']['points'] = 3.0
+    path.write_text(json.dumps(record))
+    assert store.get('g1') is None and not store.has('g1')
+
+    # The refetched boxscore replaces it and is served from disk again
+    assert store.put('g1', STATS)
+    assert store.get('g1') == STATS
+    assert store.get_stats()['writes'] == 2
+
+def test_put_replaces_an_unreadable_file(tmp_path):
+    store = BoxscoreStore(str(tmp_path))
+    (tmp_path / 'g1.json').write_text('{"game_id": "g1", "player_st')
+
+    assert store.put('g1', STATS)
+    assert store.get('g1') == STATS
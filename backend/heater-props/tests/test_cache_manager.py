@@ -0,0 +1,80 @@
+# tests/test_cache_manager.py
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from app.cache_backends import SQLiteCacheBackend
+from app.cache_manager import CacheManager
+
+def make_cache(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    return CacheManager(backend=backend, cache_duration_hours=1, max_stale_hours=1, sweep_interval_seconds=3600)
+
+def store(cache, key, data, age):
+    cache.backend.put(key, {'data': data, 'timestamp': datetime.now() - age, 'ttl': None, 'size': len(data)})
+
+def test_expired_item_is_not_taken_for_another_workers_load(tmp_path):
+    cache = make_cache(tmp_path)
+    store(cache, 'schedule', 'expired', age=timedelta(hours=5))
+
+    # Another worker holds the lease while it loads the key
+    other_worker = sqlite3.connect(str(tmp_path / 'cache.db'))
+    other_worker.execute("INSERT INTO cache_leases VALUES ('schedule', 'other-worker', ?)", (time.time() + 60,))
+    other_worker.commit()
+
+    loads = []
+    results = []
+    caller = threading.Thread(target=lambda: results.append(cache.get_or_load('schedule', lambda: loads.append(1))))
+    caller.start()
+    time.sleep(0.3)
+
+    # Still waiting: the expired item it saw is not the other worker's result
+    assert caller.is_alive()
+
+    store(cache, 'schedule', 'loaded by the other worker', age=timedelta(0))
+    other_worker.execute("DELETE FROM cache_leases")
+    other_worker.commit()
+    caller.join(5)
+
+    assert results == [('loaded by the other worker', 'joined')]
+    assert loads == []
+
+def test_get_or_load_reports_where_the_value_came_from(tmp_path):
+    cache = make_cache(tmp_path)
+
+    assert cache.get_or_load('games', lambda: 'first') == ('first', 'loaded')
+    assert cache.get_or_load('games', lambda: 'second') == ('first', 'fresh')
+
+    store(cache, 'games', 'expired', age=timedelta(hours=1, minutes=30))
+    release = threading.Event()
+    assert cache.get_or_load('games', lambda: release.wait(5) and 'refreshed') == ('expired', 'stale')
+    refresh = cache.in_flight['games']
+    release.set()
+    refresh.result(5)
+    assert cache.get_or_load('games', lambda: 'unused')[0] == 'refreshed'
+
+    assert cache.get_or_load('games', lambda: 'forced', refresh=True) == ('forced', 'loaded')
+
+def test_caller_joining_a_load_in_progress_gets_joined(tmp_path):
+    cache = make_cache(tmp_path)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_loader():
+        loading.set()
+        release.wait(5)
+        return 'new schedule'
+
+    results = []
+    loader_thread = threading.Thread(target=lambda: results.append(cache.get_or_load('games', slow_loader)))
+    loader_thread.start()
+    loading.wait(5)
+
+    joiner = threading.Thread(target=lambda: results.append(cache.get_or_load('games', lambda: 'unused', refresh=True)))
+    joiner.start()
+    time.sleep(0.1)
+    release.set()
+    loader_thread.join(5)
+    joiner.join(5)
+
+    assert sorted(results) == [('new schedule', 'joined'), ('new schedule', 'loaded')]
@@ -0,0 +1,60 @@
+# tests/test_game_log_ingest.py
+from datetime import date, datetime, timedelta
+from app import models
+from app.odds_service import NBAStatsService
+
+HEADERS = ['SEASON_ID', 'PLAYER_ID', 'GAME_ID', 'GAME_DATE', 'PTS']
+
+class LeagueGameLogAPI:
+    """leaguegamelog with one game per player per day; requests starting on a failing day raise"""
+    def __init__(self, players, failing_days=()):
+        self.players = players
+        self.failing_days = set(failing_days)
+        self.requests = []
+
+    def get_json(self, endpoint, params):
+        day_from = datetime.strptime(params['DateFrom'], '%m/%d/%Y').date()
+        day_to = datetime.strptime(params['DateTo'], '%m/%d/%Y').date()
+        self.requests.append((day_from, day_to))
+        if day_from in self.failing_days:
+            raise ConnectionError("timed out")
+
+        rows = []
+        day = day_from
+        while day <= day_to:
+            for player_id in self.players:
+                rows.append(['22024', player_id, f"002{day:%m%d}", day.isoformat(), 20])
+            day += timedelta(days=1)
+        return {'resultSets': [{'headers': HEADERS, 'rowSet': rows}]}
+
+def ingest(game_log_store, api, date_from, date_to):
+    service = NBAStatsService(http_client=api, game_logs=game_log_store)
+    return service.ingest_league_game_logs(date_from, date_to, season='2024-25', days_per_request=3)
+
+def test_failed_request_keeps_the_other_requests_rows(game_log_store, db):
+    api = LeagueGameLogAPI(players=[1, 2], failing_days=[date(2025, 1, 4)])
+
+    summary = ingest(game_log_store, api, date(2025, 1, 1), date(2025, 1, 9))
+
+    # Days 1-3 and 7-9 are stored; 4-6 failed
+    assert summary['rows_stored'] == 12
+    assert len(summary['errors']) == 1
+    assert db.query(models.PlayerGameLog).count() == 12
+    # A partial download doesn't count as synced, so the next read still asks the API
+    assert game_log_store.get_sync(1, '2024-25') is None
+
+    api.failing_days.clear()
+    summary = ingest(game_log_store, api, date(2025, 1, 1), date(2025, 1, 9))
+
+    assert summary['rows_stored'] == 6
+    assert summary['errors'] == []
+    assert db.query(models.PlayerGameLog).count() == 18
+    assert game_log_store.get_sync(1, '2024-25')['last_game_date'] == date(2025, 1, 9)
+
+def test_append_many_skips_stored_games(game_log_store, db):
+    row = ['22024', 1, '0020101', 'JAN 01, 2025', 20]
+    assert game_log_store.append_many('2024-25', {1: [row]}) == 1
+    assert game_log_store.append_many('2024-25', {1: [row, ['22024', 1, '0020102', 'JAN 02, 2025', 25]]}) == 1
+
+    assert [game[2] for game in game_log_store.get_recent(1, '2024-25')] == ['0020102', '0020101']
+    assert game_log_store.get_sync(1, '2024-25')['last_game_date'] == date(2025, 1, 2)
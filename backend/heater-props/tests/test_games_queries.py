@@ -0,0 +1,51 @@
+# tests/test_games_queries.py
+# The games endpoints load props eagerly: the number of statements must not
+# grow with the number of games
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import crud
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def seed_games(make_game, make_prop, count):
+    games = []
+    for number in range(count):
+        game = make_game(f"game-{number}", commence_time=datetime.utcnow() + timedelta(hours=1 + number))
+        for player in range(3):
+            for prop_type in ('points', 'rebounds', 'assists'):
+                make_prop(game, f"Player {number}-{player}", prop_type)
+        games.append(game)
+    return games
+
+def statements_per_call(engine, db, call):
+    db.expire_all()
+    with count_statements(engine) as statements:
+        games = call()
+        # Touch everything the routes serialize; nothing may lazy load
+        for game in games:
+            [prop.line for prop in game.player_props]
+    return len(statements)
+
+@pytest.mark.parametrize('games', [1, 5, 20])
+def test_upcoming_games_statements_do_not_grow_with_games(engine, db, make_game, make_prop, games):
+    seed_games(make_game, make_prop, games)
+
+    assert statements_per_call(engine, db, lambda: crud.get_upcoming_games(db)) == 2
+
+@pytest.mark.parametrize('games', [1, 5, 20])
+def test_get_game_statements_do_not_grow_with_games(engine, db, make_game, make_prop, games):
+    game_ids = [game.id for game in seed_games(make_game, make_prop, games)]
+
+    for game_id in game_ids:
+        assert statements_per_call(engine, db, lambda: [crud.get_game(db, game_id)]) == 2
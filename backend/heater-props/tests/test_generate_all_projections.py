@@ -0,0 +1,33 @@
+# tests/test_generate_all_projections.py
+import json
+import os
+from generate_all_projections import CHECKPOINT_FILE, compact_checkpoint, load_checkpoint
+
+GAMES = [{'game_id': game_id} for game_id in ('g1', 'g2', 'g3')]
+
+def write_checkpoint(entries):
+    with open(CHECKPOINT_FILE, 'w') as f:
+        for game_id, error in entries:
+            entry = {'game_info': {'game_id': game_id}, 'projections': [] if error else [{'player': 'A'}]}
+            if error:
+                entry['error'] = error
+            f.write(json.dumps(entry) + '\n')
+
+def test_compact_checkpoint_keeps_finished_games_when_some_failed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_checkpoint([('g1', None), ('g2', 'timed out'), ('g3', None)])
+
+    compact_checkpoint(GAMES)
+
+    # The next run resumes with g1 and g3 done and retries only g2
+    assert set(load_checkpoint()) == {'g1', 'g3'}
+    assert set(json.load(open('projections_cache.json'))) == {'g1', 'g2', 'g3'}
+
+def test_compact_checkpoint_removes_checkpoint_when_all_finished(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_checkpoint([('g1', None), ('g2', 'timed out'), ('g2', None), ('g3', None)])
+
+    compact_checkpoint(GAMES)
+
+    assert not os.path.exists(CHECKPOINT_FILE)
+    assert 'error' not in json.load(open('projections_cache.json'))['g2']
@@ -0,0 +1,77 @@
+# tests/test_grading.py
+from app import models
+from app.grading_service import grading_service
+
+def test_grade_picks_for_game(db, make_game, make_prop, monkeypatch):
+    game = make_game('abc')
+    points = make_prop(game, 'LeBron James', 'points', line=24.5)
+    rebounds = make_prop(game, 'LeBron James', 'rebounds', line=7.5)
+    db.add_all([
+        models.Pick(user_id=1, player_prop_id=points.id, selection='over', line=24.5),
+        models.Pick(user_id=2, player_prop_id=points.id, selection='under', line=24.5),
+        models.Pick(user_id=1, player_prop_id=rebounds.id, selection='over', line=7.5)
+    ])
+    db.commit()
+
+    boxscore = {'LeBron James': {'points': 30.0, 'rebounds': 7.0, 'assists': 9.0}}
+    monkeypatch.setattr(grading_service, 'fetch_final_stats', lambda external_id: ('Final', boxscore))
+
+    summary = grading_service.grade_picks_for_game(db, game)
+
+    assert summary['status'] == 'completed'
+    assert summary['results'] == {'won': 1, 'lost': 2, 'push': 0, 'not_found': 0}
+
+    db.expire_all()
+    records = {
+        stat.user_id: (stat.wins, stat.losses)
+        for stat in db.query(models.LeaderboardStat).filter(models.LeaderboardStat.timeframe == 'overall')
+    }
+    assert records == {1: (1, 1), 2: (0, 1)}
+
+def test_grade_game_rules(db, make_game, make_prop):
+    game = make_game('abc')
+    other_game = make_game('def')
+    points = make_prop(game, 'LeBron James', 'points', line=25.0)
+    threes = make_prop(game, 'LeBron James', 'threes', line=0.5)
+    bench = make_prop(game, 'Bench Player', 'points', line=4.5)
+    elsewhere = make_prop(other_game, 'LeBron James', 'points', line=25.0)
+
+    picks = {
+        'push': models.Pick(user_id=1, player_prop_id=points.id, selection='over', line=25.0),
+        'over won': models.Pick(user_id=2, player_prop_id=points.id, selection='over', line=24.5),
+        'over lost': models.Pick(user_id=3, player_prop_id=points.id, selection='over', line=25.5),
+        'under won': models.Pick(user_id=4, player_prop_id=points.id, selection='under', line=25.5),
+        'under lost': models.Pick(user_id=5, player_prop_id=points.id, selection='under', line=24.5),
+        # The boxscore has no 'threes', so the actual value is 0
+        'missing stat': models.Pick(user_id=1, player_prop_id=threes.id, selection='under', line=0.5),
+        # Not in the boxscore: left ungraded
+        'missing player': models.Pick(user_id=1, player_prop_id=bench.id, selection='over', line=4.5),
+        # Another game's pick is untouched
+        'other game': models.Pick(user_id=1, player_prop_id=elsewhere.id, selection='over', line=25.0)
+    }
+    # Already graded picks are not graded again
+    picks['graded'] = models.Pick(user_id=6, player_prop_id=points.id, selection='under', line=30.5, result='lost', actual_value=10.0)
+    db.add_all(picks.values())
+    db.commit()
+
+    results, graded_users = grading_service._grade_game(db, game.id, {
+        'LeBron James': {'points': 25.0, 'rebounds': 8.0}
+    })
+    db.commit()
+
+    assert results == {'won': 3, 'lost': 2, 'push': 1, 'not_found': 1}
+    assert graded_users == {1, 2, 3, 4, 5}
+
+    db.expire_all()
+    graded = {name: (pick.result, pick.actual_value) for name, pick in picks.items()}
+    assert graded == {
+        'push': ('push', 25.0),
+        'over won': ('won', 25.0),
+        'over lost': ('lost', 25.0),
+        'under won': ('won', 25.0),
+        'under lost': ('lost', 25.0),
+        'missing stat': ('won', 0.0),
+        'missing player': (None, None),
+        'other game': (None, None),
+        'graded': ('lost', 10.0)
+    }
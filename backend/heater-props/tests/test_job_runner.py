@@ -0,0 +1,123 @@
+# tests/test_job_runner.py
+# Several worker processes share the jobs table: a job belongs to whichever
+# worker heartbeats it, and only jobs nobody heartbeats are recovered
+import threading
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from app import models
+import app.grading_routes
+import app.job_runner
+from app.job_runner import JobRunner
+
+@pytest.fixture
+def runner(engine, monkeypatch):
+    monkeypatch.setattr(app.job_runner, 'SessionLocal', sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    runner = JobRunner(max_workers=1, heartbeat_seconds=30)
+    release = threading.Event()
+    runner.register('slow', lambda db, progress=None, days=1: {'released': release.wait(10)})
+    yield runner
+    release.set()
+    runner.shutdown()
+    runner.executor.shutdown(wait=True)
+
+def add_job(db, kind, status, owner='other-host:1234', heartbeat_age=None, params='{"days": 1}'):
+    job = models.Job(
+        kind=kind,
+        status=status,
+        params=params,
+        owner=owner,
+        heartbeat_at=datetime.utcnow() - heartbeat_age if heartbeat_age is not None else None
+    )
+    db.add(job)
+    db.commit()
+    return job.id
+
+def test_recover_interrupted_only_fails_jobs_without_a_live_worker(runner, db):
+    alive = add_job(db, 'update-odds', 'running', heartbeat_age=timedelta(seconds=5))
+    dead = add_job(db, 'grade-all', 'running', heartbeat_age=timedelta(minutes=10))
+    legacy = add_job(db, 'preload-boxscores', 'queued', owner=None)
+
+    runner.recover_interrupted()
+
+    db.expire_all()
+    statuses = {job.id: job.status for job in db.query(models.Job)}
+    assert statuses == {alive: 'running', dead: 'failed', legacy: 'failed'}
+
+def test_enqueue_returns_another_workers_active_job(runner, db):
+    other = add_job(db, 'slow', 'running', heartbeat_age=timedelta(seconds=5))
+
+    job = runner.enqueue('slow')
+
+    assert job['job_id'] == other
+    assert job['deduplicated']
+
+def test_enqueue_replaces_a_job_whose_worker_died(runner, db):
+    dead = add_job(db, 'slow', 'running', heartbeat_age=timedelta(minutes=10))
+
+    job = runner.enqueue('slow')
+
+    assert job['job_id'] != dead
+    assert job['owner'] == runner.owner
+    db.expire_all()
+    assert db.get(models.Job, dead).status == 'failed'
+
+def test_enqueue_race_between_workers_shares_one_job(runner, db, monkeypatch):
+    # Another process inserts its job after our active-job check
+    other = {}
+    real_active_job = runner._active_job
+    def active_job_after_race(session, kind, params):
+        if not other:
+            other['id'] = add_job(db, kind, 'queued', heartbeat_age=timedelta(seconds=1))
+            return None
+        return real_active_job(session, kind, params)
+    monkeypatch.setattr(runner, '_active_job', active_job_after_race)
+
+    job = runner.enqueue('slow')
+
+    assert job['job_id'] == other['id']
+    assert job['deduplicated']
+    assert db.query(models.Job).count() == 1
+
+def test_enqueue_only_shares_a_job_with_the_same_params(runner, db):
+    first = runner.enqueue('slow')
+
+    # The handler's defaults count as given
+    assert runner.enqueue('slow', {'days': 1})['job_id'] == first['job_id']
+
+    # e.g. a forced refresh while a scheduled one runs: queued as its own job
+    other = runner.enqueue('slow', {'days': 7})
+    assert other['job_id'] != first['job_id']
+    assert not other.get('deduplicated')
+    assert other['params'] == {'days': 7}
+
+def test_one_active_job_per_kind_and_params(db):
+    add_job(db, 'slow', 'running', heartbeat_age=timedelta(seconds=1))
+    add_job(db, 'slow', 'completed')
+    add_job(db, 'slow', 'queued', params='{"days": 7}')
+
+    with pytest.raises(IntegrityError):
+        add_job(db, 'slow', 'queued')
+
+def test_preloads_of_different_ranges_each_get_a_job(runner, monkeypatch):
+    release = threading.Event()
+    stored = []
+    def preload(start_date, end_date, progress=None):
+        release.wait(10)
+        stored.append((start_date, end_date))
+        return {'stored': 1}
+    monkeypatch.setattr(app.grading_routes.grading_service, 'preload_boxscores', preload)
+    monkeypatch.setattr(app.grading_routes, 'job_runner', runner)
+    runner.register('preload-boxscores', app.grading_routes.preload_boxscores_job)
+
+    december = app.grading_routes.preload_boxscores(date(2024, 12, 1), date(2024, 12, 31))
+    january = app.grading_routes.preload_boxscores(date(2025, 1, 1), date(2025, 1, 31))
+    again = app.grading_routes.preload_boxscores(date(2024, 12, 1), date(2024, 12, 31))
+
+    assert january['job_id'] != december['job_id']
+    assert again['job_id'] == december['job_id'] and again['deduplicated']
+
+    release.set()
+    runner.executor.shutdown(wait=True)
+    assert sorted(stored) == [(date(2024, 12, 1), date(2024, 12, 31)), (date(2025, 1, 1), date(2025, 1, 31))]
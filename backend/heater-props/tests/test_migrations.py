@@ -0,0 +1,77 @@
+# tests/test_migrations.py
+from sqlalchemy import inspect, text
+from app import crud, models
+from app.database import sync_schema
+from app.leaderboard_service import leaderboard_service
+
+def test_sync_schema_clears_duplicates_before_unique_indexes(engine, db, make_game, make_prop):
+    # A database from before the unique indexes, with the duplicates they now forbid
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX idx_pick_user_prop"))
+        conn.execute(text("DROP INDEX idx_player_prop_active_key"))
+
+    game = make_game('abc')
+    first_prop = make_prop(game, 'LeBron James', line=24.5)
+    second_prop = make_prop(game, 'LeBron James', line=25.5)
+    other_prop = make_prop(game, 'Anthony Davis', line=22.5)
+    db.add_all([
+        models.Pick(user_id=1, player_prop_id=first_prop.id, selection='over', line=24.5),
+        models.Pick(user_id=1, player_prop_id=first_prop.id, selection='under', line=24.5),
+        models.Pick(user_id=1, player_prop_id=second_prop.id, selection='over', line=25.5),
+        models.Pick(user_id=2, player_prop_id=first_prop.id, selection='under', line=24.5)
+    ])
+    db.commit()
+
+    sync_schema(engine)
+
+    index_names = {index['name'] for index in inspect(engine).get_indexes('picks')}
+    index_names |= {index['name'] for index in inspect(engine).get_indexes('player_props')}
+    assert {'idx_pick_user_prop', 'idx_player_prop_active_key'} <= index_names
+
+    db.expire_all()
+    live = db.query(models.PlayerProp.id).filter(models.PlayerProp.retired_at == None).order_by(models.PlayerProp.id)
+    assert [prop_id for (prop_id,) in live] == [first_prop.id, other_prop.id]
+
+    picks = db.query(models.Pick.id, models.Pick.user_id, models.Pick.player_prop_id, models.Pick.selection).order_by(models.Pick.id).all()
+    assert [pick[1:] for pick in picks] == [
+        (1, first_prop.id, 'over'),
+        (1, second_prop.id, 'over'),  # The retired prop keeps its pick
+        (2, first_prop.id, 'under')
+    ]
+
+    # The upserts have their conflict targets again
+    assert crud.upsert_pick(db, 1, first_prop.id, 'under', 24.5) == picks[0].id
+    crud.bulk_create_player_props(db, [{
+        'game_id': game.id, 'player_name': 'LeBron James', 'prop_type': 'points',
+        'line': 26.5, 'over_odds': -110, 'under_odds': -110, 'bookmaker': 'fanduel'
+    }])
+    db.expire_all()
+    assert float(db.get(models.PlayerProp, first_prop.id).line) == 26.5
+
+def test_sync_schema_is_idempotent(engine):
+    sync_schema(engine)
+    sync_schema(engine)
+
+def test_duplicate_pick_cleanup_keeps_graded_picks_and_the_leaderboard(engine, db, make_game, make_prop):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX idx_pick_user_prop"))
+
+    prop = make_prop(make_game('abc'), 'LeBron James', line=24.5)
+    def pick(user_id, result):
+        return models.Pick(user_id=user_id, player_prop_id=prop.id, selection='over', line=24.5, result=result)
+    ungraded, graded = pick(1, None), pick(1, 'won')
+    first_won, second_lost = pick(2, 'won'), pick(2, 'lost')
+    db.add_all([ungraded, graded, first_won, second_lost])
+    db.commit()
+    leaderboard_service.rebuild(db)
+
+    sync_schema(engine)
+
+    db.expire_all()
+    assert [pick_id for (pick_id,) in db.query(models.Pick.id).order_by(models.Pick.id)] == [graded.id, first_won.id]
+
+    records = {
+        stat.user_id: (stat.wins, stat.losses)
+        for stat in db.query(models.LeaderboardStat).filter(models.LeaderboardStat.timeframe == 'overall')
+    }
+    assert records == {1: (1, 0), 2: (1, 0)}
@@ -0,0 +1,53 @@
+# tests/test_odds_refresh.py
+import pytest
+from app import models
+from app.cache_backends import MemoryCacheBackend
+from app.cache_manager import CacheManager
+from app.odds_service import stats_service
+from app.projection_service import projection_service
+import app.odds_refresh
+from app.odds_refresh import refresh_odds
+
+SCHEDULE = [{
+    'game_id': 'abc',
+    'game_date': '2026-01-10T19:00:00',
+    'home_team_name': 'Home abc',
+    'away_team_name': 'Away abc'
+}]
+
+@pytest.fixture
+def schedule_cache(tmp_path, monkeypatch):
+    cache = CacheManager(backend=MemoryCacheBackend(str(tmp_path / 'cache.json')), sweep_interval_seconds=3600)
+    monkeypatch.setattr(app.odds_refresh, 'cache_manager', cache)
+    monkeypatch.setattr(stats_service, 'fetch_schedule', lambda: SCHEDULE)
+    monkeypatch.setattr(projection_service, 'get_projections_for_game', lambda game_id: [{
+        'player_name': 'LeBron James',
+        'prop_type': 'points',
+        'line': 26.5,
+        'over_odds': -110,
+        'under_odds': -110,
+        'bookmaker': 'fanduel'
+    }])
+    return cache
+
+def test_cached_schedule_skips_games_with_props_but_force_refresh_does_not(db, make_game, make_prop, schedule_cache):
+    make_prop(make_game('abc'), 'LeBron James', line=24.5)
+
+    first = refresh_odds(db)
+    assert (first['schedule_source'], first['from_cache'], first['updated'], first['skipped']) == ('loaded', False, 1, 0)
+
+    cached = refresh_odds(db)
+    assert (cached['schedule_source'], cached['from_cache'], cached['updated'], cached['skipped']) == ('fresh', True, 0, 1)
+
+    forced = refresh_odds(db, force_refresh=True)
+    assert (forced['schedule_source'], forced['from_cache'], forced['updated'], forced['skipped']) == ('loaded', False, 1, 0)
+
+def test_joined_schedule_load_counts_as_new_data(db, make_game, make_prop, schedule_cache, monkeypatch):
+    make_prop(make_game('abc'), 'LeBron James', line=24.5)
+    monkeypatch.setattr(schedule_cache, 'get_or_load', lambda key, loader, refresh=False: (loader(), 'joined'))
+
+    summary = refresh_odds(db, force_refresh=True)
+
+    assert (summary['from_cache'], summary['updated'], summary['skipped']) == (False, 1, 0)
+    db.expire_all()
+    assert [float(prop.line) for prop in db.query(models.PlayerProp).filter(models.PlayerProp.retired_at == None)] == [26.5]
@@ -0,0 +1,32 @@
+# tests/test_player_game_log.py
+from app.odds_service import NBAStatsService
+from app.slate_memo import SlateMemo
+
+class FlakyPlayerGameLogAPI:
+    """playergamelog that fails the first `failures` requests"""
+    def __init__(self, failures):
+        self.failures = failures
+        self.requests = 0
+
+    def get_json(self, endpoint, params):
+        self.requests += 1
+        if self.requests <= self.failures:
+            raise ConnectionError("timed out")
+        return {'resultSets': [{'rowSet': [['22024', params['PlayerID'], '0020101', 'JAN 01, 2025', 20]]}]}
+
+def test_failed_game_log_lookup_is_not_memoized(game_log_store, tmp_path):
+    api = FlakyPlayerGameLogAPI(failures=1)
+    memo = SlateMemo(str(tmp_path / 'memo.json'))
+    service = NBAStatsService(http_client=api, game_logs=game_log_store, memo=memo)
+
+    # The failed request falls back to the (empty) stored log
+    assert service.fetch_player_game_log(7, '2024-25') == []
+
+    # ... and isn't remembered, so the next lookup asks the API again
+    log = service.fetch_player_game_log(7, '2024-25')
+    assert [game[2] for game in log] == ['0020101']
+    assert api.requests == 2
+
+    # A successful lookup is memoized
+    assert service.fetch_player_game_log(7, '2024-25') == log
+    assert api.requests == 2
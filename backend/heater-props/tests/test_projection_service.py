@@ -0,0 +1,110 @@
+# tests/test_projection_service.py
+import json
+import os
+import sqlite3
+import time
+import zlib
+from app.projection_service import ProjectionService
+from app.projection_store import ProjectionStore
+
+def entry(game_id, points):
+    return {
+        'game_info': {'game_id': game_id, 'away_team': 'Away', 'home_team': 'Home'},
+        'projections': [{'player_name': 'LeBron James', 'points': points}]
+    }
+
+def write_legacy_file(path, games):
+    """A projections.db as written before checksums and build metadata existed"""
+    connection = sqlite3.connect(path)
+    connection.execute("""
+        CREATE TABLE game_projections (
+            game_id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            game_info TEXT NOT NULL,
+            error TEXT,
+            projection_count INTEGER NOT NULL,
+            projections BLOB NOT NULL
+        )
+    """)
+    for position, (game_id, game) in enumerate(games.items()):
+        connection.execute("INSERT INTO game_projections VALUES (?, ?, ?, ?, ?, ?)", (
+            game_id,
+            position,
+            json.dumps(game['game_info'], separators=(',', ':')),
+            None,
+            len(game['projections']),
+            zlib.compress(json.dumps(game['projections'], separators=(',', ':')).encode(), 9)
+        ))
+    connection.commit()
+    connection.close()
+
+def test_loads_projections_file_without_checksums(tmp_path):
+    path = str(tmp_path / 'projections.db')
+    write_legacy_file(path, {'g1': entry('g1', 25.5), 'g2': entry('g2', 30.5)})
+
+    service = ProjectionService(projections_db=path, projections_file=str(tmp_path / 'missing.json'))
+
+    status = service.get_status()
+    assert status['loaded'] and status['source'] == 'indexed'
+    assert status['version']
+    assert service.get_projections_for_game('g2') == [{'player_name': 'LeBron James', 'points': 30.5}]
+
+    # Rebuilt in the current format: only the changed game counts as changed
+    ProjectionStore.write(path, [('g1', entry('g1', 25.5)), ('g2', entry('g2', 31.5))])
+    summary = service.reload()
+    assert (summary['added'], summary['changed'], summary['removed']) == (0, 1, 0)
+
+def test_reload_closes_the_replaced_store(tmp_path):
+    path = str(tmp_path / 'projections.db')
+    ProjectionStore.write(path, [('g1', entry('g1', 25.5))])
+    service = ProjectionService(
+        projections_db=path,
+        projections_file=str(tmp_path / 'missing.json'),
+        retired_store_close_seconds=0
+    )
+    service.get_projections_for_game('g1')
+    old_store = service.snapshot.store
+    assert len(old_store.connections) == 1
+
+    ProjectionStore.write(path, [('g1', entry('g1', 26.5))])
+    assert service.reload()['reloaded']
+
+    deadline = time.monotonic() + 5
+    while old_store.connections and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert old_store.connections == []
+    assert service.get_projections_for_game('g1') == [{'player_name': 'LeBron James', 'points': 26.5}]
+
+    # A request still holding the old snapshot gets a miss, not a closed connection
+    assert old_store.get('g1') is None
+    assert old_store.projection_count('g1') == 0
+
+def test_close_waits_for_reads_in_progress(tmp_path):
+    path = str(tmp_path / 'projections.db')
+    ProjectionStore.write(path, [('g1', entry('g1', 25.5)), ('g2', entry('g2', 30.5))])
+    store = ProjectionStore(path)
+
+    games = store.iter_games()
+    assert next(games)[0] == 'g1'
+    store.close()
+
+    assert len(store.connections) == 1
+    assert next(games)[0] == 'g2'
+    assert list(games) == []
+    assert store.connections == []
+    assert store.index() == {}
+
+def test_failed_load_keeps_the_current_snapshot(tmp_path):
+    path = str(tmp_path / 'projections.db')
+    ProjectionStore.write(path, [('g1', entry('g1', 25.5))])
+    service = ProjectionService(projections_db=path, projections_file=str(tmp_path / 'missing.json'))
+
+    # e.g. a half-copied file moved into place
+    broken = str(tmp_path / 'broken.db')
+    with open(broken, 'wb') as f:
+        f.write(b'not a database')
+    os.replace(broken, path)
+    summary = service.reload()
+
+    assert not summary['reloaded'] and summary['error']
+    assert service.get_projections_for_game('g1') == [{'player_name': 'LeBron James', 'points': 25.5}]
@@ -0,0 +1,84 @@
+# tests/test_upserts.py
+from datetime import datetime, timedelta
+from app import crud, models, schemas
+
+def test_upsert_game_inserts_then_updates(db):
+    start = datetime(2026, 1, 10, 19, 0)
+    game = crud.upsert_game(db, schemas.GameCreate(
+        external_id='abc', home_team='Lakers', away_team='Celtics', commence_time=start
+    ))
+    db.commit()
+
+    moved = crud.upsert_game(db, schemas.GameCreate(
+        external_id='abc', home_team='Lakers', away_team='Celtics', commence_time=start + timedelta(hours=2)
+    ))
+    db.commit()
+
+    assert moved.id == game.id
+    assert db.query(models.Game).count() == 1
+    db.expire_all()
+    assert db.get(models.Game, game.id).commence_time == start + timedelta(hours=2)
+
+def test_upsert_pick_replaces_selection(db, make_game, make_prop):
+    prop = make_prop(make_game('abc'), 'LeBron James')
+
+    first = crud.upsert_pick(db, user_id=1, player_prop_id=prop.id, selection='over', line=20.5)
+    second = crud.upsert_pick(db, user_id=1, player_prop_id=prop.id, selection='under', line=21.5)
+    other_user = crud.upsert_pick(db, user_id=2, player_prop_id=prop.id, selection='over', line=20.5)
+    db.commit()
+
+    assert first == second
+    assert other_user != first
+    pick = db.get(models.Pick, first)
+    assert (pick.selection, pick.line) == ('under', 21.5)
+    assert db.query(models.Pick).count() == 2
+
+def _prop_row(game_id, player_name, line, bookmaker='fanduel'):
+    return {
+        'game_id': game_id,
+        'player_name': player_name,
+        'prop_type': 'points',
+        'line': line,
+        'over_odds': -110,
+        'under_odds': -110,
+        'bookmaker': bookmaker
+    }
+
+def test_bulk_create_player_props_updates_live_props(db, make_game):
+    game = make_game('abc')
+
+    inserted = crud.bulk_create_player_props(db, [
+        _prop_row(game.id, 'LeBron James', 24.5),
+        _prop_row(game.id, 'LeBron James', 25.5),  # Same key twice in one batch: the last one wins
+        _prop_row(game.id, 'LeBron James', 24.5, bookmaker='draftkings'),
+        _prop_row(game.id, 'Anthony Davis', 22.5)
+    ])
+    assert inserted == 3
+
+    # A concurrent refresh sending the same props updates them instead of duplicating
+    crud.bulk_create_player_props(db, [_prop_row(game.id, 'LeBron James', 26.5)])
+
+    db.expire_all()
+    lines = {
+        (prop.player_name, prop.bookmaker): float(prop.line)
+        for prop in db.query(models.PlayerProp)
+    }
+    assert lines == {
+        ('LeBron James', 'fanduel'): 26.5,
+        ('LeBron James', 'draftkings'): 24.5,
+        ('Anthony Davis', 'fanduel'): 22.5
+    }
+    # Three opening lines, plus the line the second refresh moved
+    assert db.query(models.PropLineSnapshot).count() == 4
+
+def test_bulk_create_player_props_after_retirement(db, make_game, make_prop):
+    game = make_game('abc')
+    retired = make_prop(game, 'LeBron James', line=24.5)
+    retired.retired_at = datetime.utcnow()
+    db.commit()
+
+    # The partial unique index only covers live props, so the key can come back
+    crud.bulk_create_player_props(db, [_prop_row(game.id, 'LeBron James', 27.5)])
+
+    props = db.query(models.PlayerProp).order_by(models.PlayerProp.id).all()
+    assert [(float(prop.line), prop.retired_at is None) for prop in props] == [(24.5, False), (27.5, True)]
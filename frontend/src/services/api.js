@@ -23,12 +23,25 @@ export const fetchGameById = async (gameId) => {
   }
 };
 
+// Queues a background refresh and returns the job (poll it with fetchJob)
 export const updateOdds = async () => {
   try {
-    const response = await axios.get(`${API_BASE_URL}/update-odds`);
+    const response = await axios.get(`${API_BASE_URL}/update-odds`, {
+      params: { background: true }
+    });
     return response.data;
   } catch (error) {
     console.error('Error updating odds:', error);
     throw error;
   }
+};
+
+export const fetchJob = async (jobId) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/jobs/${jobId}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching job:', error);
+    throw error;
+  }
 };
\ No newline at end of file